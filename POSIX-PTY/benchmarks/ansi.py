@@ -0,0 +1,146 @@
+import re
+import sys
+import time
+import random
+import argparse
+
+from iobridge.ansi import AnsiParser, strip_ansi
+
+# Escape-sequence stripping and tokenizing on colour-heavy output.
+#
+#   python -m benchmarks.ansi
+#
+# Synthetic `ls --color`, `git log` and htop-style output is cut into 4 KB
+# reads, as the PTY hands it over. "old regex" is the _ANSI_RE that
+# OutputReader used before iobridge.ansi; "state machine" is a byte-level
+# parser in pure Python that only leaves plain text to bytes.find().
+
+_OLD_ANSI_RE = re.compile(
+    rb"\x1b(?:"
+    rb"\[[0-9;?]*[A-Za-z]"
+    rb"|\][^\x07\x1b]*(?:\x07|\x1b\\)"
+    rb"|[^[]"
+    rb")"
+)
+
+_GROUND, _ESCAPE, _INTERMEDIATE, _CSI, _OSC, _OSC_ESC, _STRING, _STRING_ESC = range(8)
+
+
+def machine_strip(data: bytes) -> bytes:
+    out   = []
+    state = _GROUND
+    pos, end = 0, len(data)
+    while pos < end:
+        if state == _GROUND:
+            esc = data.find(b"\x1b", pos)
+            if esc == -1:
+                out.append(data[pos:])
+                break
+            out.append(data[pos:esc])
+            pos, state = esc + 1, _ESCAPE
+            continue
+        byte = data[pos]
+        pos += 1
+        if state == _ESCAPE:
+            if byte == 0x5b:
+                state = _CSI
+            elif byte == 0x5d:
+                state = _OSC
+            elif byte in (0x50, 0x58, 0x5e, 0x5f):
+                state = _STRING
+            elif 0x20 <= byte <= 0x2f:
+                state = _INTERMEDIATE
+            else:
+                state = _GROUND
+        elif state == _CSI:
+            if byte >= 0x40:
+                state = _GROUND
+        elif state == _INTERMEDIATE:
+            if byte >= 0x30:
+                state = _GROUND
+        elif state == _OSC:
+            if byte == 0x07:
+                state = _GROUND
+            elif byte == 0x1b:
+                state = _OSC_ESC
+        elif state == _STRING:
+            if byte == 0x1b:
+                state = _STRING_ESC
+        else:
+            state = _GROUND
+    return b"".join(out)
+
+
+def _ls(rng: random.Random) -> str:
+    names = []
+    for _ in range(6):
+        name  = "".join(rng.choice("abcdefghijklmnop_-.") for _ in range(rng.randrange(4, 16)))
+        color = rng.choice(("01;34", "01;32", "01;36", "00", "40;33;01", "01;35"))
+        names.append(f"\x1b[0m\x1b[{color}m{name}\x1b[0m  ")
+    return "".join(names) + "\r\n"
+
+
+def _git_log(rng: random.Random) -> str:
+    return (f"\x1b[33mcommit {rng.getrandbits(160):040x}\x1b[m\x1b[33m (\x1b[m\x1b[1;36mHEAD -> \x1b[m"
+            f"\x1b[1;32mmaster\x1b[m\x1b[33m)\x1b[m\r\n"
+            f"Author: Some Developer <dev@example.com>\r\nDate:   Sat Oct 17 00:06:45 2026 +0000\r\n\r\n"
+            f"    Fix the handler in module {rng.randrange(1000)} so that it works again\r\n\r\n")
+
+
+def _htop(rng: random.Random) -> str:
+    row = rng.randrange(1, 50)
+    return (f"\x1b[{row};1H\x1b[30m\x1b[46m  PID\x1b[39;49m\x1b[K\x1b[{row + 1};1H\x1b(B\x1b[m"
+            f"\x1b[32m{rng.randrange(99999):5}\x1b[39m \x1b[1m{rng.randrange(100):3}.{rng.randrange(10)}\x1b[m "
+            f"\x1b[36m{rng.randrange(4096)}M\x1b[39m \x1b[1;34m/usr/bin/proc{rng.randrange(100)}\x1b[m\x1b[K")
+
+
+def output(kind, size: int, seed: int) -> bytes:
+    rng = random.Random(seed)
+    out, total = [], 0
+    while total < size:
+        text   = kind(rng)
+        total += len(text)
+        out.append(text)
+    return "".join(out).encode()
+
+
+def timed(strip, reads: list[bytes]) -> float:
+    began = time.perf_counter()
+    for data in reads:
+        strip(data)
+    return time.perf_counter() - began
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Benchmark escape-sequence stripping.")
+    parser.add_argument("--megabytes", type=float, default=4.0)
+    parser.add_argument("--read", type=int, default=4096, help="bytes per simulated PTY read")
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    for label, kind in (("ls --color", _ls), ("git log", _git_log), ("htop", _htop)):
+        data  = output(kind, int(args.megabytes * 1e6), 1)
+        reads = [data[pos:pos + args.read] for pos in range(0, len(data), args.read)]
+        paths = {
+            "old regex":     lambda data: _OLD_ANSI_RE.sub(b"", data),
+            "strip_ansi":    strip_ansi,
+            "parser.strip":  AnsiParser().strip,
+            "parser.feed":   AnsiParser().feed,
+            "state machine": machine_strip,
+        }
+        # Interleaved rounds, so a noisy stretch hits every path alike.
+        times = {name: None for name in paths}
+        for _ in range(args.rounds):
+            for name, strip in paths.items():
+                spent = timed(strip, reads)
+                times[name] = spent if times[name] is None else min(times[name], spent)
+        print(f"{label}: {len(data) / 1e6:.1f} MB in {args.read} B reads")
+        for name, spent in times.items():
+            print(f"  {name:14} {len(data) / spent / 1e6:7.1f} MB/s")
+
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        print("Error: This is the POSIX build. Use the Windows version for Win32.")
+        sys.exit(1)
+    main()
@@ -0,0 +1,76 @@
+import os
+import sys
+import time
+import argparse
+
+from iobridge.compress import Compressor, Decompressor, methods
+from benchmarks.render_delta import record, load
+
+# Compresses recorded sessions chunk by chunk, the way the servers do (one
+# sync flush per output chunk), with and without the preset dictionary.
+#
+#   python -m benchmarks.compression --record /tmp/rec     # record the workloads below
+#   python -m benchmarks.compression /tmp/rec/*.rec
+
+WORKLOADS = {
+    "ls":      "ls -laR --color=always /usr/lib/python3",
+    "git":     "git --no-pager log --stat --color=always -n 300",
+    "build":   "python3 -m compileall -f /usr/lib/python3",
+    "top":     "top -d 0.05",
+    "prompts": "bash -c 'for i in $(seq 300); do "
+               "printf \"\\033[01;32muser@host\\033[00m:\\033[01;34m~/src\\033[00m$ \"; "
+               "sleep 0.01; echo make -j8 target$i; done'",
+}
+
+
+def bench(path: str):
+    chunks = [data for _, data in load(path)]
+    raw    = sum(map(len, chunks))
+    print(f"{os.path.basename(path)}: {raw} bytes in {len(chunks)} chunks "
+          f"(median {sorted(map(len, chunks))[len(chunks) // 2]} B)")
+    for method in methods():
+        for dictionary in (True, False):
+            kwargs = {} if dictionary else {"dictionary": b""}
+            comp   = Compressor(method, **kwargs)
+            began  = time.process_time()
+            out    = [comp.compress(data) for data in chunks]
+            spent  = time.process_time() - began
+
+            decomp = Decompressor(method, **kwargs)
+            began  = time.process_time()
+            ok     = all(decomp.decompress(o) == data for o, data in zip(out, chunks))
+            undo   = time.process_time() - began
+
+            small  = [len(o) for o, data in zip(out, chunks) if len(data) <= 64]
+            label  = f"{method}{'+dict' if dictionary else ''}"
+            print(f"  {label:13} ratio {raw / max(comp.compressed, 1):6.1f}x  "
+                  f"compress {spent * 1e6 / len(chunks):6.1f} us/chunk ({raw / max(spent, 1e-9) / 1e6:6.1f} MB/s)  "
+                  f"decompress {undo * 1e6 / len(chunks):5.1f} us/chunk  "
+                  f"small chunks avg {sum(small) / max(len(small), 1):4.1f} B  {'ok' if ok else 'MISMATCH'}")
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Benchmark streaming output compression.")
+    parser.add_argument("paths", nargs="*", help="recordings made by benchmarks.render_delta or --record")
+    parser.add_argument("--record", metavar="DIR", default=None, help="record the built-in workloads into DIR")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    paths = list(args.paths)
+    if args.record:
+        os.makedirs(args.record, exist_ok=True)
+        for name, command in WORKLOADS.items():
+            path = os.path.join(args.record, f"{name}.rec")
+            record(command, args.seconds, path, 120, 30)
+            paths.append(path)
+    if not paths:
+        parser.error("give recordings or --record DIR")
+    for path in paths:
+        bench(path)
+
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        print("Error: This is the POSIX build. Use the Windows version for Win32.")
+        sys.exit(1)
+    main()
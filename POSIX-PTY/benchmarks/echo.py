@@ -0,0 +1,59 @@
+import sys
+import time
+import argparse
+
+from session.session import Session
+
+# Echo control against text-matching suppression, on the shell users actually
+# get: an interactive bash with readline.
+#
+#   python -m benchmarks.echo
+#   python -m benchmarks.echo --shell "bash --noediting"
+#
+# Each round sends `--commands` commands with send_command() and waits for
+# the prompt after each; echo=True hides the echoed lines by matching them,
+# echo=False never gets them.
+
+
+def commands(shell: str, echo: bool, count: int, command: str) -> tuple[float, int]:
+    received = 0
+
+    def sink(data):
+        nonlocal received
+        received += len(data)
+
+    with Session(shell=shell, echo=echo, shell_integration=True) as session:
+        session.attach(sink)
+        session.wait_ready(0, timeout=10)
+        began = time.perf_counter()
+        for _ in range(count):
+            prompts = session.prompts
+            session.send_command(command, delay=0)
+            session.wait_ready(prompts, timeout=30)
+        spent = time.perf_counter() - began
+    return spent, received
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Benchmark echo control against echo suppression.")
+    parser.add_argument("--shell", default="bash")
+    parser.add_argument("--commands", type=int, default=200)
+    parser.add_argument("--command", default="seq 1 2000")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"{args.commands} x '{args.command}' in '{args.shell}'")
+    for echo in (True, False, True, False):
+        best, received = None, 0
+        for _ in range(args.rounds):
+            spent, received = commands(args.shell, echo, args.commands, args.command)
+            best = spent if best is None else min(best, spent)
+        print(f"  echo {'on  (text suppression)' if echo else 'off (termios)         '}  "
+              f"best {best:6.2f} s  {received / 1e6:5.1f} MB")
+
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        print("Error: This is the POSIX build. Use the Windows version for Win32.")
+        sys.exit(1)
+    main()
@@ -0,0 +1,112 @@
+import sys
+import time
+import random
+import argparse
+
+from session.session  import Session
+from iobridge.latency import LatencyTracer, LatencyHistogram
+
+# Keystroke-to-echo latency, and what tracing it costs.
+#
+#   python -m benchmarks.latency
+#
+# "typing" sends single keystrokes to an interactive bash at a human pace and
+# prints the per-stage percentiles; "probe" times one full probe and the
+# histogram insert; "throughput" pushes a large command's output through a
+# Session with tracing off and on.
+
+
+def typing(keys: int, interval: float, flush_delay: float):
+    with Session(shell="bash", shell_integration=True, flush_delay=flush_delay, trace_latency=True) as session:
+        session.attach(lambda data: None)
+        session.wait_ready(0, timeout=10)
+        rng = random.Random(1)
+        for i in range(keys):
+            session.send_raw(rng.choice(b"abdefghijklmnopqrstuvwxyz ").to_bytes(1, "big"))
+            if i % 40 == 39:
+                session.send_raw(b"\x15")
+            time.sleep(interval)
+        time.sleep(0.1)
+        stages = session.metrics.latency.snapshot()
+    print(f"  flush_delay {flush_delay * 1e3:g} ms, {stages['total']['count']} probes")
+    for stage, values in stages.items():
+        print(f"    {stage:8} p50 {values['p50'] * 1e3:7.3f} ms  p99 {values['p99'] * 1e3:7.3f} ms  "
+              f"max {values['max'] * 1e3:7.3f} ms")
+
+
+def probe(rounds: int):
+    tracer = LatencyTracer()
+    began  = time.perf_counter()
+    for _ in range(rounds):
+        tracer.sent()
+        tracer.writing()
+        tracer.read()
+        tracer.delivered()
+    spent = time.perf_counter() - began
+    print(f"  sent/writing/read/delivered  {spent * 1e9 / rounds:6.0f} ns/probe")
+
+    # With no probe open, the reader's per-chunk hooks are two checks.
+    began = time.perf_counter()
+    for _ in range(rounds):
+        tracer.read()
+        tracer.delivered()
+    spent = time.perf_counter() - began
+    print(f"  read+delivered, no probe     {spent * 1e9 / rounds:6.0f} ns/chunk")
+
+    histogram = LatencyHistogram()
+    values    = [random.expovariate(1 / 0.005) for _ in range(rounds)]
+    began     = time.perf_counter()
+    for value in values:
+        histogram.record(value)
+    spent = time.perf_counter() - began
+    values.sort()
+    exact = values[int(len(values) * 0.99) - 1]
+    print(f"  LatencyHistogram.record      {spent * 1e9 / rounds:6.0f} ns  "
+          f"p99 {histogram.percentile(99) * 1e3:.3f} ms (exact {exact * 1e3:.3f} ms)")
+
+
+def throughput(command: str, rounds: int):
+    for trace in (False, True, False, True):
+        best = None
+        for _ in range(rounds):
+            received = 0
+
+            def sink(data):
+                nonlocal received
+                received += len(data)
+
+            with Session(shell="bash", shell_integration=True, echo=False, trace_latency=trace) as session:
+                session.attach(sink)
+                session.wait_ready(0, timeout=10)
+                prompts = session.prompts
+                began   = time.perf_counter()
+                session.send_raw(f"{command}\n".encode())
+                session.wait_ready(prompts, timeout=120)
+                spent   = time.perf_counter() - began
+            best = spent if best is None else min(best, spent)
+        print(f"  tracing {'on ' if trace else 'off'}  {received / 1e6:6.1f} MB  "
+              f"best {best * 1e3:7.1f} ms  {received / best / 1e6:6.1f} MB/s")
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Benchmark keystroke latency tracing.")
+    parser.add_argument("--keys", type=int, default=400)
+    parser.add_argument("--interval", type=float, default=0.02, help="seconds between keystrokes")
+    parser.add_argument("--command", default="seq 1 1000000")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print("typing:")
+    for flush_delay in (0.008, 0.0):
+        typing(args.keys, args.interval, flush_delay)
+    print("probe:")
+    probe(1000000)
+    print(f"throughput: {args.command}")
+    throughput(args.command, args.rounds)
+
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        print("Error: This is the POSIX build. Use the Windows version for Win32.")
+        sys.exit(1)
+    main()
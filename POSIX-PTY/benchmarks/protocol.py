@@ -0,0 +1,58 @@
+import sys
+import time
+import argparse
+
+from server import protocol
+
+# Encoder and decoder throughput of the multiplexed wire protocol.
+#
+#   python -m benchmarks.protocol
+#
+# The decoder is fed the encoded stream in fixed-size reads, as a socket
+# would hand it over, so most reads end inside a frame.
+
+
+def encode(size: int, count: int) -> tuple[float, bytes]:
+    payload = b"x" * size
+    encode  = protocol.encode
+    began   = time.perf_counter()
+    buffers = [encode(protocol.DATA, i & 63, payload) for i in range(count)]
+    spent   = time.perf_counter() - began
+    return spent, b"".join(b"".join(frame) for frame in buffers)
+
+
+def decode(stream: bytes, read: int) -> tuple[float, int]:
+    decoder = protocol.FrameDecoder()
+    reads   = [stream[pos:pos + read] for pos in range(0, len(stream), read)]
+    frames  = 0
+    began   = time.perf_counter()
+    for data in reads:
+        frames += len(decoder.feed(data))
+    return time.perf_counter() - began, frames
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Benchmark the multiplexed wire protocol.")
+    parser.add_argument("--megabytes", type=float, default=64.0)
+    parser.add_argument("--read", type=int, default=65536, help="bytes per simulated socket read")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    for size in (16, 256, 4096, 65536):
+        count = max(1, int(args.megabytes * 1e6 / (size + protocol.HEADER_SIZE)))
+        best_encode = best_decode = None
+        for _ in range(args.rounds):
+            spent, stream = encode(size, count)
+            best_encode   = spent if best_encode is None else min(best_encode, spent)
+            spent, frames = decode(stream, args.read)
+            best_decode   = spent if best_decode is None else min(best_decode, spent)
+        assert frames == count
+        print(f"  {size:6} B payloads  encode {count / best_encode / 1e6:6.2f} M frames/s  "
+              f"decode {count / best_decode / 1e6:6.2f} M frames/s  {len(stream) / best_decode / 1e9:6.2f} GB/s")
+
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        print("Error: This is the POSIX build. Use the Windows version for Win32.")
+        sys.exit(1)
+    main()
@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+import resource
+import argparse
+import threading
+
+from session.session  import Session
+from iobridge.reactor import Reactor
+
+# Many idle sessions on per-session threads versus one shared reactor.
+#
+#   python -m benchmarks.reactor --sessions 1000
+#
+# Starts the sessions, waits for every prompt, then reports the thread count,
+# resident memory of this process, the CPU it burns while every terminal sits
+# idle, and the time for one Session.run() on each of them in turn.
+
+
+def _rss() -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def _cpu() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def sessions(label: str, count: int, shell: str, reactor: Reactor | None, idle: float):
+    threads = threading.active_count()
+    rss     = _rss()
+    began   = time.perf_counter()
+    started = []
+    try:
+        for _ in range(count):
+            session = Session(shell=shell, reactor=reactor)
+            session.attach(lambda data: None)
+            session.start()
+            started.append(session)
+        ready = sum(session.wait_ready(timeout=30) == "prompt" for session in started)
+        spent = time.perf_counter() - began
+
+        cpu = _cpu()
+        time.sleep(idle)
+        cpu = _cpu() - cpu
+
+        began = time.perf_counter()
+        for session in started:
+            session.run("true", timeout=10)
+        run = time.perf_counter() - began
+
+        print(f"  {label}: {ready}/{count} ready in {spent:.1f} s, "
+              f"{threading.active_count() - threads} threads, {(_rss() - rss) / 1e6:.0f} MB RSS, "
+              f"idle CPU {cpu / idle * 100:.1f}%, run('true') on each {run * 1e3 / count:.2f} ms")
+    finally:
+        for session in started:
+            session.stop()
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Benchmark many idle sessions.")
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--shell", default="sh")
+    parser.add_argument("--idle", type=float, default=5.0, help="seconds to measure idle CPU over")
+    parser.add_argument("--threads", type=int, default=1, help="reactor threads")
+    args = parser.parse_args(argv)
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    print(f"{args.sessions} x {args.shell}, {os.cpu_count()} CPUs")
+    reactor = Reactor(args.threads)
+    try:
+        sessions(f"reactor, {args.threads} thread(s)", args.sessions, args.shell, reactor, args.idle)
+    finally:
+        reactor.stop()
+    sessions("thread per session", args.sessions, args.shell, None, args.idle)
+
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        print("Error: This is the POSIX build. Use the Windows version for Win32.")
+        sys.exit(1)
+    main()
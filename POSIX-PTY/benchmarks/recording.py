@@ -0,0 +1,119 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+from session.session   import Session
+from session.recording import Recorder, Cast, _INDEX
+
+# Read-path cost of recording, and seeking in a long recording.
+#
+#   python -m benchmarks.recording
+#
+# "throughput" pushes a large command's output through a Session with
+# recording off and on; "tap" times Recorder.output() alone, which is all the
+# reader thread does per chunk; "seek" builds a synthetic hour-long cast and
+# compares Cast.events(start) against parsing from the top.
+
+
+def throughput(command: str, rounds: int, directory: str):
+    for recording in (False, True, False, True):
+        best = None
+        for _ in range(rounds):
+            received = 0
+
+            def sink(data):
+                nonlocal received
+                received += len(data)
+
+            with Session(shell="bash", shell_integration=True, echo=False) as session:
+                session.attach(sink)
+                session.wait_ready(0, timeout=10)
+                if recording:
+                    session.record(os.path.join(directory, "throughput.cast"))
+                prompts = session.prompts
+                began   = time.perf_counter()
+                session.send_command(command, delay=0)
+                session.wait_ready(prompts, timeout=120)
+                spent   = time.perf_counter() - began
+                session.stop_recording()
+            best = spent if best is None else min(best, spent)
+        print(f"  recording {'on ' if recording else 'off'}  {received / 1e6:6.1f} MB  "
+              f"best {best * 1e3:7.1f} ms  {received / best / 1e6:6.1f} MB/s")
+
+
+def tap(chunks: int, size: int, directory: str):
+    data = b"x" * (size - 1) + b"\n"
+    with Recorder(os.path.join(directory, "tap.cast"), 120, 30) as recorder:
+        began = time.perf_counter()
+        for _ in range(chunks):
+            recorder.output(data)
+        spent = time.perf_counter() - began
+    print(f"  Recorder.output  {spent * 1e9 / chunks:6.0f} ns/chunk ({size} B chunks)")
+
+
+def synthesize(path: str, seconds: float, rate: float, index_interval: float):
+    # Same layout the Recorder writes: header, one event per line, and a
+    # (time, offset) index record every `index_interval` seconds.
+    step, next_index = 1.0 / rate, 0.0
+    with open(path, "wb") as cast, open(path + ".idx", "wb") as index:
+        line   = json.dumps({"version": 2, "width": 120, "height": 30}).encode() + b"\n"
+        cast.write(line)
+        offset = len(line)
+        for i in range(int(seconds * rate)):
+            stamp = i * step
+            if stamp >= next_index:
+                index.write(_INDEX.pack(stamp, offset))
+                next_index = stamp + index_interval
+            line = json.dumps([round(stamp, 6), "o", f"line {i} \x1b[32mok\x1b[0m\r\n"]).encode() + b"\n"
+            cast.write(line)
+            offset += len(line)
+
+
+def seek(minutes: float, rate: float, target: float, directory: str):
+    path = os.path.join(directory, "long.cast")
+    synthesize(path, minutes * 60, rate, 10.0)
+    print(f"  {os.path.getsize(path) / 1e6:.1f} MB cast, {minutes:g} min at {rate:g} events/s")
+    with Cast(path) as cast:
+        began = time.perf_counter()
+        first = next(cast.events(target * 60))
+        index = time.perf_counter() - began
+
+    began = time.perf_counter()
+    with open(path, "rb") as f:
+        f.readline()
+        for line in f:
+            event = json.loads(line)
+            if event[0] >= target * 60:
+                break
+    scan  = time.perf_counter() - began
+    same  = list(first) == event
+    print(f"  jump to minute {target:g}: index {index * 1e3:7.3f} ms  full parse {scan * 1e3:8.1f} ms  "
+          f"{'same event' if same else 'MISMATCH'}")
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Benchmark session recording.")
+    parser.add_argument("--command", default="seq 1 3000000")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--minutes", type=float, default=60.0)
+    parser.add_argument("--rate", type=float, default=200.0, help="events per second in the synthetic cast")
+    parser.add_argument("--jump", type=float, default=47.0, help="minute to seek to")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"throughput: {args.command}")
+        throughput(args.command, args.rounds, directory)
+        print("tap:")
+        tap(200000, 4096, directory)
+        print("seek:")
+        seek(args.minutes, args.rate, args.jump, directory)
+
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        print("Error: This is the POSIX build. Use the Windows version for Win32.")
+        sys.exit(1)
+    main()
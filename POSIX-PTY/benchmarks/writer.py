@@ -0,0 +1,69 @@
+import sys
+import time
+import argparse
+import threading
+
+from session.session  import Session
+from iobridge.reactor import Reactor
+
+# Bulk input through a Session into `cat > /dev/null`.
+#
+#   python -m benchmarks.writer --megabytes 100
+#
+# The payload is 64-byte lines (a canonical-mode PTY drops anything past 4095
+# bytes without a newline), handed to send_raw() in --chunk sized pieces as
+# fast as the caller can queue them. Timing stops when the shell prints the marker
+# that follows cat's EOF, so every byte has been through the PTY.
+
+
+def push(megabytes: float, chunk: int, reactor: Reactor | None) -> tuple[float, int, int]:
+    line  = b"x" * 63 + b"\n"
+    piece = line * max(1, chunk // len(line))
+    count = max(1, int(megabytes * 1e6) // len(piece))
+    done  = threading.Event()
+    seen  = bytearray()
+
+    def sink(data: bytes):
+        seen.extend(data)
+        if b"CAT-DONE" in seen:
+            done.set()
+        del seen[:-16]
+
+    session = Session(shell="sh", echo=False, reactor=reactor)
+    session.attach(sink)
+    with session:
+        session.wait_ready(timeout=5)
+        # With echo off the command line itself never comes back as output.
+        session.send_raw(b"cat > /dev/null; echo CAT-DONE\n")
+        began = time.perf_counter()
+        for _ in range(count):
+            session.send_raw(piece)
+        session.send_raw(b"\x04")
+        if not done.wait(600):
+            raise TimeoutError("cat did not finish")
+        spent   = time.perf_counter() - began
+        metrics = session.metrics
+        return spent, metrics.bytes_written, metrics.writes
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Benchmark bulk input through a Session.")
+    parser.add_argument("--megabytes", type=float, default=100.0)
+    parser.add_argument("--chunk", type=int, default=4096, help="bytes per send_raw() call")
+    args = parser.parse_args(argv)
+
+    reactor = Reactor(1)
+    try:
+        for label, backend in (("thread per session", None), ("reactor", reactor)):
+            spent, written, writes = push(args.megabytes, args.chunk, backend)
+            print(f"  {label:18} {written / 1e6:6.1f} MB in {spent:5.2f} s  {written / spent / 1e6:6.1f} MB/s  "
+                  f"{writes} writev calls, {written / writes / 1024:.1f} KB each")
+    finally:
+        reactor.stop()
+
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        print("Error: This is the POSIX build. Use the Windows version for Win32.")
+        sys.exit(1)
+    main()
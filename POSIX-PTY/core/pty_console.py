@@ -6,12 +6,14 @@ import struct
 
 class PTYConsole:
 
-    def __init__(self, cols: int = 120, rows: int = 30):
+    def __init__(self, cols: int = 120, rows: int = 30, echo: bool = True):
         self.cols = cols
         self.rows = rows
         self._master_fd: int | None = None
         self._slave_fd:  int | None = None
         self._create()
+        if not echo:
+            self.set_echo(False)
 
     @property
     def master_fd(self) -> int:
@@ -26,6 +28,24 @@ class PTYConsole:
         winsize = struct.pack("HHHH", rows, cols, 0, 0)
         fcntl.ioctl(self._master_fd, termios.TIOCSWINSZ, winsize)
 
+    @property
+    def echo(self) -> bool:
+        return bool(termios.tcgetattr(self._master_fd)[3] & termios.ECHO)
+
+    def set_echo(self, enabled: bool):
+        # Both ends share one termios state; the master is still open after spawn.
+        fd = self._slave_fd if self._slave_fd is not None else self._master_fd
+        attrs = termios.tcgetattr(fd)
+        if enabled:
+            attrs[3] |= termios.ECHO
+        else:
+            attrs[3] &= ~termios.ECHO
+        termios.tcsetattr(fd, termios.TCSANOW, attrs)
+
+    def release_slave(self):
+        # spawn() closes the parent's copy; forget it so close() cannot hit a reused fd.
+        self._slave_fd = None
+
     def close(self):
         for fd in (self._master_fd, self._slave_fd):
             if fd is not None:
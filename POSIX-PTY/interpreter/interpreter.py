@@ -1,6 +1,5 @@
 import os
 import sys
-import time
 import shlex
 import termios
 import tty
@@ -37,6 +36,12 @@ _CTRL_L = b"\x0c"
 
 _PASSTHROUGH = {0x03, 0x04, 0x1a, 0x0c}
 
+# Upper bounds only; each wait returns as soon as the shell is ready.
+_START_TIMEOUT   = 2.0
+_EXIT_TIMEOUT    = 1.0
+_COMMAND_TIMEOUT = 0.5
+_OUTPUT_IDLE     = 0.05
+
 
 class _termiosttyrdr:
 
@@ -114,9 +119,12 @@ class _termiosttyrdr:
                 sys.stdout.write(ch.decode("utf-8", errors="replace"))
                 sys.stdout.flush()
 
-    def inpwait(self, timeout: float = 0.05) -> bool:
+    def inpwait(self, timeout: float | None = None) -> bool:
         return self._event.wait(timeout)
 
+    def wake(self):
+        self._event.set()
+
     def drain(self) -> tuple[list[str], list[bytes]]:
         with self._lock:
             lines = self.line_queue[:]
@@ -161,7 +169,10 @@ class Shell:
 
         try:
             while self._running:
-                self._reader.inpwait(timeout=0.05)
+                self._reader.inpwait()
+                self._reap()
+                if not self._running:
+                    break
                 lines, ctrls = self._reader.drain()
 
                 for ctrl in ctrls:
@@ -212,13 +223,11 @@ class Shell:
             self._push_session(self._root_shell)
 
         elif line == "exit":
+            # An owned shell closes its PTY; a tracked program returns to the shell prompt.
+            self._send_and_wait("exit", timeout=_EXIT_TIMEOUT)
             if self._depth > 1:
-                self._session.send_command("exit")
-                time.sleep(0.3)
                 self._pop()
             else:
-                self._session.send_command("exit")
-                time.sleep(0.3)
                 self._running = False
 
         else:
@@ -229,20 +238,36 @@ class Shell:
                 cmd_name = ""
 
             if cmd_name in subshell:
-                self._session.send_command(line)
-                time.sleep(0.5)
+                self._send_and_wait(line, timeout=_START_TIMEOUT)
                 self._push_tracker(cmd_name)
             else:
-                self._session.send_command(line)
-                time.sleep(0.2)
+                self._send_and_wait(line, idle=_OUTPUT_IDLE)
+
+    def _send_and_wait(
+        self,
+        line:    str,
+        idle:    float | None = None,
+        timeout: float = _COMMAND_TIMEOUT,
+    ) -> str:
+        session = self._session
+        seen    = session.prompts
+        session.send_command(line, delay=0)
+        return session.wait_ready(seen, idle, timeout)
 
     def _ctrl_c(self):
         if self._session:
-            self._session.send_urgent(_CTRL_C)
+            self._session.send_fast(_CTRL_C)
 
     def _ctrl_d(self):
         if self._session:
-            self._session.send_urgent(_CTRL_D)
+            self._session.send_fast(_CTRL_D)
+
+    def _reap(self):
+        # The shell on top may have exited on its own (Ctrl-D, `exec`, a crash).
+        while self._stack and self._session.closed:
+            self._pop(silent=True)
+        if not self._stack:
+            self._running = False
 
     def cleanup(self):
         while self._stack:
@@ -250,8 +275,9 @@ class Shell:
 
     def _push_session(self, shell: str):
         session = Session(shell, self._cols, self._rows, self._encoding)
+        session.on_close(self._reader.wake)
         session.start()
-        time.sleep(0.3)
+        session.wait_ready(timeout=_START_TIMEOUT)
         self._stack.append((shell, session, True))
 
     def _push_tracker(self, label: str):
@@ -0,0 +1,94 @@
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Preset dictionary shared by both ends: the escape sequences, prompts and
+# build-log words terminal output is made of. zlib matches later bytes more
+# cheaply, so the most common strings come last. Changing it breaks streams
+# between mismatched peers; bump DICTIONARY_ID when doing so.
+DICTIONARY_ID = 1
+DICTIONARY = b"".join((
+    b"Traceback (most recent call last):\n  File \"",
+    b"warning: error: note: In function ", b"undefined reference to ",
+    b"Compiling Building Linking Downloading Installing Collecting ",
+    b"Requirement already satisfied: ", b"Successfully installed ",
+    b" passed  failed  skipped  PASSED FAILED ERROR OK ",
+    b"drwxr-xr-x  -rw-r--r--  -rwxr-xr-x  lrwxrwxrwx  root root ",
+    b"\x1b[?1049h\x1b[?1049l\x1b[?1h\x1b=\x1b[?1l\x1b>\x1b[?25l\x1b[?25h",
+    b"\x1b[?2004h\x1b[?2004l\r\x1b]0;\x07\x1b]133;A\x07\x1b]133;B\x07\x1b]133;C\x07\x1b]133;D;0\x07",
+    b"\x1b[38;5;\x1b[48;5;\x1b[38;2;\x1b[48;2;",
+    b"\x1b[30m\x1b[31m\x1b[32m\x1b[33m\x1b[34m\x1b[35m\x1b[36m\x1b[37m\x1b[90m",
+    b"\x1b[1;31m\x1b[1;32m\x1b[1;33m\x1b[1;34m\x1b[01;31m\x1b[01;32m\x1b[01;34m\x1b[01;36m",
+    b"\x1b[H\x1b[2J\x1b[3J\x1b[J\x1b[2K\x1b[1K",
+    b"\x1b[7m\x1b[4m\x1b[22m\x1b[27m\x1b[24m\x1b[1m\x1b[2m",
+    b"\x1b(B\x1b[m\x1b[39;49m\x1b(B\x1b[m\x1b[39;49m\x1b[K\r\n",
+    b"\x1b[0m\x1b[1m\x1b[m\x1b[0m\x1b[K\r\n\x1b[0m\r\n",
+))
+
+_DEFLATE_TAIL = b"\x00\x00\xff\xff"
+
+
+def methods() -> list[str]:
+    return ["zstd", "deflate"] if zstandard is not None else ["deflate"]
+
+
+class Compressor:
+
+    # One stream per viewer. compress() returns everything needed to decode
+    # the data passed in, so each output chunk (an OutputReader flush, which
+    # already ends at coalescing and prompt boundaries) goes out without
+    # waiting for more. Like permessage-deflate, the constant sync-flush tail
+    # is left off and re-added by the Decompressor.
+
+    def __init__(self, method: str = "deflate", level: int | None = None, dictionary: bytes = DICTIONARY):
+        self.method = method
+        if method == "deflate":
+            self._zobj = zlib.compressobj(
+                6 if level is None else level, zlib.DEFLATED, -15, 9, zlib.Z_DEFAULT_STRATEGY,
+                **({"zdict": dictionary} if dictionary else {}),
+            )
+        elif method == "zstd" and zstandard is not None:
+            params = {"level": 3 if level is None else level}
+            if dictionary:
+                params["dict_data"] = zstandard.ZstdCompressionDict(
+                    dictionary, dict_type=zstandard.DICT_TYPE_RAWCONTENT
+                )
+            self._zobj = zstandard.ZstdCompressor(**params).compressobj()
+        else:
+            raise ValueError(f"unsupported compression method {method!r}")
+        self.raw        = 0
+        self.compressed = 0
+
+    def compress(self, data: bytes) -> bytes:
+        if self.method == "deflate":
+            out = (self._zobj.compress(data) + self._zobj.flush(zlib.Z_SYNC_FLUSH))[:-4]
+        else:
+            out = self._zobj.compress(data) + self._zobj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        self.raw        += len(data)
+        self.compressed += len(out)
+        return out
+
+
+class Decompressor:
+
+    def __init__(self, method: str = "deflate", dictionary: bytes = DICTIONARY):
+        self.method = method
+        if method == "deflate":
+            self._zobj = zlib.decompressobj(-15, **({"zdict": dictionary} if dictionary else {}))
+        elif method == "zstd" and zstandard is not None:
+            params = {}
+            if dictionary:
+                params["dict_data"] = zstandard.ZstdCompressionDict(
+                    dictionary, dict_type=zstandard.DICT_TYPE_RAWCONTENT
+                )
+            self._zobj = zstandard.ZstdDecompressor(**params).decompressobj()
+        else:
+            raise ValueError(f"unsupported compression method {method!r}")
+
+    def decompress(self, data: bytes) -> bytes:
+        if self.method == "deflate":
+            return self._zobj.decompress(data + _DEFLATE_TAIL)
+        return self._zobj.decompress(data)
@@ -1,66 +1,417 @@
 import os
-import re
 import sys
+import time
+import select
+import termios
 import threading
-from queue import Queue, Empty
+from itertools   import islice
+from collections import deque
+from iobridge.ansi  import AnsiParser, ends_in_escape, strip_ansi
+from iobridge.marks import COMMAND_START, MARK_PREFIX, ShellMark, mark_end, parse_mark
+from iobridge.metrics import SessionMetrics
 
 
-def _fd_read(fd: int, size: int = 4096) -> bytes | None:
+_READ_MIN = 4096
+_READ_MAX = 262144
+_LINE_MAX = 65536
+# Held output goes out once the PTY has been quiet this long.
+_IDLE_GAP = 0.001
+
+
+class _ReadBuffer:
+
+    def __init__(self, capacity: int = _READ_MIN * 4):
+        self.data  = bytearray(capacity)
+        self.view  = memoryview(self.data)
+        self.start = 0
+        self.end   = 0
+        self._size = _READ_MIN
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def _reserve(self, size: int):
+        if self.end + size <= len(self.data):
+            return
+        pending = self.end - self.start
+        if pending + size > len(self.data):
+            grown = bytearray(max(len(self.data) * 2, pending + size))
+            grown[:pending] = self.view[self.start:self.end]
+            self.view.release()
+            self.data = grown
+            self.view = memoryview(grown)
+        else:
+            self.data[:pending] = self.view[self.start:self.end]
+        self.start, self.end = 0, pending
+
+    def fill(self, fd: int) -> int:
+        size = self._size
+        self._reserve(size)
+        n = os.readv(fd, [self.view[self.end:self.end + size]])
+        self.end += n
+        # Grow the read size while reads come back full, shrink when mostly idle.
+        if n == size:
+            self._size = min(size * 2, _READ_MAX)
+        elif n < size // 4:
+            self._size = max(size // 2, _READ_MIN)
+        return n
+
+    def write(self, data: bytes):
+        self._reserve(len(data))
+        self.view[self.end:self.end + len(data)] = data
+        self.end += len(data)
+
+    def take(self, start: int, end: int) -> bytes:
+        return bytes(self.view[start:end])
+
+    def consume_to(self, pos: int):
+        self.start = pos
+        if self.start == self.end:
+            self.start = self.end = 0
+
+
+def _echoes_input(fd: int, editor_echo: bool = True) -> bool:
     try:
-        data = os.read(fd, size)
-        return data if data else None
-    except OSError:
-        return None
+        lflag = termios.tcgetattr(fd)[3]
+    except termios.error:
+        return True
+    if lflag & termios.ECHO:
+        return True
+    # With ICANON off a line editor (readline, zle) has the terminal and echoes
+    # for itself, but only if ECHO was on when it took over: that is the PTY's
+    # own setting, which the editor hides from tcgetattr while it runs.
+    return editor_echo and not lflag & termios.ICANON
+
+
+# A queued echo that has not shown up by then never will (the line went to a
+# program that does not echo); dropping it keeps it from eating a real line.
+_ECHO_WAIT = 1.0
 
 
-def _fd_write(fd: int, data: bytes) -> int:
+_IOV_BATCH = 64
+
+
+def _fd_writev(fd: int, queue: deque, metrics: SessionMetrics | None = None) -> bool:
+    if metrics is not None and metrics.latency is not None:
+        metrics.latency.writing()
     try:
-        return os.write(fd, data)
+        n = os.writev(fd, list(islice(queue, _IOV_BATCH)))
+    except BlockingIOError:
+        return False
     except OSError:
-        return 0
+        queue.clear()
+        return True
+    if metrics is not None:
+        metrics.wrote(n)
+    # Drop what was written; a short write leaves the remainder at the head.
+    while n:
+        head = queue[0]
+        if n < len(head):
+            queue[0] = head[n:]
+            break
+        n -= len(head)
+        queue.popleft()
+    return True
+
+def _write_stdout(data: bytes):
+    try:
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+    except Exception:
+        pass
 
-_ANSI_RE = re.compile(
-    rb"\x1b(?:"
-    rb"\[[0-9;?]*[A-Za-z]"
-    rb"|\][^\x07\x1b]*(?:\x07|\x1b\\)"
-    rb"|[^[]"
-    rb")"
-)
 
 def _strip_ansi(data: bytes) -> bytes:
-    return _ANSI_RE.sub(b"", data)
+    return strip_ansi(data)
 
 
 _ALWAYS_SUPPRESS = {b"^c", b"control-c"}
 
 
-def _is_prompt_chunk(raw: bytes) -> bool:
-    cleaned = _strip_ansi(raw).strip()
+def _may_always_suppress(data: bytearray, start: int, end: int) -> bool:
+    # Every _ALWAYS_SUPPRESS key contains "^" or "-", and stripping never adds bytes.
+    return data.find(b"^", start, end) != -1 or data.find(b"-", start, end) != -1
+
+
+def _may_become_suppressed(raw: bytes) -> bool:
+    # A partial line that may yet end as an _ALWAYS_SUPPRESS line, like the
+    # "^C" a tty echoes before the shell gets round to the newline. Only
+    # prefixes that reach the "^" or "-" count, so typing "c" is not held.
+    key = _strip_ansi(raw).strip().lower()
+    return (b"^" in key or b"-" in key) and any(k.startswith(key) for k in _ALWAYS_SUPPRESS)
+
+
+def _is_prompt_text(cleaned: bytes) -> bool:
+    cleaned = cleaned.strip()
     return bool(cleaned) and cleaned[-1:] in (b"$", b"#", b">")
 
 
+def _is_prompt_chunk(raw: bytes) -> bool:
+    # A chunk cut inside an escape sequence is never a finished prompt.
+    return not ends_in_escape(raw) and _is_prompt_text(_strip_ansi(raw))
+
+
 class OutputReader(threading.Thread):
 
-    def __init__(self, master_fd: int, encoding: str = "utf-8"):
+    def __init__(
+        self,
+        master_fd:   int,
+        encoding:    str = "utf-8",
+        flush_delay: float = 0.008,
+        flush_bytes: int = 65536,
+    ):
         super().__init__(daemon=True, name="PTY-OutputReader")
         self._fd       = master_fd
         self._encoding = encoding
-        self._stop     = threading.Event()
+        self._stopping = threading.Event()
         self._lock     = threading.Lock()
-
-        self._suppress_queue: list[bytes] = []
+        self.metrics   = SessionMetrics(register=False)
+        # Opened by run(): stop() must wake a select() on a master that is
+        # about to be closed, or the thread never finishes.
+        self._wake_r = self._wake_w = -1
+
+        self._flush_delay = flush_delay
+        self._flush_bytes = flush_bytes
+        self._held: list[bytes] = []
+        self._held_len = 0
+        self._deadline: float | None = None
+        self._burst    = 0
+        self._peek     = None
+
+        self._high_water: int | None = None
+        self._low_water  = 0
+        self._unacked    = 0
+        self._paused     = False
+        self._unpaused   = threading.Condition(self._lock)
+        self._resume_hook = None
+
+        self._suppress_queue: list[tuple[bytes, float]] = []
         self._last_suppressed: bytes | None = None
+        self._editor_echo = True
         self._banner_done = False
-        self._buf = b""
+        self._ansi = AnsiParser()
+        self._buf = _ReadBuffer()
+        self._scanned = 0
+
+        self._marks = False
+        self._mark_handlers: list = []
+        self._taps: list = []
+        self._sink = None
+
+        self._ready   = threading.Condition(threading.Lock())
+        self._prompts = 0
+        self._closed  = False
+        self._last_output   = time.monotonic()
+        self._close_handlers: list = []
+
+    def track_marks(self):
+        # The shell announces its prompt with OSC 133; no banner guessing needed.
+        self._marks       = True
+        self._banner_done = True
+
+    def on_mark(self, handler):
+        self._mark_handlers.append(handler)
+
+    def on_output(self, handler):
+        # handler(bytes) sees every chunk just before _emit, on the reader thread.
+        self._taps.append(handler)
+
+    def set_sink(self, handler):
+        # Replaces the default stdout target of _emit; None restores it.
+        self._sink = handler
+
+    def on_close(self, handler):
+        self._close_handlers.append(handler)
+
+    @property
+    def prompts(self) -> int:
+        return self._prompts
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def wait_ready(
+        self,
+        since:   int = 0,
+        idle:    float | None = None,
+        timeout: float | None = None,
+    ) -> str:
+        # Returns "prompt" once more than `since` prompts were seen, "exit" when
+        # the PTY closed, "idle" after `idle` quiet seconds, else "timeout".
+        start = time.monotonic()
+        end   = None if timeout is None else start + timeout
+        with self._ready:
+            while True:
+                if self._prompts > since:
+                    return "prompt"
+                if self._closed:
+                    return "exit"
+                now  = time.monotonic()
+                wait = None if end is None else end - now
+                if idle is not None:
+                    quiet = now - max(self._last_output, start)
+                    if quiet >= idle:
+                        return "idle"
+                    wait = idle - quiet if wait is None else min(wait, idle - quiet)
+                if wait is not None and wait <= 0:
+                    return "timeout"
+                self._ready.wait(wait)
+
+    def _signal_prompt(self):
+        self.metrics.prompt()
+        with self._ready:
+            self._prompts += 1
+            self._ready.notify_all()
 
     def suppress_next(self, command: str):
         with self._lock:
             self._suppress_queue.append(
-                command.strip().lower().encode(self._encoding)
+                (command.strip().lower().encode(self._encoding), time.monotonic() + _ECHO_WAIT)
             )
 
+    def set_echo(self, enabled: bool):
+        # The PTY's ECHO setting, as a line editor will see it.
+        self._editor_echo = enabled
+
+    def echoes_input(self) -> bool:
+        # Whether a line written now comes back as an echo to suppress.
+        return _echoes_input(self._fd, self._editor_echo)
+
     def stop(self):
-        self._stop.set()
+        self._stopping.set()
+        with self._lock:
+            self._unpaused.notify_all()
+            if self._wake_w >= 0:
+                os.write(self._wake_w, b"\0")
+
+    def set_watermarks(self, high: int | None, low: int | None = None):
+        with self._lock:
+            self._high_water = high
+            self._low_water  = (high // 4 if low is None else low) if high else 0
+        self.ack(0)
+
+    def on_resume(self, hook):
+        self._resume_hook = hook
+
+    def ack(self, nbytes: int):
+        with self._lock:
+            self._unacked = max(0, self._unacked - nbytes)
+            if not self._paused or (
+                self._high_water and self._unacked > self._low_water
+            ):
+                return
+            self._paused = False
+            self.metrics.paused = False
+            self._unpaused.notify_all()
+        if self._resume_hook is not None:
+            self._resume_hook()
+
+    @property
+    def paused(self) -> bool:
+        return self._paused
+
+    @property
+    def deadline(self) -> float | None:
+        # When the held output is due: after _IDLE_GAP without a read, and
+        # never later than flush_delay after it was first held.
+        if self._deadline is None:
+            return None
+        return min(self._deadline, self._last_output + _IDLE_GAP)
+
+    def flush(self):
+        # The deadline passed or the output went idle.
+        self._release_partial()
+        if not self._held:
+            self._deadline = None
+            self._burst    = 0
+            return
+        self._flush_held()
+
+    def flush_if_idle(self):
+        # Called after fill(). A burst that ends with its first read, like the
+        # echo of a typed key, goes out at once. A longer burst waits for the
+        # idle gap instead, so bulk output still reaches _emit in a few large
+        # chunks even when the reader keeps emptying the PTY.
+        deadline = self.deadline
+        if deadline is None:
+            # Nothing held: the next read starts a new burst.
+            self._burst = 0
+            return
+        if deadline <= time.monotonic() or (self._burst == 1 and not self._more_queued()):
+            self.flush()
+
+    def _more_queued(self) -> bool:
+        if self._fd < 0:
+            return False
+        if self._peek is None:
+            self._peek = select.poll()
+            self._peek.register(self._fd, select.POLLIN)
+        try:
+            return bool(self._peek.poll(0))
+        except OSError:
+            return False
+
+    def _release_partial(self):
+        # A partial line is held back in case it turns out to be an echo to
+        # suppress. Once the output has gone quiet it is not going to be
+        # completed soon; holding it any longer made every typed character's
+        # echo wait for Enter.
+        rb = self._buf
+        if rb.start == rb.end or self._scanned != rb.end - rb.start:
+            return
+        tail = rb.take(rb.start, rb.end)
+        with self._lock:
+            queued = bool(self._suppress_queue)
+        if queued or ends_in_escape(tail) or _may_become_suppressed(tail):
+            return
+        self._held.append(tail)
+        self._held_len += len(tail)
+        rb.consume_to(rb.end)
+        self._scanned = 0
+
+    def _flush_held(self):
+        held = self._held
+        if not held:
+            return
+        data = held[0] if len(held) == 1 else b"".join(held)
+        self._held     = []
+        self._held_len = 0
+        self._deadline = None
+        self._burst    = 0
+        if self._high_water:
+            with self._lock:
+                self._unacked += len(data)
+                # Stop reading the master fd; the kernel PTY buffer then blocks the child.
+                if self._unacked >= self._high_water and not self._paused:
+                    self._paused = True
+                    self.metrics.paused  = True
+                    self.metrics.pauses += 1
+        began = time.perf_counter()
+        for tap in self._taps:
+            tap(data)
+        self._emit(data)
+        self.metrics.emit_seconds.observe(time.perf_counter() - began)
+        if self.metrics.latency is not None:
+            self.metrics.latency.delivered()
+
+    def _hold(self, data: bytes, prompt: bool = False):
+        if data:
+            self._held.append(data)
+            self._held_len += len(data)
+            if self._deadline is None:
+                self._deadline = time.monotonic() + self._flush_delay
+        if prompt or self._held_len >= self._flush_bytes or self._flush_delay <= 0:
+            self._flush_held()
+
+    def _suppress_pending(self) -> bool:
+        with self._lock:
+            queue = self._suppress_queue
+            # Judged by when the output was read, so a slow consumer does not
+            # expire an echo that is already waiting in the buffer.
+            while queue and queue[0][1] < self._last_output:
+                queue.pop(0)
+            return bool(queue) or self._last_suppressed is not None
 
     def _try_suppress(self, key: bytes) -> bool:
         if not key:
@@ -69,106 +420,291 @@ class OutputReader(threading.Thread):
             return True
         if self._last_suppressed and key == self._last_suppressed:
             return True
-        with self._lock:
-            if self._suppress_queue and self._suppress_queue[0] == key:
-                self._last_suppressed = self._suppress_queue.pop(0)
-                return True
+        # Unlocked peek: suppress_next() only appends, and only this thread pops.
+        queue = self._suppress_queue
+        if queue and queue[0][0] == key:
+            with self._lock:
+                self._last_suppressed = queue.pop(0)[0]
+            return True
         if self._last_suppressed and key != self._last_suppressed:
             self._last_suppressed = None
         return False
 
     def _emit(self, data: bytes):
+        if data and self._sink is not None:
+            self._sink(data)
+            return
         if data:
-            try:
-                sys.stdout.buffer.write(data)
-                sys.stdout.buffer.flush()
-            except Exception:
-                pass
+            _write_stdout(data)
 
     def _process(self):
-        buf = self._buf
+        rb   = self._buf
+        data = rb.data
+        pos, end = rb.start, rb.end
 
         if not self._banner_done:
-            self._emit(buf)
-            if _is_prompt_chunk(buf):
+            chunk  = rb.take(pos, end)
+            # Banner chunks are cut at arbitrary read boundaries; carry split escapes over.
+            cleaned = self._ansi.strip(chunk)
+            prompt  = not self._ansi.pending and _is_prompt_text(cleaned)
+            if prompt:
                 self._banner_done = True
-            self._buf = b""
+            self._hold(chunk, prompt)
+            rb.consume_to(end)
+            if prompt:
+                self._signal_prompt()
             return
 
-        out = b""
+        out: list[bytes] = []
+        run  = pos
+        scan = pos + self._scanned
+        pending = self._suppress_pending()
+        hinted  = _may_always_suppress(data, pos, end)
+        waiting = False
+        # A mark split across reads may begin just before the scanned region.
+        mark = data.find(MARK_PREFIX, max(pos, scan - len(MARK_PREFIX) + 1), end) \
+            if self._marks else -1
 
         while True:
-            crlf = buf.find(b"\r\n")
-            lf   = buf.find(b"\n")
-
-            if crlf == -1 and lf == -1:
-                if buf and _is_prompt_chunk(buf):
-                    out += buf
-                    buf  = b""
+            lf = data.find(b"\n", scan, end)
+            if mark != -1 and (lf == -1 or mark < lf):
+                close = mark_end(data, mark, end)
+                if close == -1 and end - mark < _LINE_MAX:
+                    waiting = True
+                    break
+                if close == -1:
+                    # Unterminated for this long: a stray prefix, not a mark. It stays text.
+                    mark = data.find(MARK_PREFIX, mark + 1, end)
+                    continue
+                if run < mark:
+                    out.append(rb.take(run, mark))
+                seq = rb.take(mark, close)
+                out.append(seq)
+                run = pos = scan = close
+                # Everything before the mark reaches the consumer before its handlers run.
+                self._hold(b"".join(out), True)
+                out = []
+                shell_mark = parse_mark(seq)
+                if shell_mark.kind == COMMAND_START:
+                    self._signal_prompt()
+                self._dispatch_mark(shell_mark)
+                mark = data.find(MARK_PREFIX, scan, end)
+                continue
+            if lf == -1:
                 break
 
-            if crlf != -1 and (lf == -1 or crlf <= lf):
-                content, buf, term = buf[:crlf], buf[crlf + 2:], b"\r\n"
-            else:
-                content, buf, term = buf[:lf],   buf[lf + 1:],   b"\n"
-
-            key = _strip_ansi(content).strip().lower()
-            if self._try_suppress(key):
+            if not pending and not hinted:
+                # Nothing in this run of lines can be suppressed: skip to its last newline.
+                lf = data.rfind(b"\n", lf, end if mark == -1 else mark)
+                pos = scan = lf + 1
                 continue
-            out += content + term
 
-        self._buf = buf
-        self._emit(out)
+            stop = lf - 1 if lf > pos and data[lf - 1] == 0x0D else lf
+            if pending or (hinted and _may_always_suppress(data, pos, stop)):
+                key = strip_ansi(rb.take(pos, stop)).strip().lower()
+                if self._try_suppress(key):
+                    self.metrics.suppressed += 1
+                    if run < pos:
+                        out.append(rb.take(run, pos))
+                    run = lf + 1
+                # Expiry was settled above for this read; only a match or a miss changes it now.
+                pending = bool(self._suppress_queue) or self._last_suppressed is not None
+
+            pos = scan = lf + 1
+
+        # A partial line this long is no echoed command: pass it on instead of
+        # buffering (and rescanning) it until a newline shows up.
+        overlong = not waiting and end - pos >= _LINE_MAX
+        prompt   = pos < end and not overlong and _is_prompt_chunk(rb.take(pos, end))
+        if prompt or overlong:
+            pos = end
+        if run < pos:
+            out.append(rb.take(run, pos))
+
+        self._scanned = (mark if waiting else end) - pos
+        rb.consume_to(pos)
+        self._hold(b"".join(out), prompt)
+        if prompt:
+            self._signal_prompt()
+        if rb.start < rb.end and self._deadline is None:
+            # Come back for the partial line if nothing completes it.
+            self._deadline = time.monotonic() + self._flush_delay
+
+    def _dispatch_mark(self, mark: ShellMark):
+        for handler in self._mark_handlers:
+            try:
+                handler(mark)
+            except Exception:
+                pass
+
+    def feed(self, data: bytes):
+        self._last_output = time.monotonic()
+        self._buf.write(data)
+        self._process()
+
+    def fill(self) -> bool:
+        try:
+            n = self._buf.fill(self._fd)
+        except BlockingIOError:
+            return True
+        except OSError:
+            n = 0
+        if not n:
+            return False
+        self._burst += 1
+        self.metrics.read(n)
+        if self.metrics.latency is not None:
+            self.metrics.latency.read()
+        self._last_output = time.monotonic()
+        self._process()
+        return True
+
+    def finish(self):
+        rb = self._buf
+        if len(rb):
+            self._held.append(rb.take(rb.start, rb.end))
+            rb.consume_to(rb.end)
+        self._scanned = 0
+        try:
+            self.flush()
+        finally:
+            # Closed even if a sink raises on the last of the output.
+            self._close()
+
+    def _close(self):
+        with self._ready:
+            if self._closed:
+                return
+            self._closed = True
+            self._ready.notify_all()
+        self.metrics.retire()
+        for handler in self._close_handlers:
+            handler()
 
     def run(self):
-        while not self._stop.is_set():
-            data = _fd_read(self._fd)
-            if data is None:
+        self.metrics.register()
+        with self._lock:
+            self._wake_r, self._wake_w = os.pipe()
+        # poll(), not select(): with a few hundred sessions the fds pass FD_SETSIZE.
+        poller = select.poll()
+        poller.register(self._fd, select.POLLIN)
+        poller.register(self._wake_r, select.POLLIN)
+        while not self._stopping.is_set():
+            if self._paused:
+                with self._lock:
+                    while self._paused and not self._stopping.is_set():
+                        self._unpaused.wait()
+                continue
+            timeout = None
+            deadline = self.deadline
+            if deadline is not None:
+                timeout = max(0.0, deadline - time.monotonic()) * 1000
+            ready = poller.poll(timeout)
+            if not ready:
+                # Nothing more arrived before the deadline: the output went idle.
+                self.flush()
+                continue
+            events = dict(ready).get(self._fd, 0)
+            if events & select.POLLNVAL:
+                # stop() closed the master while we were busy with the last chunk.
                 break
-            self._buf += data
-            self._process()
+            if not events:
+                continue
+            if not self.fill():
+                break
+            self.flush_if_idle()
 
-        if self._buf:
-            self._emit(self._buf)
-            self._buf = b""
+        with self._lock:
+            os.close(self._wake_r)
+            os.close(self._wake_w)
+            self._wake_r = self._wake_w = -1
+        self.finish()
 
 
 class inputw(threading.Thread):
 
-    def __init__(self, master_fd: int):
+    def __init__(self, master_fd: int, metrics: SessionMetrics | None = None):
         super().__init__(daemon=True, name="inputw")
-        self._fd    = master_fd
-        self._queue: Queue[bytes] = Queue()
-        self._stop  = threading.Event()
+        self._fd       = master_fd
+        self._stopping = threading.Event()
+        self._lock     = threading.Lock()
+        self._bulk: deque[memoryview] = deque()
+        self._fast: deque[memoryview] = deque()
+        self._metrics  = metrics
+        if metrics is not None:
+            metrics.queues = (self._fast, self._bulk)
+
+        self._signalled = False
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        # poll(), not select(): with a few hundred sessions the fds pass FD_SETSIZE.
+        self._idle = select.poll()
+        self._idle.register(self._wake_r, select.POLLIN)
+        self._full = select.poll()
+        self._full.register(self._wake_r, select.POLLIN)
+        self._full.register(master_fd, select.POLLOUT)
 
     def send(self, data: bytes):
-        self._queue.put(data)
+        if data:
+            self._bulk.append(memoryview(data))
+            self._notify()
 
     def send_fast(self, data: bytes):
-        _fd_write(self._fd, data)
+        if data:
+            self._fast.append(memoryview(data))
+            self._notify()
 
     def stop(self):
-        self._stop.set()
-        self._queue.put(b"")
+        self._stopping.set()
+        self._notify()
 
-    def run(self):
-        while not self._stop.is_set():
+    def _notify(self):
+        with self._lock:
+            if self._signalled or self._wake_w < 0:
+                return
+            self._signalled = True
+            os.write(self._wake_w, b"\0")
+
+    def _wait(self, writable: bool):
+        (self._full if writable else self._idle).poll()
+        with self._lock:
+            self._signalled = False
             try:
-                data = self._queue.get(timeout=0.1)
-            except Empty:
-                continue
-            if data:
-                _fd_write(self._fd, data)
+                os.read(self._wake_r, 4096)
+            except BlockingIOError:
+                pass
+
+    def run(self):
+        while not self._stopping.is_set():
+            # Control bytes go out before the next bulk write, never mid-writev.
+            queue = self._fast or self._bulk
+            if not queue:
+                self._wait(False)
+            elif not _fd_writev(self._fd, queue, self._metrics):
+                self._wait(True)
+
+        with self._lock:
+            os.close(self._wake_r)
+            os.close(self._wake_w)
+            self._wake_r = self._wake_w = -1
 
 
 class IOBridge:
 
-    def __init__(self, master_fd: int, encoding: str = "utf-8"):
+    def __init__(
+        self,
+        master_fd:   int,
+        encoding:    str = "utf-8",
+        flush_delay: float = 0.008,
+        flush_bytes: int = 65536,
+    ):
+        self._fd       = master_fd
         self._encoding = encoding
-        self._reader   = OutputReader(master_fd, encoding)
-        self._writer   = inputw(master_fd)
+        self._reader   = OutputReader(master_fd, encoding, flush_delay, flush_bytes)
+        self._writer   = inputw(master_fd, self._reader.metrics)
 
     def start(self):
+        os.set_blocking(self._fd, False)
         self._reader.start()
         self._writer.start()
 
@@ -181,9 +717,54 @@ class IOBridge:
     def send_line(self, text: str, encoding: str | None = None):
         enc = encoding or self._encoding
         # Register suppress BEFORE bytes enter the pipe.
-        self._reader.suppress_next(text)
+        if self._reader.echoes_input():
+            self._reader.suppress_next(text)
         self._writer.send((text + "\n").encode(enc))
 
+    def set_echo(self, enabled: bool):
+        self._reader.set_echo(enabled)
+
+    def track_marks(self):
+        self._reader.track_marks()
+
+    def on_mark(self, handler):
+        self._reader.on_mark(handler)
+
+    def on_output(self, handler):
+        self._reader.on_output(handler)
+
+    def on_close(self, handler):
+        self._reader.on_close(handler)
+
+    def set_sink(self, handler):
+        self._reader.set_sink(handler)
+
+    @property
+    def prompts(self) -> int:
+        return self._reader.prompts
+
+    @property
+    def metrics(self) -> SessionMetrics:
+        return self._reader.metrics
+
+    @property
+    def closed(self) -> bool:
+        return self._reader.closed
+
+    def wait_ready(
+        self,
+        since:   int = 0,
+        idle:    float | None = None,
+        timeout: float | None = None,
+    ) -> str:
+        return self._reader.wait_ready(since, idle, timeout)
+
+    def set_watermarks(self, high: int | None, low: int | None = None):
+        self._reader.set_watermarks(high, low)
+
+    def ack(self, nbytes: int):
+        self._reader.ack(nbytes)
+
     def stop(self):
         self._reader.stop()
         self._writer.stop()
@@ -0,0 +1,133 @@
+import time
+
+# Keystroke-to-echo latency, split where the time can go:
+#
+#   queue    input handed to the session -> the writer starts writing it
+#   echo     writing -> the first chunk read back from the master
+#   deliver  that read -> the chunk leaving the OutputReader (flush batching)
+#   total    input -> delivered
+#
+# One probe is in flight at a time: input that arrives while a probe is open
+# is not timed, so a burst of typing costs one probe, not one per byte. The
+# sender opens a probe, the writer stamps it and the reader closes it; each
+# slot has a single writer, so nothing is locked. Anything after "deliver"
+# (the network, the viewer) is not seen here.
+
+STAGES = ("queue", "echo", "deliver", "total")
+
+# 2**_SUB_BITS buckets per power of two: values are kept within 1/64 (1.6%).
+_SUB_BITS = 6
+_SUB      = 1 << _SUB_BITS
+
+
+class LatencyHistogram:
+
+    # HDR-style log-linear histogram of whole microseconds. Exact below
+    # 2 * _SUB, then _SUB buckets per power of two; the counts list only grows
+    # as far as the largest value seen, and histograms merge by adding counts.
+
+    __slots__ = ("counts", "total", "sum", "max")
+
+    def __init__(self):
+        self.counts: list[int] = []
+        self.total = 0
+        self.sum   = 0
+        self.max   = 0
+
+    def record(self, seconds: float):
+        value = int(seconds * 1e6) if seconds > 0 else 0
+        shift = value.bit_length() - _SUB_BITS - 1
+        index = value if shift <= 0 else (shift << _SUB_BITS) + (value >> shift)
+        counts = self.counts
+        if index >= len(counts):
+            counts.extend([0] * (index + 1 - len(counts)))
+        counts[index] += 1
+        self.total += 1
+        self.sum   += value
+        if value > self.max:
+            self.max = value
+
+    def add(self, other: "LatencyHistogram"):
+        if len(other.counts) > len(self.counts):
+            self.counts.extend([0] * (len(other.counts) - len(self.counts)))
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.total += other.total
+        self.sum   += other.sum
+        self.max    = max(self.max, other.max)
+
+    def percentile(self, q: float) -> float:
+        # Seconds; the highest value that shares a bucket with the q-th
+        # percentile, so a reported p99 is never below the true one.
+        if not self.total:
+            return 0.0
+        rank, seen = max(1, -int(-q * self.total // 100)), 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(_highest(index), self.max) / 1e6
+        return self.max / 1e6
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.total,
+            "sum":   self.sum / 1e6,
+            "p50":   self.percentile(50),
+            "p90":   self.percentile(90),
+            "p99":   self.percentile(99),
+            "p999":  self.percentile(99.9),
+            "max":   self.max / 1e6,
+        }
+
+
+def _highest(index: int) -> int:
+    if index < 2 * _SUB:
+        return index
+    shift = (index >> _SUB_BITS) - 1
+    return (((index & (_SUB - 1)) + _SUB + 1) << shift) - 1
+
+
+class LatencyTracer:
+
+    __slots__ = ("histograms", "_probe")
+
+    def __init__(self):
+        self.histograms = {stage: LatencyHistogram() for stage in STAGES}
+        # [sent, writing, read] perf_counter() stamps; 0.0 until reached.
+        self._probe: list | None = None
+
+    def sent(self):
+        if self._probe is None:
+            self._probe = [time.perf_counter(), 0.0, 0.0]
+
+    def writing(self):
+        probe = self._probe
+        if probe is not None and not probe[1]:
+            probe[1] = time.perf_counter()
+
+    def read(self):
+        # Output read before the input reached the writer cannot be its echo.
+        probe = self._probe
+        if probe is not None and probe[1] and not probe[2]:
+            probe[2] = time.perf_counter()
+
+    def delivered(self):
+        probe = self._probe
+        if probe is None or not probe[2]:
+            return
+        now = time.perf_counter()
+        sent, writing, read = probe
+        histograms = self.histograms
+        histograms["queue"].record(writing - sent)
+        histograms["echo"].record(read - writing)
+        histograms["deliver"].record(now - read)
+        histograms["total"].record(now - sent)
+        self._probe = None
+
+    def add(self, other: "LatencyTracer"):
+        for stage in STAGES:
+            self.histograms[stage].add(other.histograms[stage])
+
+    def snapshot(self) -> dict:
+        return {stage: histogram.snapshot() for stage, histogram in self.histograms.items()}
@@ -0,0 +1,40 @@
+from typing import NamedTuple
+
+PROMPT_START  = "A"
+COMMAND_START = "B"
+COMMAND_RUN   = "C"
+COMMAND_END   = "D"
+
+MARK_PREFIX = b"\x1b]133;"
+
+
+class ShellMark(NamedTuple):
+    kind:      str
+    exit_code: int | None = None
+    params:    dict[str, str] = {}
+
+
+def mark_end(data: bytearray, start: int, end: int) -> int:
+    # OSC 133 ends with BEL or ST; -1 while the terminator has not arrived.
+    bel = data.find(b"\x07", start, end)
+    st  = data.find(b"\x1b\\", start + 1, end)
+    if bel == -1 and st == -1:
+        return -1
+    if st == -1 or (bel != -1 and bel < st):
+        return bel + 1
+    return st + 2
+
+
+def parse_mark(seq: bytes) -> ShellMark:
+    body  = seq[len(MARK_PREFIX):].rstrip(b"\x07\\").rstrip(b"\x1b")
+    parts = body.decode("ascii", errors="replace").split(";")
+    kind  = parts[0][:1]
+    exit_code = None
+    params: dict[str, str] = {}
+    for part in parts[1:]:
+        if "=" in part:
+            key, _, value = part.partition("=")
+            params[key] = value
+        elif exit_code is None and part.lstrip("-").isdigit():
+            exit_code = int(part)
+    return ShellMark(kind, exit_code, params)
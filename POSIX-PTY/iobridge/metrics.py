@@ -0,0 +1,264 @@
+import time
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from iobridge.latency import LatencyTracer, STAGES
+
+# I/O counters for every bridge. Each SessionMetrics is written without locks
+# by the threads that own its fields: the reader thread (or reactor loop, or
+# event loop) counts reads, suppression, emits and the first prompt, and the
+# writer counts writes. snapshot() sums the live sessions with the totals
+# retired by closed ones; only registering, retiring and reading take a lock.
+
+CHUNK_BUCKETS   = (64, 256, 1024, 4096, 16384, 65536, 262144)
+LATENCY_BUCKETS = (1e-5, 1e-4, 1e-3, 0.01, 0.1, 1.0)
+STARTUP_BUCKETS = (0.001, 0.005, 0.025, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum    = 0
+
+    def observe(self, value):
+        # Buckets are inclusive upper bounds, as in Prometheus.
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def add(self, other: "Histogram"):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.sum   += other.sum
+
+    def snapshot(self) -> dict:
+        running, buckets = 0, []
+        for bound, count in zip((*self.bounds, float("inf")), self.counts):
+            running += count
+            buckets.append((bound, running))
+        return {"buckets": buckets, "sum": self.sum, "count": running}
+
+
+class SessionMetrics:
+
+    __slots__ = (
+        "bytes_read", "reads", "read_sizes", "bytes_written", "writes", "suppressed",
+        "pauses", "paused", "emit_seconds", "banner_seconds", "spawn_seconds", "queues", "latency",
+        "_created", "_prompted", "_live", "_retired",
+    )
+
+    def __init__(self, register: bool = True):
+        self.bytes_read     = 0
+        self.reads          = 0
+        self.read_sizes     = Histogram(CHUNK_BUCKETS)
+        self.bytes_written  = 0
+        self.writes         = 0
+        self.suppressed     = 0
+        self.pauses         = 0
+        self.paused         = False
+        self.emit_seconds   = Histogram(LATENCY_BUCKETS)
+        self.banner_seconds = Histogram(STARTUP_BUCKETS)
+        self.spawn_seconds  = Histogram(STARTUP_BUCKETS)
+        # Writer lanes; their length is the queue depth gauge.
+        self.queues: tuple = ()
+        # Keystroke-to-echo probes; None until trace_latency().
+        self.latency: LatencyTracer | None = None
+        self._created  = time.monotonic()
+        self._prompted = False
+        self._live     = False
+        self._retired  = False
+        if register:
+            self.register()
+
+    def read(self, nbytes: int):
+        self.bytes_read += nbytes
+        self.reads      += 1
+        self.read_sizes.observe(nbytes)
+
+    def wrote(self, nbytes: int):
+        self.bytes_written += nbytes
+        self.writes        += 1
+
+    def prompt(self):
+        # The first prompt ends the banner phase.
+        if not self._prompted:
+            self._prompted = True
+            self.banner_seconds.observe(time.monotonic() - self._created)
+
+    def trace_latency(self) -> LatencyTracer:
+        if self.latency is None:
+            self.latency = LatencyTracer()
+        return self.latency
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(queue) for queue in self.queues)
+
+    def add(self, other: "SessionMetrics"):
+        self.bytes_read    += other.bytes_read
+        self.reads         += other.reads
+        self.bytes_written += other.bytes_written
+        self.writes        += other.writes
+        self.suppressed    += other.suppressed
+        self.pauses        += other.pauses
+        for name in ("read_sizes", "emit_seconds", "banner_seconds", "spawn_seconds"):
+            getattr(self, name).add(getattr(other, name))
+        if other.latency is not None:
+            self.trace_latency().add(other.latency)
+
+    def register(self):
+        # Called when the session's reader starts reading: from here until
+        # retire() it counts as alive. A reader that is built but never
+        # started is never counted.
+        if not self._live and not self._retired:
+            self._live = True
+            _registry.add(self)
+
+    def retire(self):
+        # Called once the session's reader is finished: its counts move into
+        # the totals and it stops counting as alive.
+        if self._retired:
+            return
+        self._retired = True
+        self.queues   = ()
+        if self._live:
+            self._live = False
+            _registry.retire(self)
+
+    def snapshot(self) -> dict:
+        result = {
+            "bytes_read":         self.bytes_read,
+            "read_calls":         self.reads,
+            "read_chunk_bytes":   self.read_sizes.snapshot(),
+            "bytes_written":      self.bytes_written,
+            "write_calls":        self.writes,
+            "lines_suppressed":   self.suppressed,
+            "flow_pauses":        self.pauses,
+            "emit_seconds":       self.emit_seconds.snapshot(),
+            "banner_seconds":     self.banner_seconds.snapshot(),
+            "spawn_seconds":      self.spawn_seconds.snapshot(),
+            "writer_queue_depth": self.queue_depth,
+        }
+        if self.latency is not None:
+            result["keystroke_latency"] = self.latency.snapshot()
+        return result
+
+
+class _Registry:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._live: set[SessionMetrics] = set()
+        self._retired = None
+
+    def add(self, metrics: SessionMetrics):
+        with self._lock:
+            self._live.add(metrics)
+
+    def retire(self, metrics: SessionMetrics):
+        with self._lock:
+            if self._retired is None:
+                self._retired = SessionMetrics(register=False)
+            self._retired.add(metrics)
+            self._live.discard(metrics)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            live  = list(self._live)
+            total = SessionMetrics(register=False)
+            if self._retired is not None:
+                total.add(self._retired)
+        for metrics in live:
+            total.add(metrics)
+        result = total.snapshot()
+        result["writer_queue_depth"] = sum(metrics.queue_depth for metrics in live)
+        result["sessions_alive"]     = len(live)
+        result["paused_sessions"]    = sum(1 for metrics in live if metrics.paused)
+        return result
+
+
+_registry = _Registry()
+
+
+def snapshot() -> dict:
+    # Totals over every bridge in this process, closed ones included.
+    return _registry.snapshot()
+
+
+# name, type, help; histograms expand to _bucket/_sum/_count.
+_EXPORTS = (
+    ("sessions_alive",     "gauge",     "PTY sessions with a running reader."),
+    ("paused_sessions",    "gauge",     "Sessions whose reader is paused by flow control."),
+    ("writer_queue_depth", "gauge",     "Writes queued for the PTYs and not yet written."),
+    ("bytes_read",         "counter",   "Bytes read from PTY masters."),
+    ("read_calls",         "counter",   "read() calls on PTY masters that returned data."),
+    ("read_chunk_bytes",   "histogram", "Bytes returned per read()."),
+    ("bytes_written",      "counter",   "Bytes written to PTY masters."),
+    ("write_calls",        "counter",   "writev() calls on PTY masters."),
+    ("lines_suppressed",   "counter",   "Echoed input lines removed from the output."),
+    ("flow_pauses",        "counter",   "Times a reader stopped at the high watermark."),
+    ("emit_seconds",       "histogram", "Time spent handing one output chunk to taps and the sink."),
+    ("banner_seconds",     "histogram", "Time from the reader's start to the shell's first prompt."),
+    ("spawn_seconds",      "histogram", "Time to spawn the shell process."),
+)
+
+_QUANTILES = (("0.5", "p50"), ("0.9", "p90"), ("0.99", "p99"), ("0.999", "p999"))
+
+
+def prometheus(values: dict | None = None, prefix: str = "pty_") -> str:
+    # Prometheus text exposition (version 0.0.4) of snapshot().
+    values = snapshot() if values is None else values
+    lines  = []
+    for name, kind, text in _EXPORTS:
+        metric = prefix + name + ("_total" if kind == "counter" else "")
+        lines.append(f"# HELP {metric} {text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        value = values[name]
+        if kind != "histogram":
+            lines.append(f"{metric} {value}")
+            continue
+        for bound, count in value["buckets"]:
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'{metric}_bucket{{le="{le}"}} {count}')
+        lines.append(f"{metric}_sum {value['sum']}")
+        lines.append(f"{metric}_count {value['count']}")
+    latency = values.get("keystroke_latency")
+    if latency:
+        metric = prefix + "keystroke_latency_seconds"
+        lines.append(f"# HELP {metric} Keystroke-to-echo latency by stage (queue, echo, deliver, total).")
+        lines.append(f"# TYPE {metric} summary")
+        for stage in STAGES:
+            value = latency[stage]
+            for quantile, key in _QUANTILES:
+                lines.append(f'{metric}{{stage="{stage}",quantile="{quantile}"}} {value[key]}')
+            lines.append(f'{metric}_sum{{stage="{stage}"}} {value["sum"]}')
+            lines.append(f'{metric}_count{{stage="{stage}"}} {value["count"]}')
+    return "\n".join(lines) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_):
+        pass
+
+
+def serve(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    # Serves GET /metrics from a daemon thread; shutdown() stops it.
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="PTY-Metrics").start()
+    return server
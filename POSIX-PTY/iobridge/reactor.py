@@ -0,0 +1,350 @@
+import os
+import time
+import selectors
+import threading
+from collections import deque
+
+from iobridge.io_bridge import OutputReader, _fd_writev
+from iobridge.metrics   import SessionMetrics
+
+
+class _Channel:
+
+    __slots__ = ("fd", "reader", "lock", "pending", "fast", "writing", "events")
+
+    def __init__(self, fd: int, reader: OutputReader):
+        self.fd      = fd
+        self.reader  = reader
+        self.lock    = threading.Lock()
+        self.pending: deque[memoryview] = deque()
+        self.fast:    deque[memoryview] = deque()
+        self.writing = False
+        self.events  = 0
+        reader.metrics.queues = (self.fast, self.pending)
+
+
+class _Loop(threading.Thread):
+
+    def __init__(self, index: int):
+        super().__init__(daemon=True, name=f"PTY-Reactor-{index}")
+        self._selector = selectors.DefaultSelector()
+        self._stopping = threading.Event()
+        self._lock     = threading.Lock()
+        self._calls: deque = deque()
+        self._channels: dict[int, _Channel] = {}
+        self._held: set[_Channel] = set()
+
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+
+    @property
+    def load(self) -> int:
+        return len(self._channels)
+
+    def call(self, fn, *args):
+        if threading.current_thread() is self:
+            fn(*args)
+            return
+        with self._lock:
+            self._calls.append((fn, args))
+        self._wake()
+
+    def call_wait(self, fn, *args):
+        if threading.current_thread() is self or not self.is_alive():
+            fn(*args)
+            return
+        done   = threading.Event()
+        failed = []
+
+        def _run():
+            try:
+                fn(*args)
+            except Exception as error:
+                failed.append(error)
+            finally:
+                done.set()
+
+        self.call(_run)
+        done.wait()
+        if failed:
+            raise failed[0]
+
+    def stop(self):
+        self._stopping.set()
+        self._wake()
+
+    def _wake(self):
+        try:
+            os.write(self._wake_w, b"\0")
+        except BlockingIOError:
+            pass
+        except OSError:
+            pass
+
+    def _drain_wake(self):
+        try:
+            while os.read(self._wake_r, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _run_calls(self):
+        while True:
+            with self._lock:
+                if not self._calls:
+                    return
+                fn, args = self._calls.popleft()
+            try:
+                fn(*args)
+            except Exception:
+                # One session's call going wrong must not stop the loop.
+                pass
+
+    def add(self, channel: _Channel):
+        self._channels[channel.fd] = channel
+        channel.reader.metrics.register()
+        channel.reader.on_resume(lambda: self.call(self._update, channel))
+        self._update(channel)
+
+    def remove(self, channel: _Channel):
+        if self._channels.pop(channel.fd, None) is None:
+            return
+        if channel.events:
+            try:
+                self._selector.unregister(channel.fd)
+            except (KeyError, ValueError):
+                pass
+            channel.events = 0
+        self._held.discard(channel)
+        channel.reader.on_resume(None)
+        channel.reader.finish()
+
+    def _fail(self, channel: _Channel):
+        # remove() that cannot raise: a sink or tap that failed on this
+        # channel's output fails again on what finish() flushes. The session
+        # is finished; the loop carries on with the others.
+        try:
+            self.remove(channel)
+        except Exception:
+            pass
+
+    def _update(self, channel: _Channel):
+        if channel.fd not in self._channels:
+            return
+        events = 0
+        if not channel.reader.paused:
+            events |= selectors.EVENT_READ
+        if channel.writing:
+            events |= selectors.EVENT_WRITE
+        if events == channel.events:
+            return
+        if not events:
+            self._selector.unregister(channel.fd)
+        elif not channel.events:
+            self._selector.register(channel.fd, events, channel)
+        else:
+            self._selector.modify(channel.fd, events, channel)
+        channel.events = events
+
+    def want_write(self, channel: _Channel):
+        self._update(channel)
+        self._on_write(channel)
+
+    def _on_read(self, channel: _Channel):
+        if not channel.reader.fill():
+            self.remove(channel)
+            return
+        channel.reader.flush_if_idle()
+        if channel.reader.deadline is not None:
+            self._held.add(channel)
+        if channel.reader.paused:
+            self._update(channel)
+
+    def _timeout(self) -> float | None:
+        deadlines = [c.reader.deadline for c in self._held if c.reader.deadline is not None]
+        if not deadlines:
+            return None
+        return max(0.0, min(deadlines) - time.monotonic())
+
+    def _flush_due(self):
+        now = time.monotonic()
+        for channel in list(self._held):
+            deadline = channel.reader.deadline
+            if deadline is None:
+                self._held.discard(channel)
+            elif deadline <= now:
+                self._held.discard(channel)
+                try:
+                    channel.reader.flush()
+                    self._update(channel)
+                except Exception:
+                    self._fail(channel)
+
+    def _on_write(self, channel: _Channel):
+        with channel.lock:
+            while channel.fast or channel.pending:
+                if not _fd_writev(channel.fd, channel.fast or channel.pending, channel.reader.metrics):
+                    return
+            channel.writing = False
+        self._update(channel)
+
+    def run(self):
+        while not self._stopping.is_set():
+            for key, mask in self._selector.select(self._timeout()):
+                channel = key.data
+                if channel is None:
+                    self._drain_wake()
+                    continue
+                try:
+                    if mask & selectors.EVENT_WRITE:
+                        self._on_write(channel)
+                    if mask & selectors.EVENT_READ and channel.fd in self._channels:
+                        self._on_read(channel)
+                except Exception:
+                    self._fail(channel)
+            self._flush_due()
+            self._run_calls()
+
+        for channel in list(self._channels.values()):
+            self._fail(channel)
+        self._selector.close()
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+
+
+class Reactor:
+
+    def __init__(self, threads: int = 1):
+        self._loops   = [_Loop(i) for i in range(max(1, threads))]
+        self._lock    = threading.Lock()
+        self._started = False
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            for loop in self._loops:
+                loop.start()
+            self._started = True
+
+    def stop(self):
+        for loop in self._loops:
+            loop.stop()
+
+    @property
+    def sessions(self) -> int:
+        return sum(loop.load for loop in self._loops)
+
+    def _register(self, channel: _Channel) -> _Loop:
+        self.start()
+        loop = min(self._loops, key=lambda l: l.load)
+        os.set_blocking(channel.fd, False)
+        loop.call_wait(loop.add, channel)
+        return loop
+
+
+_shared: Reactor | None = None
+_shared_lock = threading.Lock()
+
+
+def shared_reactor() -> Reactor:
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = Reactor(os.cpu_count() or 1)
+        return _shared
+
+
+class ReactorBridge:
+
+    def __init__(
+        self,
+        master_fd:   int,
+        encoding:    str = "utf-8",
+        reactor:     Reactor | None = None,
+        flush_delay: float = 0.008,
+        flush_bytes: int = 65536,
+    ):
+        self._encoding = encoding
+        self._reactor  = reactor or shared_reactor()
+        self._reader   = OutputReader(master_fd, encoding, flush_delay, flush_bytes)
+        self._channel  = _Channel(master_fd, self._reader)
+        self._loop: _Loop | None = None
+
+    def start(self):
+        self._loop = self._reactor._register(self._channel)
+
+    def _queue(self, lane: deque, data: bytes):
+        if not data or self._loop is None:
+            return
+        channel = self._channel
+        with channel.lock:
+            lane.append(memoryview(data))
+            if channel.writing:
+                return
+            channel.writing = True
+        self._loop.call(self._loop.want_write, channel)
+
+    def send(self, data: bytes):
+        self._queue(self._channel.pending, data)
+
+    def send_fast(self, data: bytes):
+        self._queue(self._channel.fast, data)
+
+    def send_line(self, text: str, encoding: str | None = None):
+        enc = encoding or self._encoding
+        # Register suppress BEFORE bytes enter the pipe.
+        if self._reader.echoes_input():
+            self._reader.suppress_next(text)
+        self.send((text + "\n").encode(enc))
+
+    def set_echo(self, enabled: bool):
+        self._reader.set_echo(enabled)
+
+    def track_marks(self):
+        self._reader.track_marks()
+
+    def on_mark(self, handler):
+        self._reader.on_mark(handler)
+
+    def on_output(self, handler):
+        self._reader.on_output(handler)
+
+    def on_close(self, handler):
+        self._reader.on_close(handler)
+
+    def set_sink(self, handler):
+        self._reader.set_sink(handler)
+
+    @property
+    def prompts(self) -> int:
+        return self._reader.prompts
+
+    @property
+    def metrics(self) -> SessionMetrics:
+        return self._reader.metrics
+
+    @property
+    def closed(self) -> bool:
+        return self._reader.closed
+
+    def wait_ready(
+        self,
+        since:   int = 0,
+        idle:    float | None = None,
+        timeout: float | None = None,
+    ) -> str:
+        return self._reader.wait_ready(since, idle, timeout)
+
+    def set_watermarks(self, high: int | None, low: int | None = None):
+        self._reader.set_watermarks(high, low)
+
+    def ack(self, nbytes: int):
+        self._reader.ack(nbytes)
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_wait(self._loop.remove, self._channel)
+            self._loop = None
@@ -0,0 +1,775 @@
+import re
+import codecs
+import unicodedata
+from array import array
+from iobridge.ansi import AnsiParser, TEXT, CSI, OSC, ESC
+
+# Cell attributes packed into one 64-bit integer:
+#   bits 0-7   flags below
+#   bits 8-32  foreground, bits 33-57 background
+# A colour is 0 for the default, 1 + index for the 256-colour palette, or
+# _RGB | 0xRRGGBB for true colour.
+BOLD      = 1
+DIM       = 2
+ITALIC    = 4
+UNDERLINE = 8
+BLINK     = 16
+INVERSE   = 32
+HIDDEN    = 64
+STRIKE    = 128
+
+_FG_SHIFT = 8
+_BG_SHIFT = 33
+_COLOR    = (1 << 25) - 1
+_RGB      = 1 << 24
+_FG_MASK  = _COLOR << _FG_SHIFT
+_BG_MASK  = _COLOR << _BG_SHIFT
+
+_FLAG_ON  = {1: BOLD, 2: DIM, 3: ITALIC, 4: UNDERLINE, 5: BLINK, 6: BLINK,
+             7: INVERSE, 8: HIDDEN, 9: STRIKE, 21: UNDERLINE}
+_FLAG_OFF = {22: BOLD | DIM, 23: ITALIC, 24: UNDERLINE, 25: BLINK,
+             27: INVERSE, 28: HIDDEN, 29: STRIKE}
+_FLAG_SGR = ((BOLD, "1"), (DIM, "2"), (ITALIC, "3"), (UNDERLINE, "4"),
+             (BLINK, "5"), (INVERSE, "7"), (HIDDEN, "8"), (STRIKE, "9"))
+
+# Private modes the screen does not act on but a new viewer must inherit:
+# cursor keys, focus and mouse reporting, bracketed paste.
+_REPLAYED_MODES = (1, 1000, 1002, 1003, 1004, 1005, 1006, 1015, 2004)
+
+_BLANK = 32
+_WIDE  = 0    # second cell of a double-width character
+
+_CONTROL_RE  = re.compile(r"[\x00-\x1f\x7f]")
+_PARAM_BYTES = bytes(range(0x30, 0x40))
+
+_DEC_GRAPHICS = str.maketrans(
+    "`abcdefghijklmnopqrstuvwxyz{|}~",
+    "◆▒␉␌␍␊°±␤␋┘┐┌└┼⎺⎻─⎼⎽├┤┴┬│≤≥π≠£·",
+)
+
+
+def _codes(text: str) -> array:
+    cells = array("I")
+    cells.frombytes(text.encode("utf-32-le"))
+    return cells
+
+
+def _width(ch: str) -> int:
+    if unicodedata.combining(ch) or unicodedata.category(ch) in ("Mn", "Me", "Cf"):
+        return 0
+    return 2 if unicodedata.east_asian_width(ch) in ("W", "F") else 1
+
+
+def _params(raw: bytes, default: int = 0) -> list[int]:
+    out = []
+    for p in raw.split(b";"):
+        p = p.split(b":")[0]
+        out.append(int(p) if p.isdigit() else default)
+    return out
+
+
+class _Buffer:
+
+    # One screen's cells: a pair of arrays per row, not an object per cell.
+
+    def __init__(self, cols: int, rows: int):
+        self.chars = [array("I", [_BLANK]) * cols for _ in range(rows)]
+        self.attrs = [array("Q", [0]) * cols for _ in range(rows)]
+
+    def unpair(self, y: int, x: int):
+        # Cells from x on are about to change: a double-width character with
+        # one half on each side of x would be left half drawn, so both halves
+        # go (as in xterm).
+        chars = self.chars[y]
+        if 0 < x < len(chars) and chars[x] == _WIDE:
+            chars[x - 1] = chars[x] = _BLANK
+
+    def blank(self, y: int, start: int, end: int, attr: int):
+        n = end - start
+        if n > 0:
+            self.unpair(y, start)
+            self.unpair(y, end)
+            self.chars[y][start:end] = array("I", [_BLANK]) * n
+            self.attrs[y][start:end] = array("Q", [attr]) * n
+
+    def scroll_up(self, top: int, bottom: int, n: int, cols: int, attr: int):
+        n = min(n, bottom - top + 1)
+        del self.chars[top:top + n]
+        del self.attrs[top:top + n]
+        at = bottom - n + 1
+        self.chars[at:at] = [array("I", [_BLANK]) * cols for _ in range(n)]
+        self.attrs[at:at] = [array("Q", [attr]) * cols for _ in range(n)]
+
+    def scroll_down(self, top: int, bottom: int, n: int, cols: int, attr: int):
+        n = min(n, bottom - top + 1)
+        del self.chars[bottom - n + 1:bottom + 1]
+        del self.attrs[bottom - n + 1:bottom + 1]
+        self.chars[top:top] = [array("I", [_BLANK]) * cols for _ in range(n)]
+        self.attrs[top:top] = [array("Q", [attr]) * cols for _ in range(n)]
+
+    def resize(self, cols: int, rows: int, drop: int):
+        # `drop` rows leave from the top (the cursor was below the new bottom).
+        del self.chars[:drop]
+        del self.attrs[:drop]
+        for y, (chars, attrs) in enumerate(zip(self.chars, self.attrs)):
+            have = len(chars)
+            if have > cols:
+                self.unpair(y, cols)
+                del chars[cols:]
+                del attrs[cols:]
+            elif have < cols:
+                chars.extend(array("I", [_BLANK]) * (cols - have))
+                attrs.extend(array("Q", [0]) * (cols - have))
+        del self.chars[rows:]
+        del self.attrs[rows:]
+        while len(self.chars) < rows:
+            self.chars.append(array("I", [_BLANK]) * cols)
+            self.attrs.append(array("Q", [0]) * cols)
+
+
+class _Cursor:
+
+    __slots__ = ("x", "y", "attr", "pending", "origin", "charsets", "shift")
+
+    def __init__(self):
+        self.x        = 0
+        self.y        = 0
+        self.attr     = 0
+        self.pending  = False    # wrap due before the next printed character
+        self.origin   = False
+        self.charsets = ["B", "B"]
+        self.shift    = 0
+
+    def copy(self) -> "_Cursor":
+        c = _Cursor()
+        c.x, c.y, c.attr, c.pending = self.x, self.y, self.attr, self.pending
+        c.origin, c.charsets, c.shift = self.origin, list(self.charsets), self.shift
+        return c
+
+
+class Screen:
+
+    # A VT100/xterm screen fed with raw PTY output. Tracks the cursor, scroll
+    # region, SGR attributes, alternate screen and the modes a viewer needs;
+    # scrolled-off lines are dropped (history is the scrollback's job).
+    # snapshot() redraws the current state on a fresh terminal, so its size
+    # depends on cols x rows, not on how much output the session produced.
+
+    def __init__(self, cols: int = 120, rows: int = 30, encoding: str = "utf-8"):
+        self.cols = cols
+        self.rows = rows
+        self.title = ""
+        self._encoding = encoding
+        self._parser  = AnsiParser()
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self._main    = _Buffer(cols, rows)
+        self._buf     = self._main
+        self._alt: _Buffer | None = None
+        self._cur     = _Cursor()
+        self._saved   = _Cursor()
+        self._alt_saved: _Cursor | None = None
+        self._top     = 0
+        self._bottom  = rows - 1
+        self._autowrap = True
+        self._visible  = True
+        self._keypad   = False
+        self._modes: dict[int, bool] = {}
+        self._last    = " "
+        self._sgr_cache: dict[int, str] = {}
+
+    def feed(self, data: bytes):
+        for kind, token in self._parser.feed(data):
+            if kind == TEXT:
+                self._text(self._decoder.decode(token))
+            elif kind == CSI:
+                self._csi(token)
+            elif kind == ESC:
+                self._esc(token)
+            elif kind == OSC:
+                self._osc(token)
+
+    def resize(self, cols: int, rows: int):
+        cur  = self._cur
+        drop = max(0, cur.y - rows + 1)
+        self._main.resize(cols, rows, drop)
+        if self._alt is not None:
+            self._alt.resize(cols, rows, drop)
+        self.cols, self.rows = cols, rows
+        self._top, self._bottom = 0, rows - 1
+        cur.y       = max(0, cur.y - drop)
+        cur.x       = min(cur.x, cols - 1)
+        cur.pending = False
+
+    @property
+    def cursor(self) -> tuple[int, int]:
+        return self._cur.x, self._cur.y
+
+    @property
+    def alternate(self) -> bool:
+        return self._alt is not None
+
+    @property
+    def full_screen(self) -> bool:
+        # The alternate screen, or cursor-key application mode plus the keypad
+        # (curses keypad(), which top sets without switching screens).
+        return self._alt is not None or (self._keypad and bool(self._modes.get(1)))
+
+    def lines(self) -> list[str]:
+        return [_row_text(chars).rstrip() for chars in self._buf.chars]
+
+    def snapshot(self) -> bytes:
+        out = ["\x1bc"]
+        if self._alt is not None:
+            self._paint(self._main, out)
+            saved = self._alt_saved or _Cursor()
+            out.append(f"\x1b[{saved.y + 1};{saved.x + 1}H\x1b[?1049h")
+        self._paint(self._buf, out)
+        for key, seq in self._mode_state().items():
+            if seq != _DEFAULT_MODES[key]:
+                out.append(seq)
+        self._cursor_state(out)
+        return "".join(out).encode("utf-8", "replace")
+
+    def _mode_state(self) -> dict:
+        # One entry per mode, as the sequence that sets its current value.
+        modes = {
+            "region": f"\x1b[{self._top + 1};{self._bottom + 1}r"
+                      if self._top or self._bottom != self.rows - 1 else "\x1b[r",
+            "wrap":   "\x1b[?7h" if self._autowrap else "\x1b[?7l",
+            "cursor": "\x1b[?25h" if self._visible else "\x1b[?25l",
+            "keypad": "\x1b=" if self._keypad else "\x1b>",
+            "title":  f"\x1b]2;{self.title}\x07" if self.title else "",
+        }
+        for mode in _REPLAYED_MODES:
+            modes[mode] = f"\x1b[?{mode}{'h' if self._modes.get(mode) else 'l'}"
+        return modes
+
+    def _cursor_state(self, out: list[str], pen: int | None = None):
+        # Cursor position, pen and charsets; the last part of any redraw, after
+        # the scroll region is set. `pen` is the SGR state the terminal has.
+        cur = self._cur
+        top = self._top if cur.origin else 0
+        if cur.origin:
+            out.append("\x1b[?6h")
+        if cur.pending:
+            # Redraw the last cell (a whole double-width character if it ends
+            # there) so the wrap is pending again.
+            chars = self._buf.chars[cur.y]
+            x = self.cols - 1
+            if x and chars[x] == _WIDE:
+                x -= 1
+            out.append(f"\x1b[{cur.y - top + 1};{x + 1}H")
+            pen = self._buf.attrs[cur.y][x]
+            out.append(self._sgr(pen))
+            out.append(_row_text(chars[x:]) or " ")
+        else:
+            out.append(f"\x1b[{cur.y - top + 1};{cur.x + 1}H")
+        if cur.attr != pen:
+            out.append(self._sgr(cur.attr))
+        if cur.charsets[0] != "B":
+            out.append(f"\x1b({cur.charsets[0]}")
+        if cur.charsets[1] != "B":
+            out.append(f"\x1b){cur.charsets[1]}")
+        if cur.shift:
+            out.append("\x0e")
+
+    def _paint(self, buf: _Buffer, out: list[str]):
+        attr = 0
+        for y, (chars, attrs) in enumerate(zip(buf.chars, buf.attrs)):
+            end = len(chars)
+            while end and chars[end - 1] == _BLANK and attrs[end - 1] == 0:
+                end -= 1
+            if end:
+                attr = self._paint_span(out, y, chars, attrs, 0, end, attr)
+        if attr:
+            out.append("\x1b[0m")
+
+    def _paint_span(self, out: list[str], y: int, chars: array, attrs: array,
+                    start: int, end: int, attr: int | None) -> int:
+        # Draws cells start..end of row y; `attr` is the pen the terminal has
+        # (None if unknown). Returns the pen left behind.
+        out.append(f"\x1b[{y + 1};{start + 1}H" if start else f"\x1b[{y + 1}H")
+        while start < end:
+            a   = attrs[start]
+            run = start + 1
+            while run < end and attrs[run] == a:
+                run += 1
+            if a != attr:
+                out.append(self._sgr(a))
+                attr = a
+            out.append(_row_text(chars[start:run]))
+            start = run
+        return attr
+
+    def _sgr(self, attr: int) -> str:
+        seq = self._sgr_cache.get(attr)
+        if seq is None:
+            parts = ["0"]
+            parts.extend(code for flag, code in _FLAG_SGR if attr & flag)
+            for base, color in ((38, (attr >> _FG_SHIFT) & _COLOR), (48, (attr >> _BG_SHIFT) & _COLOR)):
+                if color & _RGB:
+                    parts.append(f"{base};2;{color >> 16 & 255};{color >> 8 & 255};{color & 255}")
+                elif color:
+                    parts.append(f"{base};5;{color - 1}")
+            seq = self._sgr_cache[attr] = f"\x1b[{';'.join(parts)}m"
+        return seq
+
+    # -- text ---------------------------------------------------------------
+
+    def _text(self, text: str):
+        pos = 0
+        for m in _CONTROL_RE.finditer(text):
+            if m.start() > pos:
+                self._print(text[pos:m.start()])
+            self._control(m.group())
+            pos = m.end()
+        if pos < len(text):
+            self._print(text[pos:])
+
+    def _control(self, ch: str):
+        cur = self._cur
+        if ch == "\r":
+            cur.x, cur.pending = 0, False
+        elif ch in "\n\x0b\x0c":
+            cur.pending = False
+            self._index()
+        elif ch == "\b":
+            if cur.pending:
+                cur.pending = False
+            elif cur.x:
+                cur.x -= 1
+        elif ch == "\t":
+            cur.x = min(self.cols - 1, (cur.x // 8 + 1) * 8)
+        elif ch == "\x0e":
+            cur.shift = 1
+        elif ch == "\x0f":
+            cur.shift = 0
+
+    def _print(self, text: str):
+        cur = self._cur
+        if cur.charsets[cur.shift] == "0":
+            text = text.translate(_DEC_GRAPHICS)
+        self._last = text[-1]
+        if not text.isascii():
+            for ch in text:
+                self._put(ch)
+            return
+        cols  = self.cols
+        chars = self._buf.chars
+        attrs = self._buf.attrs
+        while text:
+            if cur.pending:
+                self._wrap()
+            x, y = cur.x, cur.y
+            room = cols - x
+            if len(text) > room and not self._autowrap:
+                text = text[:room - 1] + text[-1]
+            part = text[:room]
+            n    = len(part)
+            self._buf.unpair(y, x)
+            self._buf.unpair(y, x + n)
+            chars[y][x:x + n] = _codes(part)
+            attrs[y][x:x + n] = array("Q", [cur.attr]) * n
+            text = text[n:]
+            if x + n >= cols:
+                cur.x       = cols - 1
+                cur.pending = self._autowrap
+            else:
+                cur.x = x + n
+
+    def _put(self, ch: str):
+        width = _width(ch)
+        if not width:
+            return
+        cur = self._cur
+        if cur.pending or (width == 2 and cur.x == self.cols - 1 and self._autowrap):
+            self._wrap()
+        x, y = cur.x, cur.y
+        if width == 2 and x == self.cols - 1:
+            # No room and no wrap: half a character cannot be drawn.
+            return
+        self._buf.unpair(y, x)
+        self._buf.unpair(y, x + width)
+        self._buf.chars[y][x] = ord(ch)
+        self._buf.attrs[y][x] = cur.attr
+        if width == 2:
+            self._buf.chars[y][x + 1] = _WIDE
+            self._buf.attrs[y][x + 1] = cur.attr
+        if x + width >= self.cols:
+            cur.x       = self.cols - 1
+            cur.pending = self._autowrap
+        else:
+            cur.x = x + width
+
+    def _wrap(self):
+        self._cur.pending = False
+        self._cur.x = 0
+        self._index()
+
+    def _index(self):
+        cur = self._cur
+        if cur.y == self._bottom:
+            self._buf.scroll_up(self._top, self._bottom, 1, self.cols, self._erase_attr())
+        elif cur.y < self.rows - 1:
+            cur.y += 1
+
+    def _reverse_index(self):
+        cur = self._cur
+        if cur.y == self._top:
+            self._buf.scroll_down(self._top, self._bottom, 1, self.cols, self._erase_attr())
+        elif cur.y > 0:
+            cur.y -= 1
+
+    def _erase_attr(self) -> int:
+        # Erased cells take the current background (xterm's BCE).
+        return self._cur.attr & _BG_MASK
+
+    # -- escape sequences ---------------------------------------------------
+
+    def _esc(self, token: bytes):
+        seq = token[1:].decode("latin-1")
+        cur = self._cur
+        if seq == "7":
+            self._saved = cur.copy()
+        elif seq == "8":
+            self._restore(self._saved)
+        elif seq == "D":
+            cur.pending = False
+            self._index()
+        elif seq == "E":
+            cur.x, cur.pending = 0, False
+            self._index()
+        elif seq == "M":
+            cur.pending = False
+            self._reverse_index()
+        elif seq == "c":
+            self.__init__(self.cols, self.rows, self._encoding)
+        elif seq == "=":
+            self._keypad = True
+        elif seq == ">":
+            self._keypad = False
+        elif len(seq) == 2 and seq[0] in "()":
+            cur.charsets["()".index(seq[0])] = "0" if seq[1] == "0" else "B"
+
+    def _osc(self, token: bytes):
+        body = token[2:].rstrip(b"\x07").removesuffix(b"\x1b\\")
+        code, _, text = body.partition(b";")
+        if code in (b"0", b"2"):
+            self.title = text.decode("utf-8", "replace")
+
+    def _csi(self, token: bytes):
+        final = token[-1:]
+        body  = token[2:-1]
+        if body[:1] in (b"?", b">", b"<", b"="):
+            if body[:1] == b"?" and final in (b"h", b"l"):
+                for mode in _params(body[1:]):
+                    self._private_mode(mode, final == b"h")
+            return
+        if body.translate(None, _PARAM_BYTES):
+            # Intermediates: DECSTR is the only one handled; misordered ones are invalid.
+            if body == b"!" and final == b"p":
+                self._soft_reset()
+            return
+
+        if final == b"m":
+            self._sgr_params(body)
+            return
+        cur  = self._cur
+        args = _params(body)
+        n    = max(1, args[0])
+        cols, rows = self.cols, self.rows
+        cur.pending = False
+
+        if final == b"A":
+            cur.y = max(self._top if cur.y >= self._top else 0, cur.y - n)
+        elif final == b"B":
+            cur.y = min(self._bottom if cur.y <= self._bottom else rows - 1, cur.y + n)
+        elif final in (b"C", b"a"):
+            cur.x = min(cols - 1, cur.x + n)
+        elif final == b"D":
+            cur.x = max(0, cur.x - n)
+        elif final == b"E":
+            cur.x, cur.y = 0, min(rows - 1, cur.y + n)
+        elif final == b"F":
+            cur.x, cur.y = 0, max(0, cur.y - n)
+        elif final in (b"G", b"`"):
+            cur.x = min(cols - 1, n - 1)
+        elif final in (b"H", b"f"):
+            col = max(1, args[1]) if len(args) > 1 else 1
+            self._move(col - 1, n - 1)
+        elif final == b"d":
+            self._move(cur.x, n - 1)
+        elif final == b"J":
+            self._erase_display(args[0])
+        elif final == b"K":
+            self._erase_line(args[0])
+        elif final == b"X":
+            self._buf.blank(cur.y, cur.x, min(cols, cur.x + n), self._erase_attr())
+        elif final == b"@":
+            self._insert_chars(n)
+        elif final == b"P":
+            self._delete_chars(n)
+        elif final == b"L":
+            if self._top <= cur.y <= self._bottom:
+                self._buf.scroll_down(cur.y, self._bottom, n, cols, self._erase_attr())
+                cur.x = 0
+        elif final == b"M":
+            if self._top <= cur.y <= self._bottom:
+                self._buf.scroll_up(cur.y, self._bottom, n, cols, self._erase_attr())
+                cur.x = 0
+        elif final == b"S":
+            self._buf.scroll_up(self._top, self._bottom, n, cols, self._erase_attr())
+        elif final == b"T":
+            self._buf.scroll_down(self._top, self._bottom, n, cols, self._erase_attr())
+        elif final == b"b":
+            self._print(self._last * min(n, cols * rows))
+        elif final == b"r":
+            top    = max(1, args[0]) - 1
+            bottom = (args[1] if len(args) > 1 and args[1] else rows) - 1
+            if top < bottom < rows:
+                self._top, self._bottom = top, bottom
+                self._move(0, 0)
+        elif final == b"s" and not body:
+            self._saved = cur.copy()
+        elif final == b"u" and not body:
+            self._restore(self._saved)
+
+    def _move(self, x: int, y: int):
+        cur = self._cur
+        if cur.origin:
+            y = min(self._bottom, y + self._top)
+        cur.x = max(0, min(self.cols - 1, x))
+        cur.y = max(0, min(self.rows - 1, y))
+        cur.pending = False
+
+    def _restore(self, saved: _Cursor):
+        self._cur = saved.copy()
+        self._cur.x = min(self._cur.x, self.cols - 1)
+        self._cur.y = min(self._cur.y, self.rows - 1)
+        self._cur.pending = self._cur.pending and self._autowrap
+
+    def _erase_display(self, mode: int):
+        cur, buf, attr = self._cur, self._buf, self._erase_attr()
+        if mode == 0:
+            buf.blank(cur.y, cur.x, self.cols, attr)
+            rows = range(cur.y + 1, self.rows)
+        elif mode == 1:
+            buf.blank(cur.y, 0, cur.x + 1, attr)
+            rows = range(cur.y)
+        elif mode == 2:
+            rows = range(self.rows)
+        else:
+            return
+        for y in rows:
+            buf.blank(y, 0, self.cols, attr)
+
+    def _erase_line(self, mode: int):
+        cur, attr = self._cur, self._erase_attr()
+        if mode == 0:
+            self._buf.blank(cur.y, cur.x, self.cols, attr)
+        elif mode == 1:
+            self._buf.blank(cur.y, 0, cur.x + 1, attr)
+        elif mode == 2:
+            self._buf.blank(cur.y, 0, self.cols, attr)
+
+    def _insert_chars(self, n: int):
+        cur   = self._cur
+        chars = self._buf.chars[cur.y]
+        attrs = self._buf.attrs[cur.y]
+        n     = min(n, self.cols - cur.x)
+        self._buf.unpair(cur.y, cur.x)
+        # And the one pushed across the right edge.
+        self._buf.unpair(cur.y, self.cols - n)
+        chars[cur.x:cur.x] = array("I", [_BLANK]) * n
+        attrs[cur.x:cur.x] = array("Q", [self._erase_attr()]) * n
+        del chars[self.cols:]
+        del attrs[self.cols:]
+
+    def _delete_chars(self, n: int):
+        cur   = self._cur
+        chars = self._buf.chars[cur.y]
+        attrs = self._buf.attrs[cur.y]
+        n     = min(n, self.cols - cur.x)
+        self._buf.unpair(cur.y, cur.x)
+        self._buf.unpair(cur.y, cur.x + n)
+        del chars[cur.x:cur.x + n]
+        del attrs[cur.x:cur.x + n]
+        chars.extend(array("I", [_BLANK]) * n)
+        attrs.extend(array("Q", [self._erase_attr()]) * n)
+
+    def _private_mode(self, mode: int, on: bool):
+        cur = self._cur
+        if mode == 6:
+            cur.origin = on
+            self._move(0, 0)
+        elif mode == 7:
+            # Without autowrap a pending wrap never happens: the next
+            # character overwrites the last column.
+            self._autowrap = on
+            cur.pending    = cur.pending and on
+        elif mode == 25:
+            self._visible = on
+        elif mode in (47, 1047, 1049):
+            if on and self._alt is None:
+                if mode == 1049:
+                    self._alt_saved = cur.copy()
+                self._alt = _Buffer(self.cols, self.rows)
+                self._buf = self._alt
+            elif not on and self._alt is not None:
+                self._alt = None
+                self._buf = self._main
+                if mode == 1049 and self._alt_saved is not None:
+                    self._restore(self._alt_saved)
+                self._alt_saved = None
+        elif mode in _REPLAYED_MODES:
+            self._modes[mode] = on
+
+    def _soft_reset(self):
+        self._cur.attr    = 0
+        self._cur.origin  = False
+        self._cur.charsets = ["B", "B"]
+        self._cur.shift   = 0
+        self._top, self._bottom = 0, self.rows - 1
+        self._autowrap = True
+        self._visible  = True
+        self._keypad   = False
+
+    def _sgr_params(self, body: bytes):
+        attr  = self._cur.attr
+        items = body.split(b";") if body else [b"0"]
+        i = 0
+        while i < len(items):
+            sub  = items[i].split(b":")
+            code = int(sub[0]) if sub[0].isdigit() else 0
+            i += 1
+            if code == 0:
+                attr = 0
+            elif code in _FLAG_ON:
+                if code == 4 and len(sub) > 1 and sub[1] == b"0":
+                    attr &= ~UNDERLINE
+                else:
+                    attr |= _FLAG_ON[code]
+            elif code in _FLAG_OFF:
+                attr &= ~_FLAG_OFF[code]
+            elif 30 <= code <= 37 or 90 <= code <= 97:
+                attr = attr & ~_FG_MASK | (code % 10 + (8 if code >= 90 else 0) + 1) << _FG_SHIFT
+            elif 40 <= code <= 47 or 100 <= code <= 107:
+                attr = attr & ~_BG_MASK | (code % 10 + (8 if code >= 100 else 0) + 1) << _BG_SHIFT
+            elif code == 39:
+                attr &= ~_FG_MASK
+            elif code == 49:
+                attr &= ~_BG_MASK
+            elif code in (38, 48):
+                if len(sub) > 1:
+                    color, _ = _extended_color([int(p) if p.isdigit() else 0 for p in sub[1:]], True)
+                else:
+                    color, used = _extended_color([int(p) if p.isdigit() else 0 for p in items[i:i + 4]], False)
+                    i += used
+                if color is not None:
+                    shift = _FG_SHIFT if code == 38 else _BG_SHIFT
+                    attr  = attr & ~(_COLOR << shift) | color << shift
+        self._cur.attr = attr
+
+
+_DEFAULT_MODES = Screen(1, 1)._mode_state()
+
+
+class DeltaRenderer:
+
+    # Keeps a copy of what one viewer shows and turns the screen into the
+    # changed cells since the last render(), so a viewer of a full-screen app
+    # can be sent frames instead of every byte the app wrote.
+
+    def __init__(self, screen: Screen):
+        self._screen = screen
+        self._chars: list[array] | None = None
+        self._attrs: list[array] = []
+        self._shape  = None
+        self._modes: dict = {}
+        self._cursor = None
+
+    def sync(self):
+        # The viewer now shows exactly the current screen (it was sent the raw
+        # output up to here, or a snapshot).
+        screen = self._screen
+        self._chars  = [row[:] for row in screen._buf.chars]
+        self._attrs  = [row[:] for row in screen._buf.attrs]
+        self._shape  = (screen.cols, screen.rows, screen._alt is not None)
+        self._modes  = screen._mode_state()
+        self._cursor = _cursor_key(screen._cur)
+
+    def render(self) -> bytes:
+        screen = self._screen
+        if self._chars is None or self._shape != (screen.cols, screen.rows, screen._alt is not None):
+            data = screen.snapshot()
+            self.sync()
+            return data
+
+        out  = []
+        attr = None
+        last = self._cursor
+        if last[4]:
+            out.append("\x1b[?6l")
+        if last[5] != ("B", "B") or last[6]:
+            out.append("\x1b(B\x1b)B\x0f")
+        buf = screen._buf
+        for y, (chars, attrs) in enumerate(zip(buf.chars, buf.attrs)):
+            old_chars, old_attrs = self._chars[y], self._attrs[y]
+            if chars == old_chars and attrs == old_attrs:
+                continue
+            for start, end in _changed_spans(chars, attrs, old_chars, old_attrs):
+                attr = screen._paint_span(out, y, chars, attrs, start, end, attr)
+            self._chars[y] = chars[:]
+            self._attrs[y] = attrs[:]
+
+        modes = screen._mode_state()
+        for key, seq in modes.items():
+            if seq != self._modes[key]:
+                out.append(seq)
+        cursor = _cursor_key(screen._cur)
+        if not out and cursor == last:
+            return b""
+        screen._cursor_state(out, attr if attr is not None else last[2])
+        self._modes, self._cursor = modes, cursor
+        return "".join(out).encode("utf-8", "replace")
+
+
+def _cursor_key(cur: _Cursor) -> tuple:
+    return cur.x, cur.y, cur.attr, cur.pending, cur.origin, tuple(cur.charsets), cur.shift
+
+
+def _changed_spans(chars: array, attrs: array, old_chars: array, old_attrs: array):
+    # Runs of differing cells; gaps of a few equal cells are redrawn rather
+    # than paying for another cursor move.
+    n, x = len(chars), 0
+    while x < n:
+        if chars[x] == old_chars[x] and attrs[x] == old_attrs[x]:
+            x += 1
+            continue
+        start, gap = x, 0
+        while x < n and gap < 6:
+            gap = gap + 1 if chars[x] == old_chars[x] and attrs[x] == old_attrs[x] else 0
+            x += 1
+        end = x - gap
+        # Never split a double-width character.
+        if start and chars[start] == _WIDE:
+            start -= 1
+        if end < n and chars[end] == _WIDE:
+            end += 1
+        yield start, end
+
+
+def _extended_color(args: list[int], colon: bool) -> tuple[int | None, int]:
+    # 5;n or 2;r;g;b after 38/48; the colon form may carry a colour-space id
+    # before r:g:b. Returns the colour and how many parameters it used.
+    if len(args) > 1 and args[0] == 5:
+        return min(args[1], 255) + 1, 2
+    if len(args) > 3 and args[0] == 2:
+        r, g, b = (min(v, 255) for v in (args[-3:] if colon else args[1:4]))
+        return _RGB | r << 16 | g << 8 | b, 4
+    return None, min(1, len(args))
+
+
+def _row_text(chars: array) -> str:
+    text = chars.tobytes().decode("utf-32-le", "replace")
+    return text.replace("\x00", "") if _WIDE in chars else text
@@ -0,0 +1,166 @@
+import os
+import mmap
+import tempfile
+import threading
+
+
+class _Segment:
+
+    # Append-only spill file, mapped once at full size; unlinked on creation
+    # so nothing is left behind if the process dies.
+
+    def __init__(self, directory: str, base: int, size: int):
+        fd, path = tempfile.mkstemp(prefix="pypty-scrollback-", dir=directory)
+        try:
+            os.unlink(path)
+            os.ftruncate(fd, size)
+            self.map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        self.base   = base
+        self.length = 0
+
+    @property
+    def free(self) -> int:
+        return len(self.map) - self.length
+
+    def append(self, data: memoryview) -> int:
+        n = min(len(data), self.free)
+        self.map[self.length:self.length + n] = data[:n]
+        self.length += n
+        if not self.free and hasattr(mmap, "MADV_DONTNEED"):
+            # Full: drop the pages from our RSS; they stay in the file.
+            self.map.madvise(mmap.MADV_DONTNEED)
+        return n
+
+    def close(self):
+        self.map.close()
+
+
+class Scrollback:
+
+    # The newest `capacity` bytes live in a RAM ring. Bytes pushed out of the
+    # ring go to mmap'd segment files when `spill_dir` is set (bounded by
+    # `max_spill`), otherwise they are dropped. Offsets count every byte ever
+    # appended, so they stay valid as data moves from RAM to disk.
+
+    def __init__(
+        self,
+        capacity:     int = 1 << 20,
+        spill_dir:    str | None = None,
+        segment_size: int = 8 << 20,
+        max_spill:    int | None = None,
+    ):
+        self._ring     = bytearray(capacity)
+        self._view     = memoryview(self._ring)
+        self._used     = 0
+        self._end      = 0
+        self._lock     = threading.Lock()
+        self._spill_dir    = spill_dir
+        self._segment_size = segment_size
+        self._max_spill    = max_spill
+        self._segments: list[_Segment] = []
+
+    @property
+    def start(self) -> int:
+        with self._lock:
+            return self._start()
+
+    @property
+    def end(self) -> int:
+        return self._end
+
+    def _start(self) -> int:
+        if self._segments:
+            return self._segments[0].base
+        return self._end - self._used
+
+    def append(self, data: bytes):
+        data = memoryview(data)
+        with self._lock:
+            cap = len(self._ring)
+            if len(data) >= cap:
+                self._evict(self._used)
+                self._spill(data[:len(data) - cap], self._end)
+                self._copy_in((self._end + len(data) - cap) % cap, data[len(data) - cap:])
+                self._used = cap
+                self._end += len(data)
+                return
+            self._evict(max(0, self._used + len(data) - cap))
+            self._copy_in(self._end % cap, data)
+            self._used += len(data)
+            self._end  += len(data)
+
+    def read(self, start: int, end: int | None = None) -> bytes:
+        with self._lock:
+            start = max(start, self._start())
+            end   = self._end if end is None else min(end, self._end)
+            if start >= end:
+                return b""
+            parts = []
+            ring_start = self._end - self._used
+            for seg in self._segments:
+                lo = max(start, seg.base)
+                hi = min(end, seg.base + seg.length, ring_start)
+                if lo < hi:
+                    parts.append(seg.map[lo - seg.base:hi - seg.base])
+            lo = max(start, ring_start)
+            if lo < end:
+                parts.append(self._ring_slice(lo, end))
+            return parts[0] if len(parts) == 1 else b"".join(parts)
+
+    def close(self):
+        with self._lock:
+            for seg in self._segments:
+                seg.close()
+            self._segments.clear()
+
+    def _copy_in(self, pos: int, data: memoryview):
+        cap   = len(self._ring)
+        first = min(len(data), cap - pos)
+        self._view[pos:pos + first] = data[:first]
+        if first < len(data):
+            self._view[:len(data) - first] = data[first:]
+
+    def _ring_slice(self, start: int, end: int) -> bytes:
+        cap = len(self._ring)
+        lo, hi = start % cap, end % cap or cap
+        if lo < hi:
+            return bytes(self._view[lo:hi])
+        return bytes(self._view[lo:]) + bytes(self._view[:hi])
+
+    def _evict(self, count: int):
+        # The oldest `count` ring bytes leave RAM.
+        if count <= 0:
+            return
+        oldest = self._end - self._used
+        if self._spill_dir is not None:
+            cap = len(self._ring)
+            lo, hi = oldest % cap, (oldest + count) % cap or cap
+            if lo < hi:
+                self._spill(self._view[lo:hi], oldest)
+            else:
+                self._spill(self._view[lo:], oldest)
+                self._spill(self._view[:hi], oldest + cap - lo)
+        self._used -= count
+
+    def _spill(self, data: memoryview, base: int):
+        if self._spill_dir is None or not len(data):
+            return
+        while len(data):
+            seg = self._segments[-1] if self._segments else None
+            if seg is None or not seg.free:
+                seg = _Segment(self._spill_dir, base, self._segment_size)
+                self._segments.append(seg)
+                self._trim()
+            n = seg.append(data)
+            data = data[n:]
+            base += n
+
+    def _trim(self):
+        if self._max_spill is None:
+            return
+        while len(self._segments) > 1 and (
+            len(self._segments) - 1
+        ) * self._segment_size >= self._max_spill:
+            self._segments.pop(0).close()
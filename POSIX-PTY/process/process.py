@@ -18,6 +18,15 @@ class ChildProcess:
         except ChildProcessError:
             return -1
 
+    def poll(self) -> int | None:
+        try:
+            pid, status = os.waitpid(self._pid, os.WNOHANG)
+        except ChildProcessError:
+            return -1
+        if pid == 0:
+            return None
+        return os.waitstatus_to_exitcode(status)
+
     def terminate(self):
         try:
             os.kill(self._pid, signal.SIGTERM)
@@ -31,39 +40,41 @@ class ChildProcess:
             pass
 
 
-def spawn(command: str, slave_fd: int) -> ChildProcess:
+def _exec_child(command: str, slave_fd: int, env: dict[str, str] | None):
+    # Runs in the forked child: new session, slave as controlling tty and stdio.
+    try:
+        os.setsid()
+
+        import fcntl, termios
+        fcntl.ioctl(slave_fd, termios.TIOCSCTTY, 0)
+
+        os.dup2(slave_fd, 0)
+        os.dup2(slave_fd, 1)
+        os.dup2(slave_fd, 2)
+
+        try:
+            max_fd = os.sysconf("SC_OPEN_MAX")
+        except (AttributeError, ValueError):
+            max_fd = 256
+        # One close_range(2) call where available instead of a close() per fd.
+        os.closerange(3, max_fd)
+
+        import shlex
+        args = shlex.split(command)
+        if env:
+            os.execvpe(args[0], args, {**os.environ, **env})
+        os.execvp(args[0], args)
+    except Exception:
+        pass
+    os._exit(1)
+
+
+def spawn(command: str, slave_fd: int, env: dict[str, str] | None = None) -> ChildProcess:
 
     pid = os.fork()
 
     if pid == 0:
+        _exec_child(command, slave_fd, env)
 
-        try:
-            os.setsid()
-
-            import fcntl, termios
-            fcntl.ioctl(slave_fd, termios.TIOCSCTTY, 0)
-
-            os.dup2(slave_fd, 0)
-            os.dup2(slave_fd, 1)
-            os.dup2(slave_fd, 2)
-
-            try:
-                max_fd = os.sysconf("SC_OPEN_MAX")
-            except (AttributeError, ValueError):
-                max_fd = 256
-            for fd in range(3, max_fd):
-                try:
-                    os.close(fd)
-                except OSError:
-                    pass
-
-            import shlex
-            args = shlex.split(command)
-            os.execvp(args[0], args)
-        except Exception:
-            os._exit(1)
-
-    else:
-
-        os.close(slave_fd)
-        return ChildProcess(pid)
\ No newline at end of file
+    os.close(slave_fd)
+    return ChildProcess(pid)
@@ -0,0 +1,222 @@
+import os
+import sys
+import shlex
+import queue
+import pickle
+import select
+import signal
+import socket
+import threading
+from process.process import ChildProcess, _exec_child, spawn
+
+
+class ForkSpawner:
+
+    # fork() + exec from this process; the historical behaviour.
+
+    def spawn(self, command: str, slave_fd: int, env: dict[str, str] | None = None) -> ChildProcess:
+        return spawn(command, slave_fd, env)
+
+
+class PosixSpawner:
+
+    # posix_spawn (vfork/clone under glibc): no copy of a large or threaded parent.
+    # Python fds are close-on-exec, so only the slave needs wiring up. Opening the
+    # slave by path right after setsid makes it the controlling terminal.
+
+    def spawn(self, command: str, slave_fd: int, env: dict[str, str] | None = None) -> ChildProcess:
+        args = shlex.split(command)
+        path = os.ttyname(slave_fd)
+        try:
+            pid = os.posix_spawnp(
+                args[0],
+                args,
+                {**os.environ, **env} if env else os.environ,
+                file_actions=[
+                    (os.POSIX_SPAWN_OPEN, 0, path, os.O_RDWR, 0),
+                    (os.POSIX_SPAWN_DUP2, 0, 1),
+                    (os.POSIX_SPAWN_DUP2, 0, 2),
+                ],
+                setsid=True,
+            )
+        finally:
+            os.close(slave_fd)
+        return ChildProcess(pid)
+
+
+class _ServerChild(ChildProcess):
+
+    # A grandchild reaped by the fork server; exit codes arrive over its socket.
+    # The server keeps a code only while its handle exists.
+
+    def __init__(self, pid: int, server: "ForkServer"):
+        super().__init__(pid)
+        self._server = server
+
+    def __del__(self):
+        self._server._release(self._pid)
+
+    def wait(self) -> int:
+        return self._server._wait(self._pid, None)
+
+    def poll(self) -> int | None:
+        return self._server._wait(self._pid, 0)
+
+
+class ForkServer:
+
+    # A small helper interpreter that forks shells on request, so the (large,
+    # threaded) server never forks itself. The slave fd travels via SCM_RIGHTS.
+
+    def __init__(self):
+        self._sock:   socket.socket | None = None
+        self._pid:    int | None = None
+        self._alive   = False
+        self._lock    = threading.Lock()
+        self._exited  = threading.Condition()
+        self._codes:  dict[int, int] = {}
+        self._handed: set[int] = set()
+        self._replies: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        with self._lock:
+            if self._sock is not None:
+                return
+            ours, theirs = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+            theirs.set_inheritable(True)
+            root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            path = os.pathsep.join(p for p in (root, os.environ.get("PYTHONPATH")) if p)
+            self._pid = os.posix_spawn(
+                sys.executable,
+                [sys.executable, "-m", "process.spawner", str(theirs.fileno())],
+                {**os.environ, "PYTHONPATH": path},
+            )
+            theirs.close()
+            self._sock   = ours
+            self._alive  = True
+            self._thread = threading.Thread(
+                target=self._read, daemon=True, name="PTY-ForkServer"
+            )
+            self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            if self._sock is None:
+                return
+            self._sock.shutdown(socket.SHUT_RDWR)
+            self._thread.join()
+            self._sock.close()
+            self._sock = None
+            try:
+                os.waitpid(self._pid, 0)
+            except ChildProcessError:
+                pass
+
+    def spawn(self, command: str, slave_fd: int, env: dict[str, str] | None = None) -> ChildProcess:
+        self.start()
+        try:
+            # One request in flight at a time, so replies come back in order.
+            with self._lock:
+                if not self._alive:
+                    raise OSError("fork server is not running")
+                socket.send_fds(self._sock, [pickle.dumps((command, env))], [slave_fd])
+                kind, value = self._replies.get()
+        finally:
+            os.close(slave_fd)
+        if kind == "error":
+            raise OSError(value)
+        return _ServerChild(value, self)
+
+    def _wait(self, pid: int, timeout: float | None) -> int | None:
+        with self._exited:
+            if timeout is None:
+                self._exited.wait_for(lambda: pid in self._codes or not self._alive)
+            if pid in self._codes:
+                return self._codes[pid]
+            return None if self._alive else -1
+
+    def _release(self, pid: int):
+        # Nobody can ask for this child's code any more.
+        with self._exited:
+            self._handed.discard(pid)
+            self._codes.pop(pid, None)
+
+    def _read(self):
+        while True:
+            try:
+                data = self._sock.recv(4096)
+            except OSError:
+                data = b""
+            if not data:
+                break
+            message = pickle.loads(data)
+            if message[0] == "exit":
+                with self._exited:
+                    # A child whose handle is gone was never going to be waited on.
+                    if message[1] in self._handed:
+                        self._codes[message[1]] = message[2]
+                        self._exited.notify_all()
+            else:
+                if message[0] == "spawned":
+                    # Before the reply is handed over: the exit may be next on the socket.
+                    with self._exited:
+                        self._handed.add(message[1])
+                self._replies.put(message)
+        with self._exited:
+            self._alive = False
+            self._exited.notify_all()
+        self._replies.put(("error", "fork server exited"))
+
+
+def _serve(fd: int):
+    sock = socket.socket(fileno=fd)
+    wake_r, wake_w = os.pipe()
+    os.set_blocking(wake_r, False)
+    os.set_blocking(wake_w, False)
+    signal.set_wakeup_fd(wake_w)
+    signal.signal(signal.SIGCHLD, lambda *_: None)
+
+    def send(message):
+        try:
+            sock.send(pickle.dumps(message))
+        except OSError:
+            pass
+
+    while True:
+        try:
+            ready = select.select([sock, wake_r], [], [])[0]
+        except InterruptedError:
+            continue
+        if wake_r in ready:
+            try:
+                os.read(wake_r, 4096)
+            except BlockingIOError:
+                pass
+            while True:
+                try:
+                    pid, status = os.waitpid(-1, os.WNOHANG)
+                except ChildProcessError:
+                    break
+                if pid == 0:
+                    break
+                send(("exit", pid, os.waitstatus_to_exitcode(status)))
+        if sock in ready:
+            data, fds, _, _ = socket.recv_fds(sock, 65536, 1)
+            if not data:
+                return
+            command, env = pickle.loads(data)
+            try:
+                pid = os.fork()
+                if pid == 0:
+                    _exec_child(command, fds[0], env)
+                send(("spawned", pid))
+            except OSError as e:
+                send(("error", str(e)))
+            finally:
+                for fd in fds:
+                    os.close(fd)
+
+
+if __name__ == "__main__":
+    _serve(int(sys.argv[1]))
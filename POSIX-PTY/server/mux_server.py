@@ -0,0 +1,208 @@
+import os
+import sys
+import asyncio
+import argparse
+
+from session.async_session import AsyncSession
+from iobridge.compress     import Compressor, methods
+from iobridge              import metrics
+from server import protocol
+from server.protocol import FrameDecoder, ProtocolError
+
+_default_shell = os.environ.get("SHELL", "bash")
+
+
+class Multiplexer:
+
+    # Many AsyncSessions over one connection. `send(buffers)` is an async
+    # callable that writes a frame given as a list of buffers. An OPEN may
+    # name a command, but the client does not choose what gets exec'd: only
+    # the commands in `shells` are run, and any other one is refused.
+
+    def __init__(
+        self,
+        send,
+        shell:        str | None = None,
+        max_channels: int = 64,
+        high_water:   int = 1 << 20,
+        spawner=None,
+        shells:       tuple[str, ...] = (),
+    ):
+        self._send         = send
+        self._shell        = shell or _default_shell
+        self._shells       = frozenset(shells)
+        self._max_channels = max_channels
+        self._high_water   = high_water
+        self._spawner      = spawner
+        self._decoder      = FrameDecoder()
+        self._channels: dict[int, AsyncSession] = {}
+        self._pumps:    dict[int, asyncio.Task] = {}
+        self._compressors: dict[int, Compressor] = {}
+
+    @property
+    def channels(self) -> int:
+        return len(self._channels)
+
+    async def feed(self, data: bytes):
+        for frame in self._decoder.feed(data):
+            await self._dispatch(frame)
+
+    async def close(self):
+        for channel in list(self._channels):
+            await self._close(channel)
+
+    async def _dispatch(self, frame: protocol.Frame):
+        kind, channel, payload = frame
+        session = self._channels.get(channel)
+
+        if kind == protocol.OPEN:
+            cols, rows, shell = protocol.parse_open(payload)
+            if (
+                session is not None
+                or len(self._channels) >= self._max_channels
+                or (shell and shell != self._shell and shell not in self._shells)
+            ):
+                await self._send(protocol.encode(protocol.CLOSE, channel))
+                return
+            await self._open(channel, cols, rows, shell or self._shell)
+        elif session is None:
+            return
+        elif kind == protocol.DATA:
+            # The payload is a view of the caller's read buffer, and the writer keeps
+            # it queued; not waiting for the drain keeps one stalled shell from
+            # blocking input to the others.
+            session.write(bytes(payload))
+        elif kind == protocol.RESIZE:
+            await session.resize(*protocol.parse_resize(payload))
+        elif kind == protocol.SIGNAL:
+            session.send_signal(protocol.parse_signal(payload))
+        elif kind == protocol.COMPRESS:
+            method = protocol.parse_compress(payload)
+            method = method if method in methods() else ""
+            # Installed before the answer is written, so every DATA frame after
+            # the answer is compressed and none before it.
+            if method:
+                self._compressors[channel] = Compressor(method)
+            else:
+                self._compressors.pop(channel, None)
+            await self._send(protocol.encode_compress(channel, method))
+        elif kind == protocol.CLOSE:
+            await self._close(channel)
+
+    async def _open(self, channel: int, cols: int, rows: int, shell: str):
+        session = AsyncSession(
+            shell,
+            cols,
+            rows,
+            high_water=self._high_water,
+            spawner=self._spawner,
+        )
+        try:
+            await session.start()
+        except OSError:
+            await self._send(protocol.encode_exit(channel, -1))
+            return
+        self._channels[channel] = session
+        self._pumps[channel]    = asyncio.create_task(self._pump(channel, session))
+
+    async def _pump(self, channel: int, session: AsyncSession):
+        header = protocol.header
+        async for chunk in session.output():
+            compressor = self._compressors.get(channel)
+            if compressor is not None:
+                chunk = compressor.compress(chunk)
+            await self._send([header(protocol.DATA, channel, len(chunk)), chunk])
+        status = await session.wait_closed()
+        if self._channels.get(channel) is session:
+            del self._channels[channel]
+            self._pumps.pop(channel, None)
+            self._compressors.pop(channel, None)
+            await session.stop()
+            await self._send(protocol.encode_exit(channel, status))
+
+    async def _close(self, channel: int):
+        session = self._channels.pop(channel, None)
+        pump    = self._pumps.pop(channel, None)
+        self._compressors.pop(channel, None)
+        if pump is not None:
+            pump.cancel()
+        if session is not None:
+            await session.stop()
+
+
+async def serve_stream(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, **options):
+    async def send(buffers):
+        writer.writelines(buffers)
+        await writer.drain()
+
+    mux = Multiplexer(send, **options)
+    try:
+        while data := await reader.read(65536):
+            await mux.feed(data)
+    except (ConnectionError, ProtocolError):
+        pass
+    finally:
+        await mux.close()
+        writer.close()
+
+
+async def serve_websocket(websocket, **options):
+    from websockets.exceptions import ConnectionClosed
+
+    async def send(buffers):
+        await websocket.send(b"".join(buffers))
+
+    mux = Multiplexer(send, **options)
+    try:
+        async for message in websocket:
+            if isinstance(message, bytes):
+                await mux.feed(message)
+    except (ConnectionClosed, ProtocolError):
+        pass
+    finally:
+        await mux.close()
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Serve multiplexed PTY sessions.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--unix", default=None, help="listen on a UNIX socket path instead")
+    parser.add_argument("--shell", default=None)
+    parser.add_argument("--allow-shell", action="append", default=[], metavar="COMMAND",
+                        help="a command clients may name in OPEN (repeatable)")
+    parser.add_argument("--max-channels", type=int, default=64)
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="serve Prometheus metrics at http://HOST:PORT/metrics")
+    args = parser.parse_args(argv)
+
+    if args.metrics_port:
+        metrics.serve(args.metrics_port, args.host)
+
+    async def handle(reader, writer):
+        await serve_stream(
+            reader, writer,
+            shell=args.shell,
+            shells=tuple(args.allow_shell),
+            max_channels=args.max_channels,
+        )
+
+    async def run():
+        if args.unix:
+            server = await asyncio.start_unix_server(handle, args.unix)
+        else:
+            server = await asyncio.start_server(handle, args.host, args.port)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        print("Error: This is the POSIX build. Use the Windows version for Win32.")
+        sys.exit(1)
+    main()
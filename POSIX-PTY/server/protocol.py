@@ -0,0 +1,164 @@
+import signal
+import struct
+from typing import NamedTuple
+
+# Every frame: type (u8), channel (u16), payload length (u32), payload.
+#   OPEN    cols u16, rows u16, shell command (utf-8, may be empty)
+#   CLOSE   empty
+#   DATA    raw bytes, either direction
+#   RESIZE  cols u16, rows u16
+#   SIGNAL  signal number u8
+#   EXIT    exit status i32
+#   COMPRESS  method name (utf-8). Sent by the client to ask for compressed
+#             output on a channel; the server answers with the method it will
+#             use (empty: none), and its later DATA payloads on that channel
+#             are one iobridge.compress stream.
+
+OPEN   = 1
+CLOSE  = 2
+DATA   = 3
+RESIZE = 4
+SIGNAL = 5
+EXIT   = 6
+COMPRESS = 7
+
+_HEADER = struct.Struct(">BHI")
+_SIZE   = struct.Struct(">HH")
+_STATUS = struct.Struct(">i")
+
+_SIGNALS = frozenset(int(signum) for signum in signal.valid_signals())
+
+HEADER_SIZE = _HEADER.size
+MAX_PAYLOAD = 1 << 24
+
+
+class ProtocolError(ValueError):
+    pass
+
+
+class Frame(NamedTuple):
+    kind:    int
+    channel: int
+    payload: memoryview
+
+
+def header(kind: int, channel: int, length: int) -> bytes:
+    return _HEADER.pack(kind, channel, length)
+
+
+def encode(kind: int, channel: int, payload: bytes = b"") -> list:
+    # Header and payload as separate buffers for writev/writelines; the
+    # payload itself is never copied.
+    return [_HEADER.pack(kind, channel, len(payload)), payload]
+
+
+def encode_open(channel: int, cols: int, rows: int, shell: str = "") -> list:
+    return encode(OPEN, channel, _SIZE.pack(cols, rows) + shell.encode())
+
+
+def encode_resize(channel: int, cols: int, rows: int) -> list:
+    return encode(RESIZE, channel, _SIZE.pack(cols, rows))
+
+
+def encode_signal(channel: int, signum: int) -> list:
+    return encode(SIGNAL, channel, bytes((signum,)))
+
+
+def encode_exit(channel: int, status: int) -> list:
+    return encode(EXIT, channel, _STATUS.pack(status))
+
+
+def encode_compress(channel: int, method: str) -> list:
+    return encode(COMPRESS, channel, method.encode())
+
+
+def parse_open(payload: memoryview) -> tuple[int, int, str]:
+    if len(payload) < _SIZE.size:
+        raise ProtocolError("short OPEN frame")
+    cols, rows = _SIZE.unpack_from(payload)
+    try:
+        return cols, rows, bytes(payload[_SIZE.size:]).decode()
+    except UnicodeDecodeError:
+        raise ProtocolError("bad OPEN frame") from None
+
+
+def parse_resize(payload: memoryview) -> tuple[int, int]:
+    if len(payload) != _SIZE.size:
+        raise ProtocolError("bad RESIZE frame")
+    return _SIZE.unpack_from(payload)
+
+
+def parse_signal(payload: memoryview) -> int:
+    if len(payload) != 1:
+        raise ProtocolError("bad SIGNAL frame")
+    if payload[0] not in _SIGNALS:
+        raise ProtocolError(f"unknown signal {payload[0]}")
+    return payload[0]
+
+
+def parse_exit(payload: memoryview) -> int:
+    if len(payload) != _STATUS.size:
+        raise ProtocolError("bad EXIT frame")
+    return _STATUS.unpack_from(payload)[0]
+
+
+def parse_compress(payload: memoryview) -> str:
+    try:
+        return bytes(payload).decode("ascii")
+    except UnicodeDecodeError:
+        raise ProtocolError("bad COMPRESS frame") from None
+
+
+class FrameDecoder:
+
+    # Frames are memoryview slices of the data passed to feed(); only the
+    # bytes of a frame split across reads are copied, once. Copy a payload
+    # before keeping it around if the fed buffer will be reused.
+
+    def __init__(self, max_payload: int = MAX_PAYLOAD):
+        self._partial     = bytearray()
+        self._max_payload = max_payload
+
+    def feed(self, data: bytes) -> list[Frame]:
+        view   = memoryview(data)
+        frames = []
+        pos    = self._complete(view, frames) if self._partial else 0
+        end    = len(view)
+        while end - pos >= HEADER_SIZE:
+            kind, channel, length = _HEADER.unpack_from(view, pos)
+            if length > self._max_payload:
+                self._check(length)
+            start = pos + HEADER_SIZE
+            if start + length > end:
+                break
+            frames.append(Frame(kind, channel, view[start:start + length]))
+            pos = start + length
+        if pos < end:
+            self._partial += view[pos:]
+        return frames
+
+    def _complete(self, view: memoryview, frames: list) -> int:
+        # Tops up the frame left over from the last read with just the bytes
+        # it still needs; returns how many of `view` that took.
+        partial = self._partial
+        used    = 0
+        if len(partial) < HEADER_SIZE:
+            used = min(HEADER_SIZE - len(partial), len(view))
+            partial += view[:used]
+            if len(partial) < HEADER_SIZE:
+                return used
+        kind, channel, length = _HEADER.unpack_from(partial)
+        self._check(length)
+        need  = HEADER_SIZE + length - len(partial)
+        take  = min(need, len(view) - used)
+        partial += view[used:used + take]
+        used  += take
+        if take == need:
+            # A fresh buffer, so the finished payload's view stays valid.
+            self._partial = bytearray()
+            frames.append(Frame(kind, channel, memoryview(partial)[HEADER_SIZE:]))
+        return used
+
+    def _check(self, length: int):
+        if length > self._max_payload:
+            raise ProtocolError(f"frame of {length} bytes exceeds the limit")
@@ -0,0 +1,395 @@
+import os
+import sys
+import json
+import secrets
+import asyncio
+import argparse
+import resource
+from urllib.parse import urlsplit, parse_qs
+
+from websockets.asyncio.server import serve
+from websockets.exceptions     import ConnectionClosed
+
+from session.async_session import AsyncSession
+from iobridge.screen        import Screen, DeltaRenderer
+from iobridge.compress      import Compressor, methods
+from iobridge               import metrics
+
+_default_shell = os.environ.get("SHELL", "bash")
+
+
+class _Terminal:
+
+    # A session that outlives its connection. `position` is the offset just past
+    # the last chunk taken from the session; its scrollback holds what came
+    # before, for a client that reconnects with the offset it had reached.
+
+    def __init__(self, key: str, session: AsyncSession, screen: Screen | None):
+        self.key       = key
+        self.session   = session
+        self.screen    = screen
+        self.websocket = None
+        self.position  = 0
+        self.lock      = asyncio.Lock()
+        self.expiry: asyncio.TimerHandle | None = None
+        self.pump:   asyncio.Task | None = None
+        # Frame mode: while a full-screen app runs, the viewer gets rendered
+        # screen changes at a capped rate instead of the raw stream.
+        self.renderer: DeltaRenderer | None = None
+        self.delta     = False
+        self.frame:  asyncio.Task | None = None
+        self.framed_at = 0.0
+        self.compressor: Compressor | None = None
+
+
+class TerminalServer:
+
+    # One AsyncSession per terminal, all on a single event loop.
+    # Binary frames are keyboard input; text frames are JSON control messages:
+    #   {"type": "input",  "data": "ls\r"}
+    #   {"type": "resize", "cols": 100, "rows": 40}
+    # Output is sent as binary frames. The initial size can be given in the URL
+    # query (?cols=100&rows=40).
+    #
+    # On connect the server sends {"type": "session", "id": ..., "offset": n}:
+    # the output that follows starts at byte n. A dropped client leaves the
+    # shell running for `detach_ttl` seconds; reconnecting with
+    # ?session=<id>&offset=<bytes received> replays only the missing bytes.
+    # With `screen`, a viewer that gives no offset (or one the scrollback no
+    # longer holds) gets a redraw of the current screen instead; the session
+    # message then carries "snapshot": true and the next binary frame is that
+    # redraw, which does not count towards offsets. With scrollback=0 there is
+    # nothing to replay: a client resumes at the live output.
+    #
+    # With `fps`, a terminal running a full-screen app (htop, top, vim) is sent
+    # as frames of changed cells, at most `fps` a second, announced by
+    # {"type": "render", "mode": "delta"}. Frames do not count towards offsets.
+    # Leaving the alternate screen sends a redraw followed by
+    # {"type": "render", "mode": "raw", "offset": n}, and raw output resumes at n.
+    #
+    # With `compress`, a client may ask for ?compress=deflate (or zstd) and the
+    # session message confirms it with "compress": every binary frame is then
+    # one sync-flushed piece of a single iobridge.compress stream per
+    # connection. permessage-deflate is turned off so nothing is packed twice.
+
+    def __init__(
+        self,
+        shell:        str | None = None,
+        host:         str = "127.0.0.1",
+        port:         int = 8080,
+        max_sessions: int = 1024,
+        cols:         int = 80,
+        rows:         int = 24,
+        high_water:   int = 1 << 20,
+        spawner=None,
+        detach_ttl:   float = 60.0,
+        scrollback:   int = 1 << 20,
+        screen:       bool = False,
+        fps:          float = 0.0,
+        compress:     bool = False,
+        trace_latency: bool = False,
+    ):
+        self._shell        = shell or _default_shell
+        self._host         = host
+        self._port         = port
+        self._max_sessions = max_sessions
+        self._cols         = cols
+        self._rows         = rows
+        self._high_water   = high_water
+        self._spawner      = spawner
+        self._detach_ttl   = detach_ttl
+        self._scrollback   = scrollback
+        self._screen       = screen or fps > 0
+        self._fps          = fps
+        self._compress     = compress
+        self._trace        = trace_latency
+        self._terminals: dict[str, _Terminal] = {}
+
+    @property
+    def sessions(self) -> int:
+        return len(self._terminals)
+
+    @property
+    def detached(self) -> int:
+        return sum(1 for t in self._terminals.values() if t.websocket is None)
+
+    async def serve(self):
+        async with serve(
+            self.handle,
+            self._host,
+            self._port,
+            max_size=1 << 20,
+            compression=None if self._compress else "deflate",
+        ):
+            await asyncio.get_running_loop().create_future()
+
+    async def handle(self, websocket):
+        query    = parse_qs(urlsplit(websocket.request.path).query)
+        terminal = self._terminals.get(query.get("session", [""])[0])
+        offset   = 0
+        if terminal is None:
+            if len(self._terminals) >= self._max_sessions:
+                await websocket.close(1013, "terminal limit reached")
+                return
+            cols, rows = _initial_size(query, self._cols, self._rows)
+            terminal   = await self._open(cols, rows)
+        else:
+            offset = _query_int(query, "offset", -1)
+            if "cols" in query or "rows" in query:
+                await self._resize(terminal, *_initial_size(query, self._cols, self._rows))
+
+        method = query.get("compress", [""])[0]
+        method = method if self._compress and method in methods() else None
+        session = terminal.session
+        try:
+            await self._attach(terminal, websocket, offset, method)
+            async for message in websocket:
+                if isinstance(message, bytes):
+                    await session.send(message)
+                else:
+                    await self._control(terminal, message)
+        except ConnectionClosed:
+            pass
+        finally:
+            self._detach(terminal, websocket)
+
+    async def _open(self, cols: int, rows: int) -> _Terminal:
+        session = AsyncSession(
+            self._shell,
+            cols,
+            rows,
+            high_water=self._high_water,
+            spawner=self._spawner,
+            scrollback=self._scrollback,
+            trace_latency=self._trace,
+        )
+        await session.start()
+        screen   = Screen(cols, rows) if self._screen else None
+        terminal = _Terminal(secrets.token_urlsafe(16), session, screen)
+        if self._fps > 0:
+            terminal.renderer = DeltaRenderer(screen)
+        self._terminals[terminal.key] = terminal
+        terminal.pump = asyncio.create_task(self._pump(terminal))
+        return terminal
+
+    async def _attach(self, terminal: _Terminal, websocket, offset: int, method: str | None):
+        if terminal.websocket is not None:
+            # The old connection may be half-dead with the pump blocked sending
+            # to it; drop it so the new client takes over straight away.
+            terminal.websocket.transport.abort()
+        async with terminal.lock:
+            if terminal.expiry is not None:
+                terminal.expiry.cancel()
+                terminal.expiry = None
+            terminal.websocket  = websocket
+            terminal.compressor = Compressor(method) if method else None
+            # Everything before `position` has been taken from the session, so
+            # the backlog and the live chunks that follow neither overlap nor gap.
+            history = terminal.session.scrollback
+            backlog = None
+            if history is not None and history.start <= offset <= terminal.position:
+                backlog = history.read(offset, terminal.position)
+            message = {"type": "session", "id": terminal.key}
+            if terminal.screen is not None:
+                # A redraw costs the screen size; use it when replaying would cost more.
+                redraw = terminal.screen.snapshot()
+                if backlog is None or len(backlog) > len(redraw):
+                    backlog, offset = redraw, terminal.position
+                    message["snapshot"] = True
+            if backlog is None and history is None:
+                backlog, offset = b"", terminal.position
+            elif backlog is None:
+                offset  = max(history.start, min(offset, terminal.position))
+                backlog = history.read(offset, terminal.position)
+            message["offset"] = offset
+            if method:
+                message["compress"] = method
+            if terminal.delta:
+                message["render"] = "delta"
+                terminal.renderer.sync()
+            await websocket.send(json.dumps(message))
+            if backlog:
+                await websocket.send(terminal.compressor.compress(backlog) if method else backlog)
+
+    def _detach(self, terminal: _Terminal, websocket):
+        if terminal.websocket is not websocket:
+            return
+        terminal.websocket = None
+        if self._terminals.get(terminal.key) is not terminal:
+            return
+        if self._detach_ttl > 0:
+            terminal.expiry = asyncio.get_running_loop().call_later(
+                self._detach_ttl, lambda: asyncio.create_task(terminal.session.stop())
+            )
+        else:
+            asyncio.create_task(terminal.session.stop())
+
+    async def _pump(self, terminal: _Terminal):
+        session = terminal.session
+        # output() acknowledges each chunk only after the send completed, so a
+        # slow client stalls its own shell instead of growing memory. Detached,
+        # the output only goes to the scrollback.
+        async for chunk in session.output():
+            async with terminal.lock:
+                terminal.position += len(chunk)
+                if terminal.screen is not None:
+                    terminal.screen.feed(chunk)
+                if terminal.delta:
+                    if terminal.screen.full_screen:
+                        self._schedule_frame(terminal)
+                    else:
+                        await self._leave_frames(terminal)
+                    continue
+                await self._send(terminal, chunk)
+                if terminal.renderer is not None and terminal.screen.full_screen:
+                    # The viewer has everything up to here; frames start from it.
+                    terminal.delta = True
+                    terminal.renderer.sync()
+                    await self._send(terminal, json.dumps({"type": "render", "mode": "delta"}))
+        code = await session.wait_closed()
+        async with terminal.lock:
+            self._terminals.pop(terminal.key, None)
+            if terminal.expiry is not None:
+                terminal.expiry.cancel()
+            if terminal.frame is not None:
+                terminal.frame.cancel()
+            websocket, terminal.websocket = terminal.websocket, None
+        # Closing the PTY master hangs up the shell and its jobs.
+        await session.stop()
+        if session.scrollback is not None:
+            session.scrollback.close()
+        if websocket is not None:
+            try:
+                await websocket.close(1000, f"exit {code}")
+            except ConnectionClosed:
+                pass
+
+    async def _send(self, terminal: _Terminal, data: bytes | str):
+        if terminal.websocket is not None:
+            if terminal.compressor is not None and isinstance(data, bytes):
+                data = terminal.compressor.compress(data)
+            try:
+                await terminal.websocket.send(data)
+            except ConnectionClosed:
+                pass
+
+    def _schedule_frame(self, terminal: _Terminal):
+        if terminal.frame is None and terminal.websocket is not None:
+            delay = terminal.framed_at + 1 / self._fps - asyncio.get_running_loop().time()
+            terminal.frame = asyncio.create_task(self._send_frame(terminal, max(0.0, delay)))
+
+    async def _send_frame(self, terminal: _Terminal, delay: float):
+        await asyncio.sleep(delay)
+        async with terminal.lock:
+            terminal.frame     = None
+            terminal.framed_at = asyncio.get_running_loop().time()
+            if terminal.delta:
+                frame = terminal.renderer.render()
+                if frame:
+                    await self._send(terminal, frame)
+
+    async def _leave_frames(self, terminal: _Terminal):
+        terminal.delta = False
+        if terminal.frame is not None:
+            terminal.frame.cancel()
+            terminal.frame = None
+        await self._send(terminal, terminal.screen.snapshot())
+        await self._send(terminal, json.dumps({"type": "render", "mode": "raw", "offset": terminal.position}))
+
+    async def _control(self, terminal: _Terminal, message: str):
+        try:
+            msg = json.loads(message)
+        except ValueError:
+            return
+        if not isinstance(msg, dict):
+            return
+        kind = msg.get("type")
+        if kind == "input":
+            await terminal.session.send(str(msg.get("data", "")).encode())
+        elif kind == "resize":
+            try:
+                await self._resize(terminal, int(msg["cols"]), int(msg["rows"]))
+            except (KeyError, TypeError, ValueError):
+                pass
+
+    async def _resize(self, terminal: _Terminal, cols: int, rows: int):
+        try:
+            await terminal.session.resize(cols, rows)
+        except OSError:
+            return
+        if terminal.screen is not None:
+            terminal.screen.resize(cols, rows)
+
+def _initial_size(query: dict, cols: int, rows: int) -> tuple[int, int]:
+    cols = _query_int(query, "cols", cols)
+    rows = _query_int(query, "rows", rows)
+    return max(1, min(cols, 1000)), max(1, min(rows, 1000))
+
+
+def _query_int(query: dict, name: str, default: int) -> int:
+    try:
+        return int(query.get(name, [default])[0])
+    except ValueError:
+        return default
+
+
+def _raise_fd_limit():
+    # Each terminal holds a PTY master, a pidfd and a socket.
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != hard:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        except (ValueError, OSError):
+            pass
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Serve PTY terminals over WebSocket.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--shell", default=None)
+    parser.add_argument("--max-sessions", type=int, default=1024)
+    parser.add_argument("--spawner", choices=("fork", "posix_spawn", "forkserver"), default="fork")
+    parser.add_argument("--screen", action="store_true",
+                        help="emulate each screen so new viewers get a redraw instead of a replay")
+    parser.add_argument("--fps", type=float, default=0.0,
+                        help="send full-screen apps as frames of changed cells at this rate (implies --screen)")
+    parser.add_argument("--compress", action="store_true",
+                        help="let clients ask for deflate/zstd output streams (disables permessage-deflate)")
+    parser.add_argument("--detach-ttl", type=float, default=60.0,
+                        help="seconds a disconnected terminal keeps running (0 closes it at once)")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="serve Prometheus metrics at http://HOST:PORT/metrics")
+    parser.add_argument("--trace-latency", action="store_true",
+                        help="time keystroke-to-echo latency in every terminal (exported with the metrics)")
+    args = parser.parse_args(argv)
+
+    from process.spawner import ForkSpawner, PosixSpawner, ForkServer
+    spawner = {"fork": ForkSpawner, "posix_spawn": PosixSpawner, "forkserver": ForkServer}[args.spawner]()
+
+    if args.metrics_port:
+        metrics.serve(args.metrics_port, args.host)
+    _raise_fd_limit()
+    server = TerminalServer(
+        args.shell,
+        args.host,
+        args.port,
+        args.max_sessions,
+        spawner=spawner,
+        detach_ttl=args.detach_ttl,
+        screen=args.screen,
+        fps=args.fps,
+        compress=args.compress,
+        trace_latency=args.trace_latency,
+    )
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        print("Error: This is the POSIX build. Use the Windows version for Win32.")
+        sys.exit(1)
+    main()
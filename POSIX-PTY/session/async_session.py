@@ -0,0 +1,328 @@
+import os
+import time
+import asyncio
+from collections import deque
+from core.pty_console   import PTYConsole
+from process.process    import spawn, ChildProcess
+from iobridge.io_bridge import OutputReader, _fd_writev
+from session            import integration
+from iobridge.scrollback import Scrollback
+from iobridge.metrics    import SessionMetrics
+from session.command    import CommandResult, _Capture, sentinel_line
+from session.controls   import _Controls
+from session.recording  import Recorder
+
+_default_shell = os.environ.get("SHELL", "bash")
+
+
+class _QueueReader(OutputReader):
+
+    def __init__(
+        self,
+        master_fd:   int,
+        encoding:    str,
+        queue:       asyncio.Queue,
+        flush_delay: float,
+        flush_bytes: int,
+    ):
+        super().__init__(master_fd, encoding, flush_delay, flush_bytes)
+        self._queue = queue
+
+    def _emit(self, data: bytes):
+        if data:
+            self._queue.put_nowait(data)
+
+
+class AsyncSession(_Controls):
+
+    def __init__(
+        self,
+        shell:       str | None = None,
+        cols:        int = 120,
+        rows:        int = 30,
+        encoding:    str = "utf-8",
+        flush_delay: float = 0.008,
+        flush_bytes: int = 65536,
+        high_water:  int | None = None,
+        low_water:   int | None = None,
+        echo:        bool = True,
+        shell_integration: bool = False,
+        spawner=None,
+        scrollback:  int | None = None,
+        spill_dir:   str | None = None,
+        trace_latency: bool = False,
+    ):
+        self._shell    = shell or _default_shell
+        self._cols     = cols
+        self._rows     = rows
+        self._encoding = encoding
+        self._flush_delay = flush_delay
+        self._flush_bytes = flush_bytes
+        self._high_water  = high_water
+        self._low_water   = low_water
+        self._echo        = echo
+        self._integration = shell_integration
+        self._spawner     = spawner
+        self._scrollback  = Scrollback(scrollback, spill_dir) if scrollback else None
+        self._recorder: Recorder | None = None
+        self._trace       = trace_latency
+        self._mark_handlers:   list = []
+        self._output_handlers: list = []
+        self._capture: _Capture | None = None
+        self._run_lock: asyncio.Lock | None = None
+        self._pty:     PTYConsole   | None = None
+        self._process: ChildProcess | None = None
+        self._reader:  _QueueReader | None = None
+        self._loop:    asyncio.AbstractEventLoop | None = None
+        self._queue:   asyncio.Queue | None = None
+        self._closed:  asyncio.Future | None = None
+        self._drained: asyncio.Future | None = None
+        self._pending: deque[memoryview] = deque()
+        self._fast:    deque[memoryview] = deque()
+        self._pidfd:   int | None = None
+        self._timer:   asyncio.TimerHandle | None = None
+        self._reading  = False
+
+    async def start(self):
+        self._loop    = asyncio.get_running_loop()
+        command, env  = self._shell, None
+        if self._integration:
+            command, env = integration.prepare(command)
+        self._pty     = PTYConsole(self._cols, self._rows, self._echo)
+        launch        = self._spawner.spawn if self._spawner else spawn
+        began         = time.perf_counter()
+        self._process = launch(command, self._pty.slave_fd, env)
+        spawned       = time.perf_counter() - began
+        self._pty.release_slave()
+        self._queue   = asyncio.Queue()
+        self._closed  = self._loop.create_future()
+        self._reader  = _QueueReader(
+            self._pty.master_fd,
+            self._encoding,
+            self._queue,
+            self._flush_delay,
+            self._flush_bytes,
+        )
+        self._reader.metrics.spawn_seconds.observe(spawned)
+        self._reader.metrics.queues = (self._fast, self._pending)
+        if self._trace:
+            self._reader.metrics.trace_latency()
+
+        self._reader.set_watermarks(self._high_water, self._low_water)
+        self._reader.set_echo(self._echo)
+        self._reader.on_resume(self._on_resume)
+        self._reader.on_mark(self._on_run_mark)
+        self._reader.on_output(self._on_run_output)
+        self._reader.on_output(self._on_record_output)
+        if self._scrollback is not None:
+            self._reader.on_output(self._scrollback.append)
+        self._run_lock = asyncio.Lock()
+        if self._integration:
+            self._reader.track_marks()
+        for handler in self._mark_handlers:
+            self._reader.on_mark(handler)
+        for handler in self._output_handlers:
+            self._reader.on_output(handler)
+
+        os.set_blocking(self._pty.master_fd, False)
+        self._loop.add_reader(self._pty.master_fd, self._on_readable)
+        self._reading = True
+        self._reader.metrics.register()
+        self._watch_exit()
+
+    async def stop(self):
+        self._stop_io()
+        self.stop_recording()
+        if self._process:
+            self._process.terminate()
+        if self._pty:
+            self._pty.close()
+
+    async def output(self):
+        while True:
+            chunk = await self._queue.get()
+            if chunk is None:
+                # Leave the sentinel for any other iterator.
+                self._queue.put_nowait(None)
+                return
+            self._reader.ack(len(chunk))
+            yield chunk
+
+    async def send(self, data: bytes):
+        self._enqueue(self._pending, data)
+        if self._drained is not None:
+            await asyncio.shield(self._drained)
+
+    def write(self, data: bytes):
+        # send() without waiting for the PTY to take the data.
+        self._enqueue(self._pending, data)
+
+    def send_fast(self, data: bytes):
+        self._enqueue(self._fast, data)
+
+    async def run(self, command: str, timeout: float | None = None) -> CommandResult:
+        if self._reader is None:
+            raise RuntimeError("session is not started")
+        async with self._run_lock:
+            done    = self._loop.create_future()
+            capture = _Capture(lambda: done.done() or done.set_result(None))
+            self._reader.track_marks()
+            self._capture = capture
+            try:
+                await self.send_line(sentinel_line(command, capture.token, self._shell))
+                await asyncio.wait_for(done, timeout)
+            finally:
+                self._capture = None
+            return capture.result()
+
+    def _on_run_mark(self, mark):
+        if self._capture:
+            self._capture.on_mark(mark)
+
+    def _on_run_output(self, data: bytes):
+        if self._capture:
+            self._capture.on_output(data)
+
+    async def send_line(self, text: str):
+        if self._reader.echoes_input():
+            self._reader.suppress_next(text)
+        await self.send((text + "\n").encode(self._encoding))
+
+    def on_mark(self, handler):
+        # handler(ShellMark) runs on the event loop for every OSC 133 mark.
+        self._mark_handlers.append(handler)
+        if self._reader:
+            self._reader.on_mark(handler)
+
+    def on_output(self, handler):
+        # handler(bytes) runs on the event loop for every output chunk, OSC 133
+        # marks included, before it is queued for output().
+        self._output_handlers.append(handler)
+        if self._reader:
+            self._reader.on_output(handler)
+
+    async def resize(self, cols: int, rows: int):
+        self._cols, self._rows = cols, rows
+        if self._pty and self._pty.master_fd is not None:
+            self._pty.resize(cols, rows)
+        if self._recorder:
+            self._recorder.resize(cols, rows)
+
+    async def wait_closed(self) -> int:
+        return await asyncio.shield(self._closed)
+
+    @property
+    def scrollback(self) -> Scrollback | None:
+        return self._scrollback
+
+    @property
+    def metrics(self) -> SessionMetrics | None:
+        return self._reader.metrics if self._reader else None
+
+    @property
+    def pid(self) -> int | None:
+        return self._process.pid if self._process else None
+
+    def _on_readable(self):
+        if not self._reader.fill():
+            self._stop_io()
+            return
+        self._reader.flush_if_idle()
+        if self._reader.deadline is not None and self._timer is None:
+            self._schedule_flush()
+        self._check_paused()
+
+    def _check_paused(self):
+        # The output queue is above the high watermark: leave the data in the kernel.
+        if self._reader.paused and self._reading:
+            self._loop.remove_reader(self._pty.master_fd)
+
+    def _on_resume(self):
+        if self._reading:
+            self._loop.add_reader(self._pty.master_fd, self._on_readable)
+
+    def _schedule_flush(self):
+        delay = max(0.0, self._reader.deadline - time.monotonic())
+        self._timer = self._loop.call_later(delay, self._on_flush_timer)
+
+    def _on_flush_timer(self):
+        self._timer = None
+        deadline = self._reader.deadline
+        if deadline is None:
+            return
+        if deadline <= time.monotonic():
+            self._reader.flush()
+            self._check_paused()
+        else:
+            self._schedule_flush()
+
+    def _enqueue(self, lane: deque, data: bytes):
+        if not data or self._pty is None or self._pty.master_fd is None:
+            return
+        if self._reader.metrics.latency is not None:
+            self._reader.metrics.latency.sent()
+        lane.append(memoryview(data))
+        if self._recorder:
+            self._recorder.input(bytes(data))
+        if self._drained is None:
+            self._drained = self._loop.create_future()
+            self._on_writable()
+
+    def _on_writable(self):
+        fd = self._pty.master_fd
+        while self._fast or self._pending:
+            if not _fd_writev(fd, self._fast or self._pending, self._reader.metrics):
+                self._loop.add_writer(fd, self._on_writable)
+                return
+        self._loop.remove_writer(fd)
+        self._finish_drain()
+
+    def _finish_drain(self):
+        drained, self._drained = self._drained, None
+        if drained is not None and not drained.done():
+            drained.set_result(None)
+
+    def _stop_io(self):
+        fd = self._pty.master_fd if self._pty else None
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._reading and fd is not None:
+            self._loop.remove_reader(fd)
+            self._loop.remove_writer(fd)
+            self._reading = False
+            self._reader.finish()
+            self._queue.put_nowait(None)
+        if self._capture:
+            self._capture.abort()
+        self._pending.clear()
+        self._fast.clear()
+        self._finish_drain()
+
+    def _watch_exit(self):
+        try:
+            self._pidfd = os.pidfd_open(self._process.pid)
+        except (AttributeError, OSError):
+            self._poll_exit()
+            return
+        self._loop.add_reader(self._pidfd, self._poll_exit)
+
+    def _poll_exit(self):
+        code = self._process.poll()
+        if code is None:
+            if self._pidfd is None:
+                self._loop.call_later(0.1, self._poll_exit)
+            return
+        if self._pidfd is not None:
+            self._loop.remove_reader(self._pidfd)
+            os.close(self._pidfd)
+            self._pidfd = None
+        if not self._closed.done():
+            self._closed.set_result(code)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *_):
+        await self.stop()
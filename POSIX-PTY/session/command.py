@@ -0,0 +1,67 @@
+import os
+import shlex
+import secrets
+import time
+from typing import NamedTuple
+from iobridge.marks import MARK_PREFIX, ShellMark, COMMAND_RUN, COMMAND_END
+
+
+class CommandResult(NamedTuple):
+    output:    bytes
+    exit_code: int
+    elapsed:   float
+
+    def text(self, encoding: str = "utf-8") -> str:
+        return self.output.decode(encoding, errors="replace")
+
+
+def sentinel_line(command: str, token: str, shell: str) -> str:
+    # The markers are printed by the shell itself, so the echoed line (which
+    # contains them only as escaped text) is never mistaken for them.
+    status = "$status" if os.path.basename(shlex.split(shell)[0]) == "fish" else "$?"
+    return (
+        f"printf '\\033]133;C;pypty={token}\\007'; eval {shlex.quote(command)}; "
+        f"printf '\\033]133;D;%d;pypty={token}\\007' {status}"
+    )
+
+
+class _Capture:
+
+    def __init__(self, on_done):
+        self.token    = secrets.token_hex(8)
+        self.started  = time.monotonic()
+        self.chunks: list[bytes] = []
+        self.exit_code: int | None = None
+        self.elapsed  = 0.0
+        self._running = False
+        self._on_done = on_done
+
+    def on_output(self, data: bytes):
+        if self._running:
+            self.chunks.append(data)
+
+    def on_mark(self, mark: ShellMark):
+        if mark.params.get("pypty") != self.token:
+            return
+        if mark.kind == COMMAND_RUN:
+            self._running = True
+        elif mark.kind == COMMAND_END and self._running:
+            self._running  = False
+            self.exit_code = mark.exit_code if mark.exit_code is not None else -1
+            self.elapsed   = time.monotonic() - self.started
+            self._on_done()
+
+    def abort(self):
+        if self.exit_code is None:
+            self._running  = False
+            self.exit_code = -1
+            self.elapsed   = time.monotonic() - self.started
+            self._on_done()
+
+    def result(self) -> CommandResult:
+        output = b"".join(self.chunks)
+        # Output is flushed at every mark, so it ends with the closing marker.
+        cut = output.rfind(MARK_PREFIX)
+        if cut != -1:
+            output = output[:cut]
+        return CommandResult(output, self.exit_code, self.elapsed)
@@ -0,0 +1,51 @@
+import os
+from core.pty_console  import PTYConsole
+from process.process   import ChildProcess
+from session.recording import Recorder
+
+
+class _Controls:
+
+    # Signals and recording, shared by Session and AsyncSession. Both are
+    # synchronous in either class, so one implementation serves the two.
+
+    _shell:    str
+    _encoding: str
+    _cols:     int
+    _rows:     int
+    _pty:      PTYConsole   | None
+    _process:  ChildProcess | None
+    _recorder: Recorder     | None
+
+    def send_signal(self, signum: int):
+        # Like a terminal's own ^C: the foreground job gets it, not only the shell.
+        if not self._pty or self._pty.master_fd is None:
+            return
+        try:
+            os.killpg(os.tcgetpgrp(self._pty.master_fd), signum)
+        except OSError:
+            if self._process:
+                try:
+                    os.kill(self._process.pid, signum)
+                except ProcessLookupError:
+                    pass
+
+    def record(self, path: str, index_interval: float = 10.0) -> Recorder:
+        # Streams output, input and resizes to an asciicast v2 file (plus a seek
+        # index at <path>.idx) until stop_recording() or stop().
+        self.stop_recording()
+        cols, rows = (self._pty.cols, self._pty.rows) if self._pty else (self._cols, self._rows)
+        self._recorder = Recorder(
+            path, cols, rows, index_interval, command=self._shell, encoding=self._encoding
+        )
+        return self._recorder
+
+    def stop_recording(self):
+        recorder, self._recorder = self._recorder, None
+        if recorder is not None:
+            recorder.close()
+
+    def _on_record_output(self, data: bytes):
+        recorder = self._recorder
+        if recorder:
+            recorder.output(data)
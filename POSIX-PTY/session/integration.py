@@ -0,0 +1,123 @@
+import os
+import shlex
+import atexit
+import shutil
+import tempfile
+
+# OSC 133 hooks. A = prompt start, B = prompt end (input starts),
+# C = command output starts, D;<status> = command finished.
+
+_BASH_RC = r"""
+if [ -n "$__PYPTY_RCFILE" ]; then
+    [ -f "$__PYPTY_RCFILE" ] && . "$__PYPTY_RCFILE"
+elif [ -z "$__PYPTY_NORC" ] && [ -f ~/.bashrc ]; then
+    . ~/.bashrc
+fi
+unset __PYPTY_RCFILE __PYPTY_NORC
+
+__pypty_precmd() {
+    local s=$?
+    [ -n "$__pypty_ran" ] && printf '\033]133;D;%s\007' "$s"
+    __pypty_ran=
+    return $s
+}
+__pypty_prompt() {
+    local s=$?
+    case "$PS1" in
+        *'133;B'*) ;;
+        *) PS1='\[\033]133;A\007\]'"$PS1"'\[\033]133;B\007\]' ;;
+    esac
+    return $s
+}
+# The subscript assignment flags a real command and expands to nothing.
+PS0='${__pypty_ran[__pypty_ran=1]}\033]133;C\007'"$PS0"
+PROMPT_COMMAND="__pypty_precmd;${PROMPT_COMMAND:+$PROMPT_COMMAND;}__pypty_prompt"
+"""
+
+_ZSH_ENV = r"""
+ZDOTDIR=${__PYPTY_ZDOTDIR:-$HOME}
+unset __PYPTY_ZDOTDIR
+[ -f "$ZDOTDIR/.zshenv" ] && . "$ZDOTDIR/.zshenv"
+if [[ -o interactive ]]; then
+    __pypty_precmd() {
+        local s=$?
+        [[ -n $__pypty_ran ]] && printf '\033]133;D;%s\007' $s
+        __pypty_ran=
+        # Wrap PS1 after every other hook has set it.
+        precmd_functions=(${precmd_functions:#__pypty_prompt} __pypty_prompt)
+    }
+    __pypty_prompt() {
+        [[ $PS1 == *'133;B'* ]] || PS1=$'%{\033]133;A\007%}'"$PS1"$'%{\033]133;B\007%}'
+    }
+    __pypty_preexec() {
+        __pypty_ran=1
+        printf '\033]133;C\007'
+    }
+    precmd_functions=(__pypty_precmd $precmd_functions)
+    preexec_functions+=(__pypty_preexec)
+fi
+"""
+
+_FISH_INIT = r"""
+function __pypty_preexec --on-event fish_preexec
+    printf '\e]133;C\a'
+end
+function __pypty_postexec --on-event fish_postexec
+    printf '\e]133;D;%s\a' $status
+end
+if functions -q fish_prompt
+    functions -c fish_prompt __pypty_user_prompt
+    function fish_prompt
+        printf '\e]133;A\a'
+        __pypty_user_prompt
+        printf '\e]133;B\a'
+    end
+end
+"""
+
+_dir: str | None = None
+
+
+def _script_dir() -> str:
+    global _dir
+    if _dir is None:
+        _dir = tempfile.mkdtemp(prefix="pypty-")
+        atexit.register(shutil.rmtree, _dir, True)
+        for name, body in (
+            ("bashrc", _BASH_RC),
+            (".zshenv", _ZSH_ENV),
+            ("init.fish", _FISH_INIT),
+        ):
+            with open(os.path.join(_dir, name), "w") as f:
+                f.write(body)
+    return _dir
+
+
+# Returns the shell command and extra environment that enable the marks;
+# shells without a hook are returned unchanged.
+def prepare(command: str) -> tuple[str, dict[str, str]]:
+    args = shlex.split(command)
+    if not args:
+        return command, {}
+    shell = os.path.basename(args[0])
+    env: dict[str, str] = {}
+
+    if shell == "bash":
+        if "--norc" in args:
+            args.remove("--norc")
+            env["__PYPTY_NORC"] = "1"
+        if "--rcfile" in args:
+            i = args.index("--rcfile")
+            env["__PYPTY_RCFILE"] = os.path.expanduser(args[i + 1])
+            del args[i:i + 2]
+        args[1:1] = ["--rcfile", os.path.join(_script_dir(), "bashrc")]
+    elif shell == "zsh":
+        env["__PYPTY_ZDOTDIR"] = os.environ.get("ZDOTDIR", os.path.expanduser("~"))
+        env["ZDOTDIR"] = _script_dir()
+    elif shell == "fish":
+        source = "source " + shlex.quote(os.path.join(_script_dir(), "init.fish"))
+        args[1:1] = ["--init-command", source]
+    else:
+        return command, {}
+
+    return shlex.join(args), env
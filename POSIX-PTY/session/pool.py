@@ -0,0 +1,220 @@
+import os
+import re
+import shlex
+import time
+import threading
+from collections import deque
+from iobridge.marks   import COMMAND_END
+from iobridge.reactor import Reactor
+from session.session  import Session
+
+
+class _Greeting:
+
+    # Parks a shell's output until someone checks it out, then forwards.
+
+    def __init__(self):
+        self._lock   = threading.Lock()
+        self._chunks: list[bytes] = []
+        self._target = None
+
+    def __call__(self, data: bytes):
+        with self._lock:
+            if self._target is None:
+                self._chunks.append(data)
+            else:
+                self._target(data)
+
+    def on_mark(self, mark):
+        # Output up to the end of a Session.run() belongs to the pool, not the user.
+        if mark.kind == COMMAND_END and "pypty" in mark.params:
+            with self._lock:
+                if self._target is None:
+                    self._chunks.clear()
+
+    def attach(self, target):
+        with self._lock:
+            for chunk in self._chunks:
+                target(chunk)
+            self._chunks.clear()
+            self._target = target
+
+
+class SessionPool:
+
+    def __init__(
+        self,
+        size:          int = 4,
+        shell:         str | None = None,
+        cols:          int = 120,
+        rows:          int = 30,
+        encoding:      str = "utf-8",
+        reactor:       Reactor | None = None,
+        spawn_rate:    float = 5.0,
+        ready_timeout: float = 5.0,
+        shell_integration: bool = False,
+        spawner=None,
+    ):
+        self._size     = size
+        self._shell    = shell
+        self._cols     = cols
+        self._rows     = rows
+        self._encoding = encoding
+        self._reactor  = reactor
+        self._interval = 1.0 / spawn_rate if spawn_rate > 0 else 0.0
+        self._ready_timeout = ready_timeout
+        self._integration   = shell_integration
+        self._spawner       = spawner
+
+        self._lock     = threading.Condition()
+        self._parked: deque[tuple[Session, _Greeting]] = deque()
+        self._stopping = False
+        self._thread: threading.Thread | None = None
+
+        self._hits    = 0
+        self._misses  = 0
+        self._spawned = 0
+        self._retired = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._refill, daemon=True, name="PTY-SessionPool"
+            )
+        self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            self._stopping = True
+            parked, self._parked = list(self._parked), deque()
+            self._lock.notify_all()
+        for session, _ in parked:
+            session.stop()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def acquire(
+        self,
+        on_output,
+        cwd:     str | None = None,
+        env:     dict[str, str] | None = None,
+        cols:    int | None = None,
+        rows:    int | None = None,
+        timeout: float = 10.0,
+    ) -> Session:
+        setup  = _setup_command(cwd, env)
+        parked = self._take() or self._spawn()
+        session, greeting = parked
+        try:
+            session.wait_ready(timeout=self._ready_timeout)
+            if cols or rows:
+                session.resize(cols or self._cols, rows or self._rows)
+            if setup:
+                seen = session.prompts
+                session.run(setup, timeout)
+                session.wait_ready(seen, timeout=timeout)
+        except BaseException:
+            # Half set up, possibly mid-command: nobody may get this shell.
+            self.release(session)
+            raise
+        greeting.attach(on_output)
+        return session
+
+    def release(self, session: Session):
+        # Used shells keep their history, cwd and jobs; never hand them out again.
+        session.stop()
+        with self._lock:
+            self._retired += 1
+
+    @property
+    def metrics(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits":    self._hits,
+                "misses":  self._misses,
+                "spawned": self._spawned,
+                "retired": self._retired,
+                "parked":  len(self._parked),
+            }
+
+    def _take(self) -> tuple[Session, _Greeting] | None:
+        with self._lock:
+            for parked in list(self._parked):
+                if parked[0].closed:
+                    self._parked.remove(parked)
+                    parked[0].stop()
+            # Prefer a shell already at its prompt, else the one that started first.
+            ready = [p for p in self._parked if p[0].prompts]
+            if ready:
+                self._hits += 1
+                parked = ready[0]
+            else:
+                self._misses += 1
+                parked = self._parked[0] if self._parked else None
+            if parked is not None:
+                self._parked.remove(parked)
+            self._lock.notify_all()
+            return parked
+
+    def _spawn(self) -> tuple[Session, _Greeting]:
+        greeting = _Greeting()
+        session  = Session(
+            self._shell,
+            self._cols,
+            self._rows,
+            self._encoding,
+            self._reactor,
+            shell_integration=self._integration,
+            spawner=self._spawner,
+        )
+        session.attach(greeting)
+        session.on_mark(greeting.on_mark)
+        session.start()
+        with self._lock:
+            self._spawned += 1
+        return session, greeting
+
+    def _refill(self):
+        last = 0.0
+        while True:
+            with self._lock:
+                while not self._stopping and len(self._parked) >= self._size:
+                    self._lock.wait()
+                if self._stopping:
+                    return
+            # Bounded spawn rate: a burst of checkouts must not fork-bomb the host.
+            delay = last + self._interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            last = time.monotonic()
+            parked = self._spawn()
+            with self._lock:
+                if self._stopping:
+                    parked[0].stop()
+                    return
+                self._parked.append(parked)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *_):
+        self.stop()
+
+
+_ENV_NAME = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+def _setup_command(cwd: str | None, env: dict[str, str] | None) -> str:
+    parts = []
+    if cwd:
+        parts.append("cd -- " + shlex.quote(os.path.expanduser(cwd)))
+    for key, value in (env or {}).items():
+        # The name goes into the command unquoted; only a shell name is safe.
+        if not _ENV_NAME.fullmatch(key):
+            raise ValueError(f"invalid environment variable name: {key!r}")
+        parts.append(f"export {key}={shlex.quote(value)}")
+    return " && ".join(parts)
@@ -0,0 +1,187 @@
+import os
+import json
+import time
+import mmap
+import codecs
+import struct
+import threading
+from collections import deque
+
+# asciicast v2: a JSON header line, then one [time, code, data] line per event
+# ("o" output, "i" input, "r" resize "COLSxROWS", "m" marker). Next to the cast
+# a sparse index (<path>.idx) holds fixed-size (time, byte offset) records, one
+# per `index_interval` seconds, so a reader can bisect it without parsing the
+# cast.
+
+_INDEX = struct.Struct(">dQ")
+
+
+class Recorder:
+
+    # The read path only stamps and queues the bytes; decoding, JSON and file
+    # I/O happen on a background writer thread.
+
+    def __init__(
+        self,
+        path:           str,
+        cols:           int,
+        rows:           int,
+        index_interval: float = 10.0,
+        flush_interval: float = 0.2,
+        title:          str | None = None,
+        command:        str | None = None,
+        encoding:       str = "utf-8",
+    ):
+        self.path            = path
+        self._index_interval = index_interval
+        self._flush_interval = flush_interval
+        self._queue: deque   = deque()
+        self._lock           = threading.Lock()
+        self._wake           = threading.Event()
+        self._closed         = False
+        self._decoders       = {
+            "o": codecs.getincrementaldecoder(encoding)(errors="replace"),
+            "i": codecs.getincrementaldecoder(encoding)(errors="replace"),
+        }
+        header = {
+            "version":   2,
+            "width":     cols,
+            "height":    rows,
+            "timestamp": int(time.time()),
+            "env":       {"SHELL": os.environ.get("SHELL", ""), "TERM": os.environ.get("TERM", "")},
+        }
+        if title:
+            header["title"] = title
+        if command:
+            header["command"] = command
+        self._file    = open(path, "wb")
+        self._index   = open(path + ".idx", "wb")
+        line          = json.dumps(header).encode() + b"\n"
+        self._file.write(line)
+        self._offset  = len(line)
+        self._next_index = 0.0
+        self._start   = time.monotonic()
+        self._thread  = threading.Thread(target=self._run, daemon=True, name="PTY-Recorder")
+        self._thread.start()
+
+    def output(self, data: bytes):
+        self._push("o", data)
+
+    def input(self, data: bytes):
+        self._push("i", data)
+
+    def resize(self, cols: int, rows: int):
+        self._push("r", f"{cols}x{rows}")
+
+    def marker(self, label: str = ""):
+        self._push("m", label)
+
+    def _push(self, code: str, data):
+        # Output arrives on the reader thread and input on the caller's. The
+        # stamp is taken under the same lock as the append, so the queue, and
+        # the cast, never goes back in time.
+        with self._lock:
+            self._queue.append((time.monotonic(), code, data))
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+        self._file.close()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self._flush_interval)
+            self._drain()
+        self._drain()
+        for code, decoder in self._decoders.items():
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                self._write(time.monotonic() - self._start, code, tail)
+        self._file.flush()
+        self._index.flush()
+
+    def _drain(self):
+        queue = self._queue
+        while queue:
+            stamp, code, data = queue.popleft()
+            if code in self._decoders:
+                data = self._decoders[code].decode(data)
+                if not data:
+                    continue
+            self._write(stamp - self._start, code, data)
+        self._file.flush()
+        self._index.flush()
+
+    def _write(self, elapsed: float, code: str, data: str):
+        if elapsed >= self._next_index:
+            self._index.write(_INDEX.pack(elapsed, self._offset))
+            self._next_index = elapsed + self._index_interval
+        line = json.dumps([round(elapsed, 6), code, data], ensure_ascii=False).encode() + b"\n"
+        self._file.write(line)
+        self._offset += len(line)
+
+
+class Cast:
+
+    # Reads a recording; events(start) seeks through the index in O(log n)
+    # and parses only from the nearest index point before `start`.
+
+    def __init__(self, path: str):
+        self.path  = path
+        self._file = open(path, "rb")
+        self.header = json.loads(self._file.readline())
+        self._body  = self._file.tell()
+        self._index: mmap.mmap | None = None
+        try:
+            with open(path + ".idx", "rb") as f:
+                if os.fstat(f.fileno()).st_size >= _INDEX.size:
+                    self._index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            pass
+
+    def offset_at(self, seconds: float) -> int:
+        # Byte offset of an event at or before `seconds`.
+        index = self._index
+        if index is None:
+            return self._body
+        lo, hi = 0, len(index) // _INDEX.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if _INDEX.unpack_from(index, mid * _INDEX.size)[0] <= seconds:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == 0:
+            return self._body
+        return _INDEX.unpack_from(index, (lo - 1) * _INDEX.size)[1]
+
+    def events(self, start: float = 0.0, end: float | None = None):
+        self._file.seek(self.offset_at(start))
+        for line in self._file:
+            stamp, code, data = json.loads(line)
+            if stamp < start:
+                continue
+            if end is not None and stamp > end:
+                return
+            yield stamp, code, data
+
+    def close(self):
+        if self._index is not None:
+            self._index.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
@@ -0,0 +1,608 @@
+import os
+import re
+import sys
+import json
+import mmap
+import time
+import struct
+import bisect
+import argparse
+import threading
+from array import array
+from collections import deque, defaultdict
+from typing import NamedTuple
+
+from iobridge.ansi  import strip_ansi
+from iobridge.marks import MARK_PREFIX, PROMPT_START, COMMAND_START, COMMAND_RUN, mark_end, parse_mark
+
+try:
+    from re import _parser as _sre
+except ImportError:
+    import sre_parse as _sre
+
+# Full-text index over terminal output, shared by any number of sessions.
+#
+# Each session gets a feed that strips escape sequences (as strip_ansi does),
+# cuts the output into lines and numbers them by command using the OSC 133
+# marks. Lines are appended to a tab-separated log straight away and every
+# `segment_lines` lines the log is sealed into an immutable segment:
+#
+#   <n>.lines   the line texts, one per line (plain text, greppable)
+#   <n>.idx     header, per-line arrays (time, byte offset, command, session,
+#               kind, text start) and a trigram table: sorted keys, posting
+#               starts and posting lists of block numbers
+#
+# Trigrams are taken from the ASCII-lowercased UTF-8 text of blocks of 64
+# lines. A query looks up the trigrams of its literal parts in every
+# segment, intersects the posting lists and runs the real match only on the
+# lines of the blocks left over. The arrays are in native byte order, so an
+# index is not portable between architectures.
+
+_HEADER = struct.Struct("=4sIIIIdd4x")
+_MAGIC  = b"PTI" + (b"l" if sys.byteorder == "little" else b"b")
+
+_CONTROL  = bytes(range(9)) + b"\x0b\x0c" + bytes(range(0x0e, 0x20)) + b"\x7f"
+_LINE_MAX = 4096
+_BLOCK    = 64
+
+_UNSAFE_NAME = str.maketrans("\t\n\r", "   ")
+
+# (byte within a native 32-bit word, offset in the text) so that the word
+# reads as a << 16 | b << 8 | c for the trigram abc.
+_GRAM_BYTES = ((2, 0), (1, 1), (0, 2)) if sys.byteorder == "little" else ((1, 0), (2, 1), (3, 2))
+
+COMMAND = 1
+OUTPUT  = 0
+
+
+class Hit(NamedTuple):
+    session: str
+    time:    float
+    offset:  int
+    command: int
+    kind:    int
+    text:    str
+
+
+class _Feed:
+
+    # Parses the output of one session into (session, time, offset, command,
+    # kind, text) lines. Offsets count raw output bytes from the first chunk,
+    # the same offsets as Session.offset and the scrollback. Runs on the
+    # index's writer thread.
+
+    def __init__(self, session: str):
+        self.session   = session
+        self._offset   = 0
+        self._tail     = b""
+        self._line: list[bytes] = []
+        self._length   = 0
+        self._start    = 0
+        self._time     = 0.0
+        self._command  = 0
+        self._typing   = False
+        self._kind     = OUTPUT
+
+    def parse(self, stamp: float, data: bytes, out: list):
+        if self._tail:
+            data, self._tail = self._tail + data, b""
+        base, pos, end = self._offset, 0, len(data)
+        # A mark cut off at the end is finished by the next chunk.
+        esc = data.rfind(b"\x1b", max(0, end - len(MARK_PREFIX)))
+        if esc != -1 and MARK_PREFIX.startswith(data[esc:]):
+            data, self._tail, end = data[:esc], data[esc:], esc
+        while pos < end:
+            mark = data.find(MARK_PREFIX, pos)
+            if mark == -1:
+                self._text(stamp, base, data[pos:] if pos else data, pos, out)
+                break
+            close = mark_end(data, mark, end)
+            if close == -1:
+                self._text(stamp, base, data[pos:mark], pos, out)
+                self._tail, end = data[mark:] + self._tail, mark
+                break
+            # The mark stays in the raw line; stripping removes it.
+            self._text(stamp, base, data[pos:close], pos, out)
+            self._mark(parse_mark(data[mark:close]), out)
+            pos = close
+        self._offset = base + end
+
+    def finish(self, out: list):
+        self._end_line(out)
+
+    def _mark(self, mark, out: list):
+        if mark.kind == PROMPT_START:
+            self._end_line(out)
+        elif mark.kind == COMMAND_START:
+            self._command += 1
+            self._typing   = True
+            self._kind     = COMMAND
+        elif mark.kind == COMMAND_RUN:
+            # Shells that only report C still number their commands.
+            if not self._typing:
+                self._command += 1
+            self._typing   = False
+            self._end_line(out)
+
+    def _text(self, stamp: float, base: int, data: bytes, pos: int, out: list):
+        if not data:
+            return
+        if not self._line:
+            self._start, self._time = base + pos, stamp
+        lines = data.split(b"\n")
+        last  = lines.pop()
+        if lines:
+            self._line.append(lines[0])
+            self._end_line(out)
+            start = base + pos + len(lines[0]) + 1
+            for raw in lines[1:]:
+                self._add(raw, start, stamp, out)
+                start += len(raw) + 1
+            self._start, self._time = start, stamp
+        if last:
+            self._line.append(last)
+            self._length += len(last)
+            if self._length >= _LINE_MAX:
+                self._end_line(out)
+
+    def _add(self, raw: bytes, start: int, stamp: float, out: list):
+        if b"\x1b" in raw:
+            raw = strip_ansi(raw)
+        raw = raw.rstrip(b"\r")
+        # A carriage return redraws the line: keep what ends up visible.
+        raw = raw[raw.rfind(b"\r") + 1:].translate(None, _CONTROL)
+        if raw.strip():
+            out.append((self.session, stamp, start, self._command, self._kind, raw.decode("utf-8", errors="replace")))
+
+    def _end_line(self, out: list):
+        if self._line:
+            self._add(b"".join(self._line), self._start, self._time, out)
+        self._line   = []
+        self._length = 0
+        self._kind   = COMMAND if self._typing else OUTPUT
+
+
+class _Segment:
+
+    def __init__(self, number: int, directory: str):
+        self.number = number
+        base        = os.path.join(directory, f"{number:08d}")
+        with open(base + ".idx", "rb") as f:
+            self._idx = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with open(base + ".lines", "rb") as f:
+            self._text = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) \
+                if os.fstat(f.fileno()).st_size else b""
+        magic, count, grams, postings, names, self.first, self.last = _HEADER.unpack_from(self._idx)
+        if magic != _MAGIC:
+            raise ValueError(f"{base}.idx: not an index segment for this byte order")
+        pos           = _HEADER.size
+        self.sessions = json.loads(bytes(self._idx[pos:pos + names]))
+        pos          += (names + 7) & ~7
+        self._views: list[memoryview] = []
+        self.count    = count
+        self.times,       pos = self._array("d", pos, count)
+        self.offsets,     pos = self._array("Q", pos, count)
+        self.starts,      pos = self._array("Q", pos, count + 1)
+        self.commands,    pos = self._array("I", pos, count)
+        self.keys,        pos = self._array("I", pos, grams)
+        self.postings_at, pos = self._array("I", pos, grams + 1)
+        self.postings,    pos = self._array("I", pos, postings)
+        self.owners,      pos = self._array("H", pos, count)
+        self.kinds,       pos = self._array("B", pos, count)
+
+    def _array(self, code: str, pos: int, count: int) -> tuple[memoryview, int]:
+        size = array(code).itemsize
+        view = memoryview(self._idx)[pos:pos + count * size].cast(code)
+        self._views.append(view)
+        return view, pos + count * size
+
+    def lookup(self, key: int) -> memoryview | None:
+        i = bisect.bisect_left(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            return None
+        return self.postings[self.postings_at[i]:self.postings_at[i + 1]]
+
+    def line(self, i: int) -> str:
+        return self._text[self.starts[i]:self.starts[i + 1] - 1].decode("utf-8", errors="replace")
+
+    def close(self):
+        for view in self._views:
+            view.release()
+        self._idx.close()
+        if self._text:
+            self._text.close()
+
+
+class SearchIndex:
+
+    # feed(name) (or watch(session, name)) adds a session; output handlers only
+    # stamp and queue the chunk, and a background thread does the parsing,
+    # logging and indexing. Lines not yet sealed are indexed in memory the
+    # same way, block by block.
+
+    def __init__(self, directory: str, segment_lines: int = 65536, flush_interval: float = 1.0):
+        os.makedirs(directory, exist_ok=True)
+        self.directory       = directory
+        self._segment_lines  = max(_BLOCK, segment_lines - segment_lines % _BLOCK)
+        self._flush_interval = flush_interval
+        self._lock           = threading.Lock()
+        self._queue: deque   = deque()
+        self._wake           = threading.Event()
+        self._closed         = False
+        self._feeds: list[_Feed] = []
+        self._segments: list[_Segment] = []
+        self._lines: list[tuple] = []
+        self._postings: defaultdict[int, array] = defaultdict(_postings)
+        self._indexed  = 0
+        numbers = sorted(int(name[:-4]) for name in os.listdir(directory) if name.endswith(".idx"))
+        for number in numbers:
+            self._segments.append(_Segment(number, directory))
+        self._number = numbers[-1] + 1 if numbers else 0
+        self._replay()
+        self._log    = open(self._log_path(self._number), "a", encoding="utf-8")
+        self._thread = threading.Thread(target=self._run, daemon=True, name="PTY-Indexer")
+        self._thread.start()
+
+    def feed(self, session: str):
+        # Returns handler(bytes, stamp=None) for Session.on_output; `stamp`
+        # (epoch seconds) defaults to now.
+        feed = _Feed(session.translate(_UNSAFE_NAME))
+        self._feeds.append(feed)
+        queue = self._queue
+
+        def output(data: bytes, stamp: float | None = None):
+            queue.append((feed, time.time() if stamp is None else stamp, data))
+
+        return output
+
+    def watch(self, session, name: str):
+        session.on_output(self.feed(name))
+
+    def add_cast(self, path: str, session: str | None = None):
+        # Indexes an asciicast recording (session.recording) after the fact.
+        from session.recording import Cast
+        with Cast(path) as cast:
+            output  = self.feed(session or os.path.basename(path))
+            started = cast.header.get("timestamp", 0)
+            for stamp, code, data in cast.events():
+                if code == "o":
+                    output(data.encode("utf-8"), started + stamp)
+        self.flush()
+
+    def flush(self):
+        # Blocks until everything queued so far is searchable and logged.
+        if self._closed:
+            return
+        done = threading.Event()
+        self._queue.append((None, 0.0, done))
+        self._wake.set()
+        done.wait()
+
+    def search(
+        self,
+        pattern:     str,
+        regex:       bool = False,
+        ignore_case: bool = True,
+        session:     str | None = None,
+        since:       float | None = None,
+        until:       float | None = None,
+        kind:        int | None = None,
+        limit:       int = 100,
+    ) -> list[Hit]:
+        # Oldest first. A plain pattern matches as a substring; a regex is
+        # prefiltered with the literal strings every match must contain.
+        matcher = re.compile(pattern if regex else re.escape(pattern), re.IGNORECASE if ignore_case else 0)
+        grams   = set()
+        for literal in (_literals(pattern) if regex else [pattern]):
+            grams.update(_trigrams(literal, ignore_case or regex))
+        hits: list[Hit] = []
+        with self._lock:
+            segments = list(self._segments)
+            lines    = self._lines[:]
+            blocks   = _blocks(self._postings.get, grams)
+            indexed  = self._indexed
+
+        for segment in segments:
+            if since is not None and segment.last < since or until is not None and segment.first > until:
+                continue
+            if session is not None and session not in segment.sessions:
+                continue
+            owner = segment.sessions.index(session) if session is not None else None
+            found = _blocks(segment.lookup, grams)
+            for i in _lines(found, segment.count):
+                if owner is not None and segment.owners[i] != owner or kind is not None and segment.kinds[i] != kind:
+                    continue
+                stamp = segment.times[i]
+                if since is not None and stamp < since or until is not None and stamp > until:
+                    continue
+                text = segment.line(i)
+                if matcher.search(text):
+                    hits.append(Hit(segment.sessions[segment.owners[i]], stamp, segment.offsets[i],
+                                    segment.commands[i], segment.kinds[i], text))
+                    if len(hits) >= limit:
+                        return hits
+
+        unindexed = range(indexed, len(lines))
+        for i in (*_lines(blocks, indexed), *unindexed):
+            hit = Hit(*lines[i])
+            if session is not None and hit.session != session or kind is not None and hit.kind != kind:
+                continue
+            if since is not None and hit.time < since or until is not None and hit.time > until:
+                continue
+            if matcher.search(hit.text):
+                hits.append(hit)
+                if len(hits) >= limit:
+                    break
+        return hits
+
+    @property
+    def lines(self) -> int:
+        with self._lock:
+            return sum(segment.count for segment in self._segments) + len(self._lines)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+        self._log.close()
+        for segment in self._segments:
+            segment.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def _log_path(self, number: int) -> str:
+        return os.path.join(self.directory, f"{number:08d}.log")
+
+    def _replay(self):
+        # Lines logged after the last sealed segment; a log left next to a
+        # segment with its number was sealed already.
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".log"):
+                continue
+            path = os.path.join(self.directory, name)
+            if int(name[:-4]) < self._number:
+                os.unlink(path)
+                continue
+            with open(path, encoding="utf-8") as f:
+                for record in f:
+                    fields = record.rstrip("\n").split("\t", 5)
+                    if len(fields) < 6 or not record.endswith("\n"):
+                        break
+                    session, stamp, offset, command, kind, text = fields
+                    self._lines.append((session, float(stamp), int(offset), int(command), int(kind), text))
+        self._index_blocks()
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self._flush_interval)
+            self._wake.clear()
+            self._drain()
+        self._drain()
+        out: list = []
+        for feed in self._feeds:
+            feed.finish(out)
+        self._append(out)
+        self._log.flush()
+
+    def _drain(self):
+        queue = self._queue
+        out: list = []
+        while queue:
+            feed, stamp, data = queue.popleft()
+            if feed is None:
+                self._append(out)
+                out = []
+                self._log.flush()
+                data.set()
+                continue
+            feed.parse(stamp, data, out)
+            if len(out) >= _BLOCK * 16:
+                self._append(out)
+                out = []
+        self._append(out)
+        self._log.flush()
+
+    def _append(self, out: list):
+        if not out:
+            return
+        self._log.write("".join(
+            f"{session}\t{stamp!r}\t{offset}\t{command}\t{kind}\t{text}\n"
+            for session, stamp, offset, command, kind, text in out
+        ))
+        with self._lock:
+            self._lines.extend(out)
+        self._index_blocks()
+        if len(self._lines) >= self._segment_lines:
+            self._seal()
+
+    def _index_blocks(self, partial: bool = False):
+        # Runs on the writer thread, the only one that changes the postings.
+        lines, postings = self._lines, self._postings
+        while len(lines) - self._indexed >= (1 if partial else _BLOCK):
+            start = self._indexed
+            block = lines[start:start + _BLOCK]
+            grams = _block_grams(block)
+            number = start // _BLOCK
+            with self._lock:
+                for gram in grams:
+                    postings[gram].append(number)
+                self._indexed = start + len(block)
+
+    def _seal(self):
+        self._index_blocks(partial=True)
+        number = self._number
+        _write_segment(os.path.join(self.directory, f"{number:08d}"), self._lines, self._postings)
+        segment = _Segment(number, self.directory)
+        self._log.close()
+        self._log = open(self._log_path(number + 1), "a", encoding="utf-8")
+        with self._lock:
+            self._segments.append(segment)
+            self._lines    = []
+            self._postings = defaultdict(_postings)
+            self._indexed  = 0
+            self._number   = number + 1
+        os.unlink(self._log_path(number))
+
+
+def _block_grams(block: list[tuple]) -> set[int]:
+    # Lays the trigrams out as 32-bit words so array() and set() do the work.
+    # Trigrams across the newlines are extra keys no query asks for.
+    low  = "\n".join(line[5] for line in block).encode("utf-8").lower()
+    size = len(low) - 2
+    if size <= 0:
+        return set()
+    words = bytearray(4 * size)
+    for byte, shift in _GRAM_BYTES:
+        words[byte::4] = low[shift:shift + size]
+    return set(array("I", words))
+
+
+def _blocks(lookup, grams: set[int]) -> list[int] | None:
+    # Blocks holding every gram, or None when there are no grams to go by.
+    if not grams:
+        return None
+    lists = []
+    for key in grams:
+        found = lookup(key)
+        if found is None:
+            return []
+        lists.append(found)
+    lists.sort(key=len)
+    blocks = set(lists[0])
+    for found in lists[1:]:
+        if len(blocks) * 16 < len(found):
+            blocks = {i for i in blocks if _contains(found, i)}
+        else:
+            blocks.intersection_update(found)
+        if not blocks:
+            break
+    return sorted(blocks)
+
+
+def _lines(blocks: list[int] | None, count: int):
+    if blocks is None:
+        return range(count)
+    return (i for block in blocks for i in range(block * _BLOCK, min(block * _BLOCK + _BLOCK, count)))
+
+
+def _postings() -> array:
+    return array("I")
+
+
+def _write_segment(base: str, lines: list[tuple], postings: dict[int, array]):
+    sessions: dict[str, int] = {}
+    times, offsets, starts = array("d"), array("Q"), array("Q", [0])
+    commands, owners, kinds = array("I"), array("H"), array("B")
+    texts = []
+    for session, stamp, offset, command, kind, text in lines:
+        raw = text.encode("utf-8")
+        texts.append(raw)
+        starts.append(starts[-1] + len(raw) + 1)
+        times.append(stamp)
+        offsets.append(offset)
+        commands.append(command)
+        owners.append(sessions.setdefault(session, len(sessions)))
+        kinds.append(kind)
+
+    keys   = sorted(postings)
+    table  = array("I", keys)
+    at     = array("I", [0])
+    merged = array("I")
+    for key in keys:
+        merged.extend(postings[key])
+        at.append(len(merged))
+    names = json.dumps(list(sessions)).encode()
+    with open(base + ".lines.tmp", "wb") as f:
+        f.write(b"\n".join(texts) + b"\n" if texts else b"")
+    with open(base + ".idx.tmp", "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, len(lines), len(table), len(merged), len(names),
+                             min(times, default=0.0), max(times, default=0.0)))
+        f.write(names.ljust((len(names) + 7) & ~7, b"\0"))
+        for part in (times, offsets, starts, commands, table, at, merged, owners, kinds):
+            f.write(part.tobytes())
+    os.replace(base + ".lines.tmp", base + ".lines")
+    os.replace(base + ".idx.tmp", base + ".idx")
+
+
+def _contains(found: memoryview, line: int) -> bool:
+    i = bisect.bisect_left(found, line)
+    return i < len(found) and found[i] == line
+
+
+def _trigrams(literal: str, ignore_case: bool) -> set[int]:
+    # Case folding is ASCII-only in the index, so ignoring case only
+    # trusts the ASCII runs of a literal.
+    grams = set()
+    for part in (re.split(r"[^\x00-\x7f]+", literal) if ignore_case else [literal]):
+        low = part.encode("utf-8").lower()
+        grams.update(a << 16 | b << 8 | c for a, b, c in zip(low, low[1:], low[2:]))
+    return grams
+
+
+def _literals(pattern: str) -> list[str]:
+    # Literal runs that every match of the regex contains: top-level and
+    # grouped sequences and the bodies of repeats taken at least once.
+    try:
+        parsed = _sre.parse(pattern)
+    except re.error:
+        return []
+    return _required(parsed)
+
+
+def _required(items) -> list[str]:
+    found, run = [], []
+    for op, av in items:
+        if op is _sre.LITERAL:
+            run.append(chr(av))
+            continue
+        if run:
+            found.append("".join(run))
+            run = []
+        if op is _sre.SUBPATTERN:
+            found.extend(_required(av[-1]))
+        elif op in (_sre.MAX_REPEAT, _sre.MIN_REPEAT) and av[0] >= 1:
+            found.extend(_required(av[2]))
+    if run:
+        found.append("".join(run))
+    return found
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Search or extend a terminal output index.")
+    parser.add_argument("directory")
+    parser.add_argument("pattern", nargs="?")
+    parser.add_argument("--regex", action="store_true")
+    parser.add_argument("--case", action="store_true", help="match case")
+    parser.add_argument("--session", default=None)
+    parser.add_argument("--commands", action="store_true", help="only command lines")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--add", nargs="+", metavar="CAST", default=[], help="index asciicast recordings")
+    args = parser.parse_args(argv)
+
+    with SearchIndex(args.directory) as index:
+        for path in args.add:
+            index.add_cast(path)
+        if args.pattern is None:
+            print(f"{index.lines} lines indexed")
+            return
+        began = time.perf_counter()
+        hits  = index.search(args.pattern, args.regex, not args.case, args.session,
+                             kind=COMMAND if args.commands else None, limit=args.limit)
+        spent = time.perf_counter() - began
+        for hit in hits:
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(hit.time))
+            print(f"{hit.session}\t{stamp}\t{hit.offset}\t#{hit.command}\t{hit.text}")
+        print(f"{len(hits)} hits in {spent * 1e3:.1f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        print("Error: This is the POSIX build. Use the Windows version for Win32.")
+        sys.exit(1)
+    main()
@@ -1,36 +1,122 @@
 import os
 import time
+import threading
 from core.pty_console   import PTYConsole
 from process.process    import spawn, ChildProcess
-from iobridge.io_bridge import IOBridge
+from iobridge.io_bridge import IOBridge, _write_stdout
+from iobridge.reactor   import Reactor, ReactorBridge
+from iobridge.scrollback import Scrollback
+from iobridge.screen     import Screen
+from iobridge.metrics    import SessionMetrics
+from session            import integration
+from session.command    import CommandResult, _Capture, sentinel_line
+from session.controls   import _Controls
+from session.recording  import Recorder
 
 _default_shell = os.environ.get("SHELL", "bash")
 
 
-class Session:
+class Session(_Controls):
 
     def __init__(
         self,
-        shell:    str | None = None,
-        cols:     int = 120,
-        rows:     int = 30,
-        encoding: str = "utf-8",
+        shell:       str | None = None,
+        cols:        int = 120,
+        rows:        int = 30,
+        encoding:    str = "utf-8",
+        reactor:     Reactor | None = None,
+        flush_delay: float = 0.008,
+        flush_bytes: int = 65536,
+        high_water:  int | None = None,
+        low_water:   int | None = None,
+        echo:        bool = True,
+        shell_integration: bool = False,
+        spawner=None,
+        scrollback:  int | None = None,
+        spill_dir:   str | None = None,
+        screen:      bool = False,
+        trace_latency: bool = False,
     ):
         self._shell    = shell or _default_shell
         self._cols     = cols
         self._rows     = rows
         self._encoding = encoding
-        self._pty:     PTYConsole  | None = None
+        self._reactor  = reactor
+        self._flush_delay = flush_delay
+        self._flush_bytes = flush_bytes
+        self._high_water  = high_water
+        self._low_water   = low_water
+        self._echo        = echo
+        self._integration = shell_integration
+        self._spawner     = spawner
+        self._scrollback  = Scrollback(scrollback, spill_dir) if scrollback else None
+        self._screen      = Screen(cols, rows, encoding) if screen else None
+        self._mark_handlers:  list = []
+        self._output_handlers: list = []
+        self._close_handlers: list = []
+        self._sink = None
+        self._sink_lock = threading.RLock()
+        self._delivered = 0
+        self._recorder: Recorder | None = None
+        self._trace    = trace_latency
+        self._capture: _Capture | None = None
+        self._run_lock = threading.Lock()
+        self._pty:     PTYConsole   | None = None
         self._process: ChildProcess | None = None
-        self._bridge:  IOBridge    | None = None
+        self._bridge:  IOBridge | ReactorBridge | None = None
 
     def start(self):
-        self._pty     = PTYConsole(self._cols, self._rows)
-        self._process = spawn(self._shell, self._pty.slave_fd)
-        self._bridge  = IOBridge(self._pty.master_fd, self._encoding)
+        command, env  = self._shell, None
+        if self._integration:
+            command, env = integration.prepare(command)
+        self._pty     = PTYConsole(self._cols, self._rows, self._echo)
+        launch        = self._spawner.spawn if self._spawner else spawn
+        began         = time.perf_counter()
+        self._process = launch(command, self._pty.slave_fd, env)
+        spawned       = time.perf_counter() - began
+        self._pty.release_slave()
+        if self._reactor is not None:
+            self._bridge = ReactorBridge(
+                self._pty.master_fd,
+                self._encoding,
+                self._reactor,
+                self._flush_delay,
+                self._flush_bytes,
+            )
+        else:
+            self._bridge = IOBridge(
+                self._pty.master_fd,
+                self._encoding,
+                self._flush_delay,
+                self._flush_bytes,
+            )
+        self._bridge.metrics.spawn_seconds.observe(spawned)
+        if self._trace:
+            self._bridge.metrics.trace_latency()
+        if self._high_water:
+            self._bridge.set_watermarks(self._high_water, self._low_water)
+        self._bridge.set_echo(self._echo)
+        if self._integration:
+            self._bridge.track_marks()
+        self._bridge.on_mark(self._on_run_mark)
+        self._bridge.on_output(self._on_run_output)
+        self._bridge.on_output(self._on_record_output)
+        if self._scrollback is not None:
+            self._bridge.on_output(self._scrollback.append)
+        for handler in self._mark_handlers:
+            self._bridge.on_mark(handler)
+        for handler in self._output_handlers:
+            self._bridge.on_output(handler)
+        for handler in self._close_handlers:
+            self._bridge.on_close(handler)
+        if self._sink is not None or self._scrollback is not None or self._screen is not None:
+            self._bridge.set_sink(self._deliver)
         self._bridge.start()
 
     def stop(self):
+        if self._capture:
+            self._capture.abort()
+        self.stop_recording()
         if self._bridge:
             self._bridge.stop()
         if self._process:
@@ -43,20 +129,175 @@ class Session:
 
     def send_command(self, command: str, delay: float = 0.05):
         if self._bridge:
-            self._bridge.send_line(command, self._encoding)
+            self._send_line(command)
             time.sleep(delay)
 
+    def run(self, command: str, timeout: float | None = None) -> CommandResult:
+        if not self._bridge:
+            raise RuntimeError("session is not started")
+        with self._run_lock:
+            done    = threading.Event()
+            capture = _Capture(done.set)
+            self._bridge.track_marks()
+            self._capture = capture
+            try:
+                self._send_line(sentinel_line(command, capture.token, self._shell))
+                if not done.wait(timeout):
+                    raise TimeoutError(f"{command!r} did not finish in {timeout} s")
+            finally:
+                self._capture = None
+            return capture.result()
+
+    def _on_run_mark(self, mark):
+        capture = self._capture
+        if capture:
+            capture.on_mark(mark)
+
+    def _deliver(self, data: bytes):
+        with self._sink_lock:
+            self._delivered += len(data)
+            if self._screen is not None:
+                self._screen.feed(data)
+            if self._sink is not None:
+                self._sink(data)
+            else:
+                _write_stdout(data)
+
+    def _on_run_output(self, data: bytes):
+        capture = self._capture
+        if capture:
+            capture.on_output(data)
+
     def send_raw(self, data: bytes):
         if self._bridge:
+            self._sent()
             self._bridge.send(data)
+            if self._recorder:
+                self._recorder.input(data)
 
     def send_fast(self, data: bytes):
         if self._bridge:
+            self._sent()
             self._bridge.send_fast(data)
+            if self._recorder:
+                self._recorder.input(data)
+
+    def _sent(self):
+        # Opens a keystroke-to-echo probe; before the send, so the writer
+        # cannot stamp a probe that does not exist yet.
+        latency = self._bridge.metrics.latency
+        if latency is not None:
+            latency.sent()
+
+    def _send_line(self, text: str):
+        self._bridge.send_line(text, self._encoding)
+        if self._recorder:
+            self._recorder.input((text + "\n").encode(self._encoding))
+
+    def ack(self, nbytes: int):
+        if self._bridge:
+            self._bridge.ack(nbytes)
 
     def resize(self, cols: int, rows: int):
         if self._pty:
             self._pty.resize(cols, rows)
+        if self._recorder:
+            self._recorder.resize(cols, rows)
+        if self._screen is not None:
+            with self._sink_lock:
+                self._screen.resize(cols, rows)
+
+    def on_mark(self, handler):
+        # handler(ShellMark) runs on the reader thread for every OSC 133 mark.
+        self._mark_handlers.append(handler)
+        if self._bridge:
+            self._bridge.on_mark(handler)
+
+    def on_output(self, handler):
+        # handler(bytes) runs on the reader thread for every output chunk, OSC
+        # 133 marks included, before it reaches the sink.
+        self._output_handlers.append(handler)
+        if self._bridge:
+            self._bridge.on_output(handler)
+
+    def attach(self, handler, since: int | None = None, redraw: bool = False):
+        # handler(bytes) receives the output instead of stdout. With a scrollback,
+        # `since` (an offset from a previous attach) replays what was missed first;
+        # with a screen, `redraw` sends a snapshot of the current screen instead.
+        if since is not None and self._scrollback is None and not (redraw and self._screen):
+            raise RuntimeError("attach(since=...) needs a scrollback")
+        with self._sink_lock:
+            if redraw and self._screen is not None:
+                handler(self._screen.snapshot())
+            elif since is not None:
+                backlog = self._scrollback.read(since, self._delivered)
+                if backlog:
+                    handler(backlog)
+            self._sink = handler
+        if self._bridge:
+            self._bridge.set_sink(self._deliver)
+
+    def detach(self) -> int:
+        # The shell keeps running and its output keeps going to the scrollback,
+        # but nowhere else. Returns the offset to pass to attach(since=...).
+        # With neither a scrollback nor a screen to redraw from, that output
+        # would be lost without a trace, so detaching is refused.
+        if self._scrollback is None and self._screen is None:
+            raise RuntimeError("detach() needs a scrollback or a screen")
+        with self._sink_lock:
+            self._sink = _discard
+            offset = self._delivered
+        if self._bridge:
+            self._bridge.set_sink(self._deliver)
+        return offset
+
+    @property
+    def offset(self) -> int:
+        # Bytes delivered so far; the scrollback uses the same offsets.
+        return self._delivered
+
+    def on_close(self, handler):
+        # handler() runs once when the PTY reaches EOF or the session stops.
+        self._close_handlers.append(handler)
+        if self._bridge:
+            self._bridge.on_close(handler)
+
+    @property
+    def prompts(self) -> int:
+        return self._bridge.prompts if self._bridge else 0
+
+    @property
+    def closed(self) -> bool:
+        return self._bridge.closed if self._bridge else True
+
+    def wait_ready(
+        self,
+        since:   int = 0,
+        idle:    float | None = None,
+        timeout: float | None = None,
+    ) -> str:
+        if not self._bridge:
+            return "exit"
+        return self._bridge.wait_ready(since, idle, timeout)
+
+    def set_echo(self, enabled: bool):
+        self._echo = enabled
+        if self._pty:
+            self._pty.set_echo(enabled)
+        if self._bridge:
+            self._bridge.set_echo(enabled)
+
+    @property
+    def scrollback(self) -> Scrollback | None:
+        return self._scrollback
+
+    @property
+    def screen(self) -> Screen | None:
+        return self._screen
+
+    @property
+    def metrics(self) -> SessionMetrics | None:
+        return self._bridge.metrics if self._bridge else None
 
     @property
     def pid(self) -> int | None:
@@ -68,3 +309,7 @@ class Session:
 
     def __exit__(self, *_):
         self.stop()
+
+
+def _discard(data: bytes):
+    pass
@@ -0,0 +1,13 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def _clean_home(tmp_path, monkeypatch):
+    # Shells started by the tests must not pick up the user's rc files.
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.delenv("PROMPT_COMMAND", raising=False)
@@ -0,0 +1,27 @@
+from iobridge.ansi import AnsiParser, CSI, TEXT, strip_ansi
+from iobridge.screen import BOLD, Screen
+
+SAMPLE = (
+    b"\x1b]133;A\x07\x1b[01;32muser@host\x1b[00m:\x1b[01;34m~\x1b[00m$ \x1b]133;B\x07ls\r\n"
+    b"\x1b[0m\x1b[01;34msrc\x1b[0m  \x1b[01;32mrun.sh\x1b[0m\r\n"
+    b"\x1b[12;1H\x1b(B\x1b[m\x1b[1;34mproc\x1b[m\x1b[K\x1b[?2004h\x1bP1$r0m\x1b\\\x1b=done\r\n"
+)
+PLAIN = b"user@host:~$ ls\r\nsrc  run.sh\r\nprocdone\r\n"
+
+
+def test_strip_ansi():
+    assert strip_ansi(SAMPLE) == PLAIN
+
+
+def test_parser_strips_sequences_split_across_reads():
+    for cut in range(len(SAMPLE) + 1):
+        parser = AnsiParser()
+        assert parser.strip(SAMPLE[:cut]) + parser.strip(SAMPLE[cut:]) == strip_ansi(SAMPLE), cut
+
+
+def test_misordered_csi_is_one_ignored_sequence():
+    assert AnsiParser().feed(b"a\x1b[ 1mb") == [(TEXT, b"a"), (CSI, b"\x1b[ 1m"), (TEXT, b"b")]
+    screen = Screen(20, 2)
+    screen.feed(b"\x1b[1m\x1b[ 1mx\x1b[ q")
+    assert screen.lines()[0] == "x"
+    assert screen._cur.attr & BOLD
@@ -0,0 +1,72 @@
+import os
+import time
+import asyncio
+
+import pytest
+
+from session.async_session import AsyncSession
+
+
+async def _read_until(chunks, marker: bytes) -> bytes:
+    seen = b""
+    async for chunk in chunks:
+        seen += chunk
+        if marker in seen:
+            break
+    return seen
+
+
+def test_output_iterates_until_the_shell_exits():
+    async def run():
+        async with AsyncSession(shell="sh") as session:
+            chunks = session.output()
+            session.write(b"echo out-$((40 + 2))\n")
+            seen = await asyncio.wait_for(_read_until(chunks, b"out-42\r\n"), 5)
+            session.write(b"echo last; exit 3\n")
+            async for chunk in chunks:
+                seen += chunk
+            # The iterator ended at EOF; a second one ends at once.
+            assert [chunk async for chunk in session.output()] == []
+            return seen, await session.wait_closed()
+
+    seen, status = asyncio.run(run())
+    assert b"out-42\r\n" in seen
+    assert seen.endswith(b"last\r\n")
+    assert status == 3
+
+
+def test_send_waits_until_the_pty_takes_the_data():
+    data = b"x" * (1 << 20)
+
+    async def run():
+        # Nothing reads the input for half a second, then cat drains it.
+        shell = "sh -c 'stty raw -echo; sleep 0.5; exec cat >/dev/null'"
+        async with AsyncSession(shell=shell) as session:
+            await asyncio.sleep(0.1)
+            began = time.monotonic()
+            send  = asyncio.ensure_future(session.send(data))
+            await asyncio.sleep(0.2)
+            assert not send.done()
+            assert session._drained is not None and session._pending
+            # write() queues behind it and returns at once.
+            session.write(b"y" * 1000)
+            await asyncio.wait_for(send, 10)
+            waited = time.monotonic() - began
+            await asyncio.wait_for(session.send(b"z"), 5)
+            assert session._drained is None and not session._pending
+            return waited
+
+    assert asyncio.run(run()) >= 0.3
+
+
+@pytest.mark.skipif(not hasattr(os, "pidfd_open"), reason="no pidfd_open")
+def test_wait_closed_returns_the_exit_code_through_a_pidfd():
+    async def run():
+        async with AsyncSession(shell="sh -c 'sleep 0.2; exit 7'") as session:
+            # Exit is watched through a pidfd, not by polling.
+            assert session._pidfd is not None
+            status = await asyncio.wait_for(session.wait_closed(), 5)
+            assert session._pidfd is None
+            return status
+
+    assert asyncio.run(run()) == 7
@@ -0,0 +1,44 @@
+import json
+import time
+import signal
+import asyncio
+
+from session.session import Session
+from session.async_session import AsyncSession
+
+
+def test_session_signal_and_recording(tmp_path):
+    path = tmp_path / "s.cast"
+    with Session(shell="sh") as session:
+        session.attach(lambda data: None)
+        session.wait_ready(timeout=5)
+        session.resize(100, 40)
+        session.record(str(path))
+        session.send_raw(b"sleep 30\n")
+        time.sleep(0.2)
+        began = time.monotonic()
+        session.send_signal(signal.SIGINT)
+        assert session.run("echo back", timeout=5).output == b"back\r\n"
+        assert time.monotonic() - began < 5
+        session.stop_recording()
+    header = json.loads(path.read_text().splitlines()[0])
+    assert (header["width"], header["height"]) == (100, 40)
+
+
+def test_async_session_signal_and_recording(tmp_path):
+    path = tmp_path / "a.cast"
+
+    async def run():
+        async with AsyncSession(shell="sh") as session:
+            await session.resize(100, 40)
+            session.record(str(path))
+            await session.send(b"sleep 30\n")
+            await asyncio.sleep(0.2)
+            session.send_signal(signal.SIGINT)
+            result = await session.run("echo back", timeout=5)
+            session.stop_recording()
+            return result
+
+    assert asyncio.run(run()).output == b"back\r\n"
+    header = json.loads(path.read_text().splitlines()[0])
+    assert (header["width"], header["height"]) == (100, 40)
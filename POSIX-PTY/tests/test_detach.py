@@ -0,0 +1,52 @@
+import time
+
+import pytest
+
+from session.session import Session
+
+
+def test_detach_silences_stdout_and_counts_output(capfd):
+    with Session(shell="bash", shell_integration=True, scrollback=1 << 16) as session:
+        session.wait_ready(0, timeout=10)
+        time.sleep(0.05)
+        capfd.readouterr()
+        offset  = session.detach()
+        prompts = session.prompts
+        session.send_command("echo LEAKED_AFTER_DETACH", delay=0)
+        session.wait_ready(prompts, timeout=10)
+        time.sleep(0.05)
+        assert session.offset > offset
+    assert "LEAKED_AFTER_DETACH" not in capfd.readouterr().out
+
+
+def test_reattach_replays_what_was_missed():
+    first, second = [], []
+    with Session(shell="bash", shell_integration=True, scrollback=1 << 16) as session:
+        session.attach(first.append)
+        session.wait_ready(0, timeout=10)
+        time.sleep(0.05)
+        offset  = session.detach()
+        seen    = len(first)
+        prompts = session.prompts
+        session.send_command("echo MISSED_$((6 * 7))", delay=0)
+        session.wait_ready(prompts, timeout=10)
+        time.sleep(0.05)
+        missed = session.offset - offset
+        session.attach(second.append, since=offset)
+        replayed = b"".join(second)
+        assert len(replayed) == missed
+        assert b"MISSED_42\r\n" in replayed
+        assert len(first) == seen
+        # Live output follows the replay, with nothing repeated.
+        assert session.run("echo LIVE", timeout=5).output == b"LIVE\r\n"
+        time.sleep(0.05)
+        assert b"".join(second)[:missed] == replayed
+        assert b"".join(second).count(b"MISSED_42\r\n") == 1
+
+
+def test_detach_without_scrollback_is_refused():
+    with Session(shell="sh") as session:
+        with pytest.raises(RuntimeError):
+            session.detach()
+        with pytest.raises(RuntimeError):
+            session.attach(lambda data: None, since=0)
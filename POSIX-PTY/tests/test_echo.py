@@ -0,0 +1,94 @@
+import time
+
+from iobridge import io_bridge
+from iobridge.io_bridge import OutputReader
+from session.session import Session
+
+
+class _Reader(OutputReader):
+
+    def __init__(self):
+        super().__init__(-1)
+        self._banner_done = True
+        self.out = []
+
+    def _emit(self, data: bytes):
+        self.out.append(data)
+
+
+def _run(session: Session, command: str, out: list) -> bytes:
+    out.clear()
+    prompts = session.prompts
+    session.send_command(command, delay=0)
+    session.wait_ready(prompts, timeout=10)
+    return b"".join(out)
+
+
+def test_echo_off_with_readline_keeps_output():
+    out = []
+    with Session(shell="bash", echo=False, shell_integration=True) as session:
+        session.attach(out.append)
+        session.wait_ready(0, timeout=10)
+        _run(session, "true", out)
+        data = _run(session, "echo true; echo true; echo done", out)
+    assert b"true\r\ntrue\r\ndone\r\n" in data
+
+
+def test_echo_on_with_readline_hides_command():
+    out = []
+    with Session(shell="bash", shell_integration=True) as session:
+        session.attach(out.append)
+        session.wait_ready(0, timeout=10)
+        data = _run(session, "echo true; echo done", out)
+    assert b"true\r\ndone\r\n" in data
+    assert b"echo true" not in data
+
+
+def test_unmatched_echo_expires(monkeypatch):
+    monkeypatch.setattr(io_bridge, "_ECHO_WAIT", 0.01)
+    reader = _Reader()
+    reader.suppress_next("true")
+    time.sleep(0.02)
+    reader.feed(b"true\r\n")
+    reader.flush()
+    assert b"".join(reader.out) == b"true\r\n"
+
+
+def test_echo_is_suppressed_before_it_expires():
+    reader = _Reader()
+    reader.suppress_next("true")
+    reader.feed(b"true\r\nreal\r\n")
+    reader.flush()
+    assert b"".join(reader.out) == b"real\r\n"
+
+
+def test_partial_line_is_released_at_flush():
+    reader = _Reader()
+    reader.feed(b"l")
+    assert reader.out == [] and reader.deadline is not None
+    reader.flush()
+    assert b"".join(reader.out) == b"l"
+    reader.feed(b"s\r\nfile\r\n")
+    reader.flush()
+    assert b"".join(reader.out) == b"ls\r\nfile\r\n"
+
+
+def test_partial_line_is_held_while_an_echo_is_queued():
+    reader = _Reader()
+    reader.suppress_next("ls")
+    reader.feed(b"l")
+    reader.flush()
+    assert reader.out == []
+    reader.feed(b"s\r\nfile\r\n")
+    reader.flush()
+    assert b"".join(reader.out) == b"file\r\n"
+
+
+def test_partial_interrupt_echo_is_held():
+    reader = _Reader()
+    reader.feed(b"^")
+    reader.flush()
+    assert reader.out == []
+    reader.feed(b"C\r\n")
+    reader.flush()
+    assert reader.out == []
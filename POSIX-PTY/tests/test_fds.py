@@ -0,0 +1,68 @@
+import os
+import time
+import resource
+
+import pytest
+
+from iobridge.io_bridge import OutputReader
+from session.session import Session
+
+# select() cannot watch fds at or past FD_SETSIZE (1024); a server with a few
+# hundred sessions gets there.
+HIGH_FD = 1100
+
+
+@pytest.fixture
+def high_fds():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard != resource.RLIM_INFINITY and hard <= HIGH_FD + 64:
+        pytest.skip(f"RLIMIT_NOFILE hard limit {hard} is too low")
+    resource.setrlimit(resource.RLIMIT_NOFILE, (max(soft, HIGH_FD + 64), hard))
+    yield
+    resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+
+
+class _Reader(OutputReader):
+
+    def __init__(self, fd: int):
+        super().__init__(fd)
+        self._banner_done = True
+        self.out = []
+
+    def _emit(self, data: bytes):
+        self.out.append(data)
+
+
+def test_reader_above_fd_setsize(high_fds):
+    r, w = os.pipe()
+    os.dup2(r, HIGH_FD)
+    os.close(r)
+    reader = _Reader(HIGH_FD)
+    reader.start()
+    try:
+        os.write(w, b"hello\n")
+        deadline = time.monotonic() + 5
+        while b"hello" not in b"".join(reader.out) and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        os.close(w)
+        reader.join(5)
+        os.close(HIGH_FD)
+    assert b"hello\n" in b"".join(reader.out)
+    assert not reader.is_alive()
+
+
+def test_session_above_fd_setsize(high_fds):
+    # Fill the low fds so the PTY, the wake pipes and the writer land past 1024.
+    held = []
+    while not held or held[-1] < HIGH_FD:
+        held.append(os.open(os.devnull, os.O_RDONLY))
+    try:
+        with Session(shell="sh") as session:
+            session.attach(lambda data: None)
+            session.wait_ready(timeout=5)
+            result = session.run("echo hello", timeout=10)
+    finally:
+        for fd in held:
+            os.close(fd)
+    assert result.output == b"hello\r\n"
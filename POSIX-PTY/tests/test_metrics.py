@@ -0,0 +1,47 @@
+import time
+import asyncio
+
+from iobridge import metrics
+from iobridge.io_bridge import OutputReader
+from iobridge.reactor import Reactor
+from session.session import Session
+from session.async_session import AsyncSession
+
+
+def _alive(session_metrics) -> bool:
+    # Other tests' sessions may still be retiring, so look at these ones only.
+    return session_metrics in metrics._registry._live
+
+
+def _becomes(session_metrics, alive: bool) -> bool:
+    # Threaded readers register and retire on their own threads.
+    deadline = time.monotonic() + 5
+    while _alive(session_metrics) != alive and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return _alive(session_metrics) == alive
+
+
+def test_only_started_readers_count_as_alive():
+    before  = metrics.snapshot()["sessions_alive"]
+    readers = [OutputReader(-1) for _ in range(5)]
+    assert not any(_alive(reader.metrics) for reader in readers)
+    assert metrics.snapshot()["sessions_alive"] <= before
+    readers[0].feed(b"output\r\n")
+    readers[0].finish()
+    assert not _alive(readers[0].metrics)
+
+    reactor = Reactor(1)
+    try:
+        with Session(shell="sh") as threaded, Session(shell="sh", reactor=reactor) as reacting:
+            started = [session.metrics for session in (threaded, reacting)]
+            assert all(_becomes(session_metrics, True) for session_metrics in started)
+    finally:
+        reactor.stop()
+    assert all(_becomes(session_metrics, False) for session_metrics in started)
+
+    async def run():
+        async with AsyncSession(shell="sh") as session:
+            assert _alive(session.metrics)
+            return session.metrics
+
+    assert _becomes(asyncio.run(run()), False)
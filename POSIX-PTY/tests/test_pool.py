@@ -0,0 +1,41 @@
+import pytest
+
+from session.pool import SessionPool, _setup_command
+
+
+def test_setup_command_quotes_values():
+    assert _setup_command(None, {"A_1": "x; rm -rf ~"}) == "export A_1='x; rm -rf ~'"
+
+
+@pytest.mark.parametrize("key", ["X=1; rm -rf ~; Y", "1X", "A-B", "", "A B", "A\nB"])
+def test_setup_command_rejects_bad_names(key):
+    with pytest.raises(ValueError):
+        _setup_command(None, {key: "1"})
+
+
+def test_acquire_rejects_bad_env_before_spawning():
+    pool = SessionPool(size=0, shell="sh")
+    with pytest.raises(ValueError):
+        pool.acquire(lambda data: None, env={"X=1; touch pwned; Y": "1"})
+    assert pool.metrics["spawned"] == 0
+
+
+def test_acquire_stops_the_shell_when_setup_times_out():
+    pool    = SessionPool(size=0, shell="sh")
+    spawned = []
+    spawn   = pool._spawn
+
+    def busy():
+        # A shell stuck in a foreground job never runs the setup line.
+        parked = spawn()
+        parked[0].wait_ready(timeout=5)
+        parked[0].send_raw(b"sleep 30\n")
+        spawned.append(parked[0])
+        return parked
+
+    pool._spawn = busy
+    with pytest.raises(TimeoutError):
+        pool.acquire(lambda data: None, env={"A": "1"}, timeout=0.2)
+    session = spawned[0]
+    assert session.wait_ready(session.prompts, timeout=5) == "exit"
+    assert pool.metrics["retired"] == 1
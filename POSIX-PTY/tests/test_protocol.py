@@ -0,0 +1,140 @@
+import random
+import signal
+import asyncio
+
+import pytest
+
+from server import protocol
+from server.mux_server import Multiplexer, serve_stream
+from server.protocol import ProtocolError
+
+
+def _payload(buffers: list) -> memoryview:
+    return memoryview(b"".join(buffers)[protocol.HEADER_SIZE:])
+
+
+def test_parse_signal_rejects_unknown_numbers():
+    assert protocol.parse_signal(_payload(protocol.encode_signal(1, signal.SIGINT))) == signal.SIGINT
+    with pytest.raises(ProtocolError):
+        protocol.parse_signal(_payload(protocol.encode_signal(1, 200)))
+
+
+def test_parse_open_rejects_bad_utf8():
+    payload = _payload(protocol.encode(protocol.OPEN, 1, b"\x00\x50\x00\x18\xff\xfe"))
+    with pytest.raises(ProtocolError):
+        protocol.parse_open(payload)
+
+
+@pytest.mark.parametrize("frame", [
+    protocol.encode_signal(1, 200),
+    protocol.encode(protocol.OPEN, 2, b"\x00\x50\x00\x18\xff\xfe"),
+])
+def test_bad_frame_closes_connection_cleanly(frame):
+    errors = []
+
+    async def handle(reader, writer):
+        try:
+            await serve_stream(reader, writer, shell="sh")
+        except Exception as error:
+            errors.append(error)
+
+    async def run():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port   = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.writelines(protocol.encode_open(1, 80, 24) + frame)
+        await writer.drain()
+        while await asyncio.wait_for(reader.read(65536), 10):
+            pass
+        writer.close()
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(run())
+    assert errors == []
+
+
+def _frames(count: int) -> list[tuple[int, int, bytes]]:
+    rng = random.Random(7)
+    return [
+        (protocol.DATA, rng.randrange(1, 64), rng.randbytes(rng.choice((0, 1, 7, 300, 5000))))
+        for _ in range(count)
+    ]
+
+
+@pytest.mark.parametrize("step", [1, 3, 7, 64, 4096, 1 << 20])
+def test_decoder_round_trip_at_any_split(step):
+    frames  = _frames(200)
+    stream  = b"".join(b"".join(protocol.encode(*frame)) for frame in frames)
+    decoder = protocol.FrameDecoder()
+    decoded = []
+    for pos in range(0, len(stream), step):
+        decoded += [(f.kind, f.channel, bytes(f.payload)) for f in decoder.feed(stream[pos:pos + step])]
+    assert decoded == frames
+
+
+def test_decoder_rejects_oversized_split_header():
+    decoder = protocol.FrameDecoder(max_payload=16)
+    data    = b"".join(protocol.encode(protocol.DATA, 1, b"x" * 17))
+    decoder.feed(data[:3])
+    with pytest.raises(ProtocolError):
+        decoder.feed(data[3:])
+
+
+def test_loopback_round_trip():
+    async def run():
+        server = await asyncio.start_server(
+            lambda reader, writer: serve_stream(reader, writer, shell="sh"), "127.0.0.1", 0
+        )
+        port    = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        decoder = protocol.FrameDecoder()
+        output  = {1: b"", 2: b""}
+        exits   = {}
+        for channel in output:
+            writer.writelines(protocol.encode_open(channel, 80, 24))
+            writer.writelines(protocol.encode(protocol.DATA, channel, f"echo chan-$((40 + {channel}))\n".encode()))
+        await writer.drain()
+        while not all(b"chan-4" + str(channel).encode() + b"\r\n" in output[channel] for channel in output):
+            data = await asyncio.wait_for(reader.read(65536), 10)
+            assert data
+            for frame in decoder.feed(data):
+                if frame.kind == protocol.DATA:
+                    output[frame.channel] += bytes(frame.payload)
+        for channel in output:
+            writer.writelines(protocol.encode(protocol.DATA, channel, b"exit 3\n"))
+        await writer.drain()
+        while len(exits) < 2:
+            data = await asyncio.wait_for(reader.read(65536), 10)
+            assert data
+            for frame in decoder.feed(data):
+                if frame.kind == protocol.EXIT:
+                    exits[frame.channel] = protocol.parse_exit(frame.payload)
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return exits
+
+    assert asyncio.run(run()) == {1: 3, 2: 3}
+
+
+def test_open_runs_only_allowed_commands():
+    async def run():
+        frames = []
+
+        async def send(buffers):
+            frames.extend(protocol.FrameDecoder().feed(b"".join(buffers)))
+
+        mux = Multiplexer(send, shell="sh", shells=("cat",))
+        await mux.feed(b"".join(protocol.encode_open(1, 80, 24, "sh -c 'echo pwned'")))
+        await mux.feed(b"".join(protocol.encode_open(2, 80, 24, "cat")))
+        await mux.feed(b"".join(protocol.encode_open(3, 80, 24, "sh")))
+        channels = set(mux._channels)
+        commands = [mux._channels[channel]._shell for channel in sorted(channels)]
+        await mux.close()
+        return [(f.kind, f.channel) for f in frames], channels, commands
+
+    frames, channels, commands = asyncio.run(run())
+    assert frames == [(protocol.CLOSE, 1)]
+    assert channels == {2, 3}
+    assert commands == ["cat", "sh"]
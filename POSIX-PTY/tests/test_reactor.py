@@ -0,0 +1,27 @@
+import threading
+
+from session.session import Session
+from iobridge.reactor import Reactor
+
+
+def _boom(data: bytes):
+    raise RuntimeError("sink failed")
+
+
+def test_failing_sink_does_not_stall_other_sessions():
+    reactor = Reactor(1)
+    closed  = threading.Event()
+    try:
+        with Session(shell="sh", reactor=reactor) as bad, Session(shell="sh", reactor=reactor) as good:
+            for session in (bad, good):
+                session.attach(lambda data: None)
+                session.wait_ready(timeout=5)
+            bad.on_close(closed.set)
+            bad.attach(_boom)
+            bad.send_raw(b"echo x\n")
+            # Only the session whose sink raised is finished.
+            assert closed.wait(5)
+            assert good.run("echo still here", timeout=5).output == b"still here\r\n"
+            assert reactor.sessions == 1
+    finally:
+        reactor.stop()
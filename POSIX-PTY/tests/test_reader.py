@@ -0,0 +1,121 @@
+import os
+import time
+import tty
+
+import pytest
+
+from iobridge import io_bridge
+from iobridge.io_bridge import OutputReader
+from iobridge.marks import COMMAND_END
+
+
+class _Reader(OutputReader):
+
+    def __init__(self, fd: int = -1):
+        super().__init__(fd)
+        self._banner_done = True
+        self.out = []
+
+    def _emit(self, data: bytes):
+        self.out.append(data)
+
+
+LINES = b"one\r\n\x1b[32mtwo\x1b[0m\r\n^C\r\nthree\nfour\r\n"
+
+
+def test_lines_split_at_every_offset():
+    for cut in range(1, len(LINES)):
+        reader = _Reader()
+        reader.feed(LINES[:cut])
+        reader.feed(LINES[cut:])
+        reader.flush()
+        assert b"".join(reader.out) == b"one\r\n\x1b[32mtwo\x1b[0m\r\nthree\nfour\r\n", cut
+
+
+def test_skipped_lines_stop_at_a_mark():
+    reader = _Reader()
+    reader.track_marks()
+    seen = []
+    reader.on_mark(lambda mark: seen.append((mark, b"".join(reader.out))))
+    reader.feed(b"one\r\ntwo\r\n\x1b]133;D;3\x07three\r\n")
+    reader.flush()
+    assert seen == [((COMMAND_END, 3, {}), b"one\r\ntwo\r\n\x1b]133;D;3\x07")]
+    assert b"".join(reader.out).endswith(b"three\r\n")
+
+
+def test_overlong_partial_line_is_passed_on():
+    reader = _Reader()
+    reader.suppress_next("ls")
+    reader.feed(b"x" * (io_bridge._LINE_MAX - 1))
+    reader.flush()
+    assert reader.out == []
+    reader.feed(b"x")
+    reader.flush()
+    assert b"".join(reader.out) == b"x" * io_bridge._LINE_MAX
+    # The queued echo is still there for the line it belongs to.
+    reader.feed(b"\r\nls\r\nfile\r\n")
+    reader.flush()
+    assert b"".join(reader.out) == b"x" * io_bridge._LINE_MAX + b"\r\nfile\r\n"
+
+
+def test_unterminated_mark_is_passed_on_as_text():
+    reader = _Reader()
+    reader.track_marks()
+    seen = []
+    reader.on_mark(seen.append)
+    data = b"hello\r\n\x1b]133;" + b"y\r\n" * 1000000
+    for pos in range(0, len(data), 4096):
+        reader.feed(data[pos:pos + 4096])
+    reader.flush()
+    assert seen == []
+    assert b"".join(reader.out) == data
+    assert len(reader._buf.data) <= 4 * io_bridge._LINE_MAX
+
+
+def test_mark_split_across_reads_is_still_dispatched():
+    reader = _Reader()
+    reader.track_marks()
+    seen = []
+    reader.on_mark(seen.append)
+    reader.feed(b"out\r\n\x1b]133;D")
+    reader.feed(b";0\x07next\r\n")
+    reader.flush()
+    assert seen == [(COMMAND_END, 0, {})]
+    assert b"".join(reader.out) == b"out\r\n\x1b]133;D;0\x07next\r\n"
+
+
+@pytest.fixture
+def pty_pair():
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    yield master, slave
+    os.close(master)
+    os.close(slave)
+
+
+def test_single_read_goes_out_without_waiting(pty_pair):
+    master, slave = pty_pair
+    reader = _Reader(master)
+    os.write(slave, b"a")
+    assert reader.fill()
+    reader.flush_if_idle()
+    assert reader.out == [b"a"]
+    assert reader.deadline is None
+
+
+def test_burst_is_held_until_the_idle_gap(pty_pair, monkeypatch):
+    monkeypatch.setattr(io_bridge, "_IDLE_GAP", 0.05)
+    master, slave = pty_pair
+    reader = _Reader(master)
+    reader._flush_delay = 1.0
+    data   = b"line\r\n" * 1000
+    os.write(slave, data)
+    # Two reads: the first one finds more queued behind it.
+    for _ in range(2):
+        assert reader.fill()
+        reader.flush_if_idle()
+    assert reader.out == []
+    assert reader.deadline <= time.monotonic() + io_bridge._IDLE_GAP
+    time.sleep(io_bridge._IDLE_GAP * 2)
+    reader.flush_if_idle()
+    assert reader.out == [data]
@@ -0,0 +1,68 @@
+import sys
+import json
+import time
+import threading
+
+from session.recording import Cast, Recorder
+
+
+def _stamps(path) -> list[float]:
+    with open(path, "rb") as f:
+        f.readline()
+        return [json.loads(line)[0] for line in f]
+
+
+def test_times_never_decrease_across_threads(tmp_path):
+    path     = str(tmp_path / "t.cast")
+    recorder = Recorder(path, 80, 24, flush_interval=0.01)
+    start    = threading.Barrier(4)
+
+    def record(emit, data):
+        start.wait()
+        for _ in range(20000):
+            emit(data)
+
+    threads = [
+        threading.Thread(target=record, args=(recorder.output, b"o")),
+        threading.Thread(target=record, args=(recorder.output, b"p")),
+        threading.Thread(target=record, args=(recorder.input, b"i")),
+        threading.Thread(target=record, args=(lambda _: recorder.resize(80, 24), None)),
+    ]
+    # Switch threads as often as possible, between a stamp and its append too.
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    recorder.close()
+    stamps = _stamps(path)
+    assert len(stamps) == 80000
+    assert all(a <= b for a, b in zip(stamps, stamps[1:]))
+
+
+def test_index_seek(tmp_path):
+    path     = str(tmp_path / "s.cast")
+    recorder = Recorder(path, 80, 24, index_interval=0.02, flush_interval=0.01)
+    for i in range(40):
+        recorder.output(b"line %d\r\n" % i)
+        if i % 10 == 9:
+            recorder.marker(str(i))
+        time.sleep(0.005)
+    recorder.close()
+
+    with Cast(path) as cast:
+        events = list(cast.events())
+        assert [data for _, code, data in events if code == "o"] == [f"line {i}\r\n" for i in range(40)]
+        assert len(cast._index) // 16 >= 5
+        for stamp, _, _ in events:
+            # The index point is never past the event, and a seek starts there.
+            offset = cast.offset_at(stamp)
+            assert cast._body <= offset
+            assert list(cast.events(stamp)) == [e for e in events if e[0] >= stamp]
+        middle = events[len(events) // 2][0]
+        assert list(cast.events(middle, middle + 0.05)) == [e for e in events if middle <= e[0] <= middle + 0.05]
+        assert cast.offset_at(middle) > cast._body
@@ -0,0 +1,47 @@
+import time
+
+import pytest
+
+from session import command
+from session.session import Session
+
+
+@pytest.fixture(params=["sh", "bash"])
+def session(request):
+    with Session(shell=request.param) as session:
+        session.attach(lambda data: None)
+        session.wait_ready(timeout=5)
+        yield session
+
+
+def test_exit_codes(session):
+    assert session.run("true", timeout=5).exit_code == 0
+    assert session.run("false", timeout=5).exit_code == 1
+    result = session.run("echo partial; sh -c 'exit 4'", timeout=5)
+    assert (result.output, result.exit_code) == (b"partial\r\n", 4)
+
+
+def test_multi_line_output(session):
+    result = session.run("printf 'one\\ntwo\\n\\nfour'; echo", timeout=5)
+    assert result.output == b"one\r\ntwo\r\n\r\nfour\r\n"
+    lines = session.run("seq 1 2000", timeout=10).output.split(b"\r\n")
+    assert lines == [b"%d" % i for i in range(1, 2001)] + [b""]
+
+
+def test_timeout_leaves_the_session_usable(session):
+    began = time.monotonic()
+    with pytest.raises(TimeoutError):
+        session.run("sleep 0.5; echo late", timeout=0.1)
+    assert time.monotonic() - began < 0.4
+    # The late command's output and marks do not leak into the next result.
+    result = session.run("echo next", timeout=5)
+    assert (result.output, result.exit_code) == (b"next\r\n", 0)
+
+
+def test_command_containing_the_sentinel_token(session, monkeypatch):
+    monkeypatch.setattr(command.secrets, "token_hex", lambda n: "feedface")
+    # The command line, echoed by the tty, spells out the closing mark.
+    text   = "pypty=feedface \\033]133;D;9;pypty=feedface\\007"
+    result = session.run(f"printf '%s\\n' '{text}'", timeout=5)
+    assert result.output == text.encode() + b"\r\n"
+    assert result.exit_code == 0
@@ -0,0 +1,113 @@
+import random
+
+import pytest
+
+from iobridge.screen import DeltaRenderer, Screen
+
+
+def _state(screen: Screen):
+    buf = screen._buf
+    return (
+        [row.tolist() for row in buf.chars],
+        [row.tolist() for row in buf.attrs],
+        screen.cursor,
+        screen._cur.pending,
+        screen.alternate,
+    )
+
+
+def _replayed(screen: Screen) -> Screen:
+    copy = Screen(screen.cols, screen.rows)
+    copy.feed(screen.snapshot())
+    return copy
+
+
+def test_overwriting_either_half_of_a_wide_character_blanks_both():
+    screen = Screen(5, 6)
+    screen.feed("A中ML8".encode())
+    screen.feed(b"\x1b[1;3HZ")
+    assert screen.lines()[:2] == ["A ZML", "8"]
+    assert _state(_replayed(screen)) == _state(screen)
+
+    screen.feed("\x1b[1;2H中\x1b[1;2HZ".encode())
+    assert screen.lines()[0] == "AZ ML"
+    assert _state(_replayed(screen)) == _state(screen)
+
+
+def test_erasing_inserting_and_deleting_never_split_a_wide_character():
+    for edit, line in (
+        (b"\x1b[1;3H\x1b[K", "A"),
+        (b"\x1b[1;3H\x1b[1K", "   ML"),
+        (b"\x1b[1;3H\x1b[X", "A  ML"),
+        (b"\x1b[1;3H\x1b[P", "A ML"),
+        (b"\x1b[1;3H\x1b[@", "A   ML"),
+        (b"\x1b[1;1H\x1b[4@", "    A"),
+    ):
+        screen = Screen(6, 2)
+        screen.feed("A中ML".encode() + edit)
+        assert screen.lines()[0] == line, edit
+        assert _state(_replayed(screen)) == _state(screen), edit
+
+
+def test_wide_character_at_the_last_column_with_a_pending_wrap():
+    screen = Screen(4, 2)
+    screen.feed("ab文".encode())
+    assert screen._cur.pending
+    assert _state(_replayed(screen)) == _state(screen)
+
+
+_PIECES = [
+    "A", "ML", "8", "中", "文字", "x中y", "é", "\r", "\n", "\b", "\t",
+    "\x1b[D", "\x1b[2C", "\x1b[H", "\x1b[2;3H", "\x1b[3b", "\x1b7", "\x1b8", "\x1bM",
+    "\x1b[K", "\x1b[1K", "\x1b[J", "\x1b[1J", "\x1b[2X", "\x1b[2@", "\x1b[P",
+    "\x1b[L", "\x1b[M", "\x1b[S", "\x1b[T", "\x1b[2;4r", "\x1b[r",
+    "\x1b[?1049h", "\x1b[?1049l", "\x1b[?7l", "\x1b[?7h", "\x1b[31m", "\x1b[0m",
+]
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_snapshot_and_delta_round_trip(seed):
+    rng    = random.Random(seed)
+    cols   = rng.randint(2, 8)
+    rows   = rng.randint(2, 6)
+    screen = Screen(cols, rows)
+    viewer = Screen(cols, rows)
+    delta  = DeltaRenderer(screen)
+    for _ in range(rng.randint(1, 8)):
+        screen.feed("".join(rng.choice(_PIECES) for _ in range(rng.randint(1, 6))).encode())
+        viewer.feed(delta.render())
+        assert _state(viewer)[:3] == _state(screen)[:3]
+        assert _state(_replayed(screen)) == _state(screen)
+
+
+def test_scroll_region():
+    screen = Screen(10, 5)
+    screen.feed(b"top\r\n\x1b[2;4r")
+    assert screen.cursor == (0, 0)
+    screen.feed(b"\x1b[4;1H" + b"".join(b"\r\nline%d" % i for i in range(5)))
+    assert screen.lines() == ["top", "line2", "line3", "line4", ""]
+    screen.feed(b"\x1b[2;1H\x1bMnew")
+    assert screen.lines() == ["top", "new", "line2", "line3", ""]
+    screen.feed(b"\x1b[5;1Hbottom\n")
+    # Below the region a newline does not scroll it.
+    assert screen.lines() == ["top", "new", "line2", "line3", "bottom"]
+    replayed = _replayed(screen)
+    assert _state(replayed) == _state(screen)
+    assert (replayed._top, replayed._bottom) == (1, 3)
+    screen.feed(b"\x1b[4;1H\nmore")
+    replayed.feed(b"\x1b[4;1H\nmore")
+    assert replayed.lines() == screen.lines() == ["top", "line2", "line3", "more", "bottom"]
+
+
+def test_alternate_screen():
+    screen = Screen(10, 3)
+    screen.feed(b"shell $ vi\r\n\x1b[?1049h\x1b[H\x1b[2Jeditor\x1b[3;1H~")
+    assert screen.alternate
+    assert screen.lines() == ["editor", "", "~"]
+    replayed = _replayed(screen)
+    assert _state(replayed) == _state(screen)
+    for terminal in (screen, replayed):
+        terminal.feed(b"\x1b[?1049l")
+    assert not replayed.alternate
+    assert replayed.lines() == screen.lines() == ["shell $ vi", "", ""]
+    assert replayed.cursor == screen.cursor == (0, 1)
@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from iobridge.scrollback import Scrollback
+
+
+def _append(scrollback: Scrollback, size: int) -> bytes:
+    # Each byte tells its own offset (mod 251), so misplaced data shows.
+    chunk = bytes((scrollback.end + i) % 251 for i in range(size))
+    scrollback.append(chunk)
+    return chunk
+
+
+def _filled(scrollback: Scrollback, sizes) -> bytes:
+    return b"".join(_append(scrollback, size) for size in sizes)
+
+
+def _check_every_range(scrollback: Scrollback, history: bytes):
+    start = scrollback.start
+    for lo in range(0, len(history) + 1):
+        for hi in range(lo, len(history) + 1):
+            assert scrollback.read(lo, hi) == history[max(lo, start):hi], (lo, hi)
+
+
+def test_read_across_the_wrap_point():
+    scrollback = Scrollback(16)
+    history    = _filled(scrollback, [10, 10, 3])
+    assert scrollback.start == len(history) - 16
+    # The ring now holds bytes 7..23, wrapped at offset 16.
+    assert scrollback.read(7, 23) == history[7:23]
+    assert scrollback.read(14, 18) == history[14:18]
+    _check_every_range(scrollback, history)
+
+
+def test_read_across_the_spill_boundary(tmp_path):
+    scrollback = Scrollback(16, spill_dir=str(tmp_path), segment_size=8)
+    history    = _filled(scrollback, [5] * 9 + [1, 20])
+    assert scrollback.start == 0
+    # Seven segments hold 0..50, the ring 50..66.
+    assert len(scrollback._segments) == 7
+    assert scrollback.read(45, 55) == history[45:55]
+    assert scrollback.read(0) == history
+    _check_every_range(scrollback, history)
+    scrollback.close()
+
+
+def test_dropped_offset_reads_from_the_oldest_byte_held(tmp_path):
+    ring = Scrollback(16)
+    history = _filled(ring, [40])
+    assert ring.read(0) == history[-16:]
+    assert ring.read(3, 30) == history[24:30]
+    assert ring.read(0, 10) == b""
+
+    spilled = Scrollback(16, spill_dir=str(tmp_path), segment_size=8, max_spill=16)
+    history = _filled(spilled, [7] * 12)
+    start   = spilled.start
+    assert 0 < start < len(history) - 16
+    assert spilled.read(0) == history[start:]
+    assert spilled.read(0, start) == b""
+    _check_every_range(spilled, history)
+    spilled.close()
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_appends_match_a_flat_copy(seed, tmp_path):
+    rng        = random.Random(seed)
+    spill      = rng.random() < 0.7
+    scrollback = Scrollback(
+        rng.randint(4, 64),
+        spill_dir=str(tmp_path) if spill else None,
+        segment_size=rng.randint(4, 64),
+        max_spill=rng.choice((None, 32, 100)),
+    )
+    history = b""
+    for _ in range(30):
+        history += _append(scrollback, rng.choice((0, 1, 3, 17, 70, 150)))
+        lo = rng.randint(0, len(history))
+        hi = rng.randint(lo, len(history))
+        assert scrollback.read(lo, hi) == history[max(lo, scrollback.start):hi]
+    assert scrollback.end == len(history)
+    assert scrollback.read(scrollback.start) == history[scrollback.start:]
+    scrollback.close()
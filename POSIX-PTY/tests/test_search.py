@@ -0,0 +1,86 @@
+from iobridge.ansi import strip_ansi
+from session.search import COMMAND, OUTPUT, Hit, SearchIndex
+
+PROMPT = b"\x1b]133;A\x07$ \x1b]133;B\x07"
+
+
+def _command(command: bytes, output: bytes) -> bytes:
+    return PROMPT + command + b"\r\n\x1b]133;C\x07" + output + b"\x1b]133;D;0\x07"
+
+
+def _stream(count: int) -> bytes:
+    # Enough lines to seal a few 64-line segments and leave some unsealed.
+    return b"".join(
+        _command(b"cat log-%d" % i, b"\x1b[32mentry %d of log-%d\x1b[0m\r\nok\r\n" % (i, i)) for i in range(count)
+    )
+
+
+def _visible(data: bytes, hit: Hit) -> bytes:
+    # The raw output from a hit's offset to the end of its line, as displayed.
+    line = data[hit.offset:data.index(b"\n", hit.offset)]
+    return strip_ansi(line).rstrip(b"\r")
+
+
+def test_hits_carry_session_time_command_and_kind(tmp_path):
+    with SearchIndex(str(tmp_path)) as index:
+        data = _command(b"ls -l", b"\x1b[31mfile.txt\x1b[0m\r\n")
+        index.feed("alice")(data, 100.0)
+        index.feed("bob")(b"file.txt is elsewhere\r\n", 200.0)
+        index.flush()
+        assert index.search("file.txt") == [
+            Hit("alice", 100.0, data.index(b"\x1b[31m"), 1, OUTPUT, "file.txt"),
+            Hit("bob", 200.0, 0, 0, OUTPUT, "file.txt is elsewhere"),
+        ]
+        assert index.search("ls", kind=COMMAND) == [Hit("alice", 100.0, len(b"\x1b]133;A\x07"), 1, COMMAND, "$ ls -l")]
+        assert [hit.session for hit in index.search("FILE", session="bob")] == ["bob"]
+        assert index.search("FILE", ignore_case=False) == []
+        assert [hit.time for hit in index.search("file", since=150.0)] == [200.0]
+        assert index.search("absent") == []
+
+
+def test_offsets_point_at_the_raw_output(tmp_path):
+    data = _stream(100)
+    with SearchIndex(str(tmp_path), segment_lines=64) as index:
+        output = index.feed("s")
+        # Chunks that cut marks, escapes and lines anywhere.
+        for pos in range(0, len(data), 37):
+            output(data[pos:pos + 37], 1000.0 + pos)
+            if pos % 370 == 0:
+                index.flush()
+        index.flush()
+        assert index._segments and index._lines
+        for i in (0, 20, 63, 64, 99):
+            hits = index.search(f"entry {i} of log-{i}")
+            assert len(hits) == 1
+            assert _visible(data, hits[0]) == b"entry %d of log-%d" % (i, i)
+            assert hits[0].command == i + 1
+        hits = index.search(r"log-(4|7)2$", regex=True, kind=COMMAND)
+        assert [_visible(data, hit) for hit in hits] == [b"$ cat log-42", b"$ cat log-72"]
+        assert [_visible(data, hit) for hit in index.search("ok", limit=3)] == [b"ok"] * 3
+
+
+def test_reopened_index_finds_the_same_lines(tmp_path):
+    data = _stream(100)
+    cut  = len(data) * 9 // 10
+    with SearchIndex(str(tmp_path), segment_lines=64) as index:
+        output = index.feed("s")
+        output(data[:cut], 1000.0)
+        index.flush()
+        output(data[cut:], 1001.0)
+        index.flush()
+        # A sealed segment, and lines only in the log.
+        assert index._segments and index._lines
+        lines  = index.lines
+        before = index.search("log-", limit=1000)
+    assert len(before) == 200
+
+    with SearchIndex(str(tmp_path), segment_lines=64) as index:
+        assert index.lines == lines
+        assert index.search("log-", limit=1000) == before
+        index.feed("t")(b"after reopening\r\n", 2000.0)
+        index.flush()
+        assert index.search("reopening") == [Hit("t", 2000.0, 0, 0, OUTPUT, "after reopening")]
+
+    with SearchIndex(str(tmp_path), segment_lines=64) as index:
+        assert index.lines == lines + 1
+        assert len(index.search("o", limit=10000)) == index.lines
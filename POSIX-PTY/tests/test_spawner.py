@@ -0,0 +1,47 @@
+import gc
+import os
+
+import pytest
+
+from process.spawner import ForkServer
+
+
+@pytest.fixture
+def server():
+    server = ForkServer()
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def masters():
+    fds = []
+    yield fds
+    for fd in fds:
+        os.close(fd)
+
+
+def _spawn(server: ForkServer, masters: list, command: str):
+    # The master stays open: a hung-up slave cannot become the child's tty.
+    master, slave = os.openpty()
+    masters.append(master)
+    return server.spawn(command, slave)
+
+
+def test_exit_code_kept_until_the_handle_goes(server, masters):
+    child = _spawn(server, masters, "sh -c 'exit 3'")
+    assert child.wait() == 3
+    assert child.poll() == 3
+    pid = child.pid
+    del child
+    gc.collect()
+    assert pid not in server._codes
+
+
+def test_unwaited_children_leave_no_codes(server, masters):
+    dropped = [_spawn(server, masters, "/bin/true").pid for _ in range(20)]
+    # Exits are sent in the order they are reaped: these ones come first.
+    assert _spawn(server, masters, "sleep 0.3").wait() == 0
+    assert not set(dropped) & server._codes.keys()
+    assert not set(dropped) & server._handed
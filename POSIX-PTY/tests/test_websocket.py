@@ -0,0 +1,49 @@
+import json
+import asyncio
+
+import pytest
+
+pytest.importorskip("websockets")
+
+from websockets.asyncio.client import connect
+from websockets.asyncio.server import serve
+from websockets.exceptions     import ConnectionClosed
+
+from server.websocket_server import TerminalServer
+
+
+async def _until(websocket, marker: bytes) -> bytes:
+    seen = b""
+    while marker not in seen:
+        data = await asyncio.wait_for(websocket.recv(), 10)
+        if isinstance(data, bytes):
+            seen += data
+    return seen
+
+
+def test_reconnect_without_scrollback_resumes_live():
+    terminals = TerminalServer(shell="sh", scrollback=0)
+
+    async def run():
+        async with serve(terminals.handle, "127.0.0.1", 0) as server:
+            url = "ws://127.0.0.1:%d/" % server.sockets[0].getsockname()[1]
+            async with connect(url) as websocket:
+                session = json.loads(await websocket.recv())
+                await websocket.send(b"echo first-$((6*7))\r")
+                await _until(websocket, b"first-42")
+            async with connect(f"{url}?session={session['id']}&offset=0") as websocket:
+                resumed = json.loads(await websocket.recv())
+                await websocket.send(b"echo second-$((6*7))\r")
+                output = await _until(websocket, b"second-42")
+                await websocket.send(b"exit\r")
+                # The shell's exit closes the socket; the pump had no scrollback to close.
+                with pytest.raises(ConnectionClosed):
+                    while True:
+                        await asyncio.wait_for(websocket.recv(), 10)
+            return session, resumed, output
+
+    session, resumed, output = asyncio.run(run())
+    assert resumed["id"] == session["id"]
+    assert resumed["offset"] > 0
+    assert b"first-42" not in output
+    assert terminals.sessions == 0